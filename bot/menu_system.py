@@ -12,7 +12,7 @@
 
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Callable, Awaitable, Dict, List, Optional
+from typing import Callable, Awaitable, Dict, Iterable, List, Optional, Tuple
 from telethon import Button, events
 
 # tlgbot и logger будут внедрены при загрузке (как в плагинах)
@@ -30,48 +30,124 @@ class MenuEntry:
     admin_only: bool = False
 
 
-MENU_REGISTRY: List[MenuEntry] = []
+class MenuRegistry(list):
+    """Список пунктов меню с индексом по key и счётчиком версий.
+
+    Любое изменение (в том числе прямые операции со списком) пересобирает
+    индекс, увеличивает `version` и сбрасывает только затронутые клавиатуры.
+    """
+
+    def __init__(self, entries: Iterable[MenuEntry] = ()) -> None:
+        super().__init__(entries)
+        self.version = 0
+        self._index: Dict[str, MenuEntry] = {}
+        self._ordered: Optional[Tuple[MenuEntry, ...]] = None
+        self._reindex()
+
+    def _reindex(self) -> None:
+        index: Dict[str, MenuEntry] = {}
+        for entry in self:
+            index.setdefault(entry.key, entry)
+        self._index = index
+        self._ordered = None
+
+    def touch(self, entries: Iterable[MenuEntry]) -> None:
+        """Отметить изменение пунктов: новая версия и адресный сброс кэша."""
+        entries = list(entries)
+        self._reindex()
+        self.version += 1
+        _invalidate_for(entries)
+
+    def get(self, key: str) -> Optional[MenuEntry]:
+        return self._index.get(key)
+
+    def __contains__(self, item) -> bool:
+        if isinstance(item, str):
+            return item in self._index
+        return super().__contains__(item)
+
+    def ordered(self) -> Tuple[MenuEntry, ...]:
+        """Пункты, отсортированные по order (пересчитывается только после изменений)."""
+        if self._ordered is None:
+            self._ordered = tuple(sorted(self, key=lambda e: e.order))
+        return self._ordered
+
+    # прямые операции со списком (тесты, откат состояния) тоже поддерживают индекс
+    def append(self, entry) -> None:
+        super().append(entry)
+        self.touch([entry])
+
+    def extend(self, entries) -> None:
+        entries = list(entries)
+        super().extend(entries)
+        self.touch(entries)
+
+    def insert(self, index, entry) -> None:
+        super().insert(index, entry)
+        self.touch([entry])
+
+    def remove(self, entry) -> None:
+        super().remove(entry)
+        self.touch([entry])
+
+    def pop(self, index=-1):
+        entry = super().pop(index)
+        self.touch([entry])
+        return entry
+
+    def clear(self) -> None:
+        removed = list(self)
+        super().clear()
+        self.touch(removed)
+
+    def __setitem__(self, index, value) -> None:
+        removed = list(self)
+        super().__setitem__(index, value)
+        self.touch(removed + list(self))
+
+    def __delitem__(self, index) -> None:
+        removed = list(self)
+        super().__delitem__(index)
+        self.touch(removed)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+
 MENU_CACHE: Dict[str, List[List[Button]]] = {}
+MENU_REGISTRY: MenuRegistry = MenuRegistry()
 
 
 def _is_admin_user(user_id) -> bool:
-    """Безопасная проверка: user_id может быть str/int, tlgbot.admins может содержать int.
+    """Безопасная проверка: user_id может быть str/int.
 
-    Приводим всё к int и проверяем принадлежность. Ошибки глушим.
+    У TlgBotCore множество админов готово (`is_admin`, O(1)); для прочих
+    объектов бота приводим всё к int. Ошибки глушим.
     """
+    is_admin = getattr(tlgbot, 'is_admin', None)
+    if is_admin is not None:
+        return is_admin(user_id)
     try:
-        admins = getattr(tlgbot, 'admins', None)
-        if admins is None:
-            if logger:
-                logger.debug("menu_system: no tlgbot.admins attribute yet")
-            return False
+        admins = getattr(tlgbot, 'admins', None) or ()
         uid = int(user_id)
-        admin_set = {int(a) for a in admins}
-        result = uid in admin_set
-        if logger:
-            logger.debug(f"menu_system: _is_admin_user uid={uid} admins={list(admin_set)} -> {result}")
-        return result
+        return any(int(a) == uid for a in admins)
     except Exception as e:  # noqa: BLE001
         if logger:
-            logger.debug(f"menu_system: _is_admin_user error for user_id={user_id}: {e}")
+            logger.debug("menu_system: _is_admin_user error for user_id=%s: %s", user_id, e)
         return False
 
-# При обновлении версии с поддержкой admin_only логично сбросить кэш (одноразово при импорте)
-MENU_CACHE.clear()
-
 
 def register_menu(entry: dict | MenuEntry) -> None:
     """Регистрирует пункт меню. Игнорирует дубликат key."""
     if isinstance(entry, dict):
         entry = MenuEntry(**entry)  # type: ignore[arg-type]
     # Проверка уникальности
-    if any(e.key == entry.key for e in MENU_REGISTRY):
+    if entry.key in MENU_REGISTRY:
         return
-    MENU_REGISTRY.append(entry)
-    # Инвалидация всех кэшей (пока грубо)
-    MENU_CACHE.clear()
+    MENU_REGISTRY.append(entry)  # сбрасывает только затронутые клавиатуры
     if logger:
-        logger.debug(f"menu_system: registered menu entry {entry.key}")
+        logger.debug("menu_system: registered menu entry %s", entry.key)
 
 
 def invalidate_menu(lang: Optional[str] = None) -> None:
@@ -79,8 +155,43 @@ def invalidate_menu(lang: Optional[str] = None) -> None:
         MENU_CACHE.clear()
     else:
         MENU_CACHE.pop(lang, None)
+        MENU_CACHE.pop(f"{lang}|admin", None)
+    if logger:
+        logger.debug("menu_system: invalidate %s", 'all' if lang is None else lang)
+
+
+def invalidate_admin_menus() -> None:
+    """Сбросить только админские клавиатуры всех языков."""
+    for cache_key in [k for k in MENU_CACHE if k.endswith('|admin')]:
+        del MENU_CACHE[cache_key]
+
+
+def _on_admins_changed(added, removed) -> None:
+    """Слушатель TlgBotCore: состав админов изменился."""
+    invalidate_admin_menus()
+    if logger:
+        logger.debug("menu_system: admins changed +%s -%s", sorted(added), sorted(removed))
+
+
+def _invalidate_for(entries: List[MenuEntry]) -> None:
+    """Сбросить клавиатуры, в которых могли быть эти пункты.
+
+    Админские пункты видны только в админском меню — обычное не трогаем.
+    """
+    if not entries or not MENU_CACHE:
+        return
+    if all(e.admin_only for e in entries):
+        invalidate_admin_menus()
+    else:
+        MENU_CACHE.clear()
     if logger:
-        logger.debug(f"menu_system: invalidate {'all' if lang is None else lang}")
+        logger.debug("menu_system: invalidated keyboards for %s", [e.key for e in entries])
+
+
+def _on_locales_reloaded(langs) -> None:
+    """Слушатель I18n: сбросить меню языков, чьи переводы перезагружены."""
+    for lang in langs:
+        invalidate_menu(lang)
 
 
 def build_menu(lang: str, is_admin: bool = False) -> List[List[Button]]:
@@ -88,7 +199,7 @@ def build_menu(lang: str, is_admin: bool = False) -> List[List[Button]]:
     cache_key = f"{lang}|admin" if is_admin else lang
     if cache_key in MENU_CACHE:
         if logger:
-            logger.debug(f"menu_system: cache hit key={cache_key}")
+            logger.debug("menu_system: cache hit key=%s", cache_key)
         return MENU_CACHE[cache_key]
     
     # Убедимся, что tlgbot и i18n существуют и правильно инициализированы
@@ -96,16 +207,10 @@ def build_menu(lang: str, is_admin: bool = False) -> List[List[Button]]:
     tlgbot = globals().get('tlgbot') or tlgbot
     
     if hasattr(tlgbot, 'i18n') and tlgbot.i18n:
-        # Проверим, загружены ли локали правильно
-        if not hasattr(tlgbot.i18n, 'locales') or not tlgbot.i18n.locales:
-            if logger:
-                logger.warning(f"menu_system: i18n locales not loaded, reloading for lang={lang}")
-            # Перезагрузим локали
-            tlgbot.i18n.load_locales("bot/locales")
-            
+        # локали не перечитываются здесь: изменения файлов подхватывает LocaleWatcher
         t = tlgbot.i18n.t  # type: ignore[attr-defined]
         if logger:
-            logger.debug(f"menu_system: using i18n from tlgbot for {lang}")
+            logger.debug("menu_system: using i18n from tlgbot for %s", lang)
     else:
         # Фолбэк - просто возвращаем ключ (но логгируем ошибку)
         if logger:
@@ -115,8 +220,8 @@ def build_menu(lang: str, is_admin: bool = False) -> List[List[Button]]:
     rows: List[List[Button]] = []
     current: List[Button] = []
     if logger:
-        logger.debug(f"menu_system: building menu for lang={lang} is_admin={is_admin}")
-    for entry in sorted(MENU_REGISTRY, key=lambda e: e.order):
+        logger.debug("menu_system: building menu for lang=%s is_admin=%s", lang, is_admin)
+    for entry in MENU_REGISTRY.ordered():
         if not getattr(entry, 'enabled', True):
             continue
         if getattr(entry, 'admin_only', False) and not is_admin:
@@ -132,34 +237,52 @@ def build_menu(lang: str, is_admin: bool = False) -> List[List[Button]]:
     return rows
 
 
+def prebuild_menus(langs: Optional[Iterable[str]] = None) -> int:
+    """Построить клавиатуры для всех пар (язык, роль) заранее, после загрузки плагинов.
+
+    Без `langs` берутся все загруженные локали. Возвращает число клавиатур.
+    """
+    if langs is None:
+        langs = list(getattr(getattr(tlgbot, 'i18n', None), 'locales', None) or ())
+    count = 0
+    for lang in langs:
+        for is_admin in (False, True):
+            build_menu(lang, is_admin=is_admin)
+            count += 1
+    if logger:
+        logger.debug("menu_system: prebuilt %s keyboards (registry v%s)", count, MENU_REGISTRY.version)
+    return count
+
+
 async def dispatch_command(key: str, event) -> None:
     """Находит MenuEntry и вызывает связанный handler."""
     # Убедимся что i18n доступен перед вызовом handler
     global tlgbot
     tlgbot = globals().get('tlgbot') or tlgbot
     
-    # Если у event нет атрибута lang, добавим его
+    # Если у event нет атрибута lang, добавим его из контекста апдейта
     if not hasattr(event, 'lang') and hasattr(event, 'sender_id'):
         try:
-            from cfg.config_tlg import DAYLOG_DB_PATH
-            from core.database.manager import DatabaseManager
-            db = DatabaseManager(db_path=DAYLOG_DB_PATH)
-            user_row = db.get_user(event.sender_id)
-            if user_row and 'language_code' in user_row:
-                event.lang = user_row['language_code']
+            from bot.user_context import get_user_context
+            ctx = get_user_context(event, tlgbot)
+            if ctx.diary_user and ctx.diary_user.get('language_code'):
+                event.lang = ctx.diary_user['language_code']
                 if logger:
-                    logger.debug(f"menu_system: dispatch_command set event.lang={event.lang}")
+                    logger.debug("menu_system: dispatch_command set event.lang=%s", event.lang)
         except Exception as e:
             if logger:
                 logger.error(f"menu_system: dispatch_command error getting language: {e}")
     
-    entry = next((e for e in MENU_REGISTRY if e.key == key), None)
+    entry = MENU_REGISTRY.get(key)
     if not entry:
         if logger:
             logger.error(f"menu_system: unknown key {key}")
         return
     plugins = getattr(tlgbot, '_plugins', {})
     mod = plugins.get(entry.plugin)
+    # ленивый режим: плагин мог быть зарегистрирован только манифестом
+    if not mod and hasattr(tlgbot, 'ensure_plugin_loaded') and tlgbot.ensure_plugin_loaded(entry.plugin):
+        mod = plugins.get(entry.plugin)
     if not mod:
         if logger:
             logger.error(f"menu_system: plugin {entry.plugin} not loaded")
@@ -197,7 +320,7 @@ def ensure_menu_router():
         try:
             await event.delete()
             if logger:
-                logger.debug(f"menu_system: deleted menu message after button click for key={key}")
+                logger.debug("menu_system: deleted menu message after button click for key=%s", key)
         except Exception as e:
             if logger:
                 logger.error(f"menu_system: error deleting menu message: {e}")
@@ -216,7 +339,9 @@ def init_menu_system(tlg, log=None):
     Обновляет глобальные ссылки и цепляет роутер, если ещё не.
     """
     global tlgbot, logger
-    if tlg is not None:
+    if tlg is not None and tlg is not tlgbot:
+        # другой бот (или первый вызов): кэш мог быть собран с другим i18n
+        MENU_CACHE.clear()
         tlgbot = tlg
     if log is not None:
         logger = log
@@ -232,32 +357,38 @@ def init_menu_system(tlg, log=None):
             if logger:
                 logger.debug("menu_system: attached i18n from globals")
 
+    # перезагрузка переводов сбрасывает меню затронутых языков
+    add_listener = getattr(getattr(tlgbot, 'i18n', None), 'add_reload_listener', None)
+    if add_listener is not None:
+        add_listener(_on_locales_reloaded)
+
+    add_admin_listener = getattr(tlgbot, 'add_admin_listener', None)
+    if add_admin_listener is not None:
+        add_admin_listener(_on_admins_changed)
+
     ensure_menu_router()
-    
-    # Очищаем кэш при инициализации чтобы избежать проблем с локализацией
-    MENU_CACHE.clear()
     if logger:
-        logger.debug("menu_system: initialized and cache cleared")
+        logger.debug("menu_system: initialized")
     
     return tlgbot
 
 
-def disable_menu(key: str):
-    for e in MENU_REGISTRY:
-        if e.key == key:
-            e.enabled = False
-    MENU_CACHE.clear()
+def _set_enabled(key: str, enabled: bool) -> None:
+    entry = MENU_REGISTRY.get(key)
+    if entry is None or entry.enabled == enabled:
+        return
+    entry.enabled = enabled
+    MENU_REGISTRY.touch([entry])
     if logger:
-        logger.debug(f"menu_system: disabled {key}")
+        logger.debug("menu_system: %s %s", 'enabled' if enabled else 'disabled', key)
+
+
+def disable_menu(key: str):
+    _set_enabled(key, False)
 
 
 def enable_menu(key: str):
-    for e in MENU_REGISTRY:
-        if e.key == key:
-            e.enabled = True
-    MENU_CACHE.clear()
-    if logger:
-        logger.debug(f"menu_system: enabled {key}")
+    _set_enabled(key, True)
 
 
 def _ensure_admin_entries():
@@ -265,12 +396,10 @@ def _ensure_admin_entries():
     before = len(MENU_REGISTRY)
     admin_entries: list[dict] = []  # перенесены в _core.py
     for e in admin_entries:
-        if not any(x.key == e['key'] for x in MENU_REGISTRY):
+        if e['key'] not in MENU_REGISTRY:
             register_menu(e)
-    if len(MENU_REGISTRY) != before:
-        MENU_CACHE.clear()
-        if logger:
-            logger.debug("menu_system: admin entries ensured & cache cleared")
+    if len(MENU_REGISTRY) != before and logger:
+        logger.debug("menu_system: admin entries ensured")
 
 
 def bootstrap_default_entries():  # noqa: D401
@@ -284,6 +413,6 @@ def send_main_menu(event, lang: str, start_ready_text: str):
     user_id = getattr(event, 'sender_id', 0)
     is_admin = _is_admin_user(user_id)
     if logger:
-        logger.debug(f"menu_system: send_main_menu user_id={user_id} is_admin={is_admin}")
+        logger.debug("menu_system: send_main_menu user_id=%s is_admin=%s", user_id, is_admin)
     buttons = build_menu(lang, is_admin=is_admin)
     return event.respond(start_ready_text, buttons=buttons)
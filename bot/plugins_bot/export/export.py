@@ -13,16 +13,36 @@ import calendar
 import os
 import re
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
+from core.export.jobs import ExportJobQueue
+from core.export.manager import export_format_of, period_bounds
 
 # tlgbot глобально доступен в плагинах через динамическую загрузку
 tlgbot = globals().get('tlgbot')
 # Логгер доступен через глобальные переменные
 logger = globals().get('logger')
 
+# Названия периодов: ключ локали и запасной текст
+PERIOD_NAMES = {
+    "today": ("period_today", "сегодня"),
+    "week": ("period_week", "текущую неделю"),
+    "month": ("period_month", "текущий месяц"),
+    "all": ("period_all", "весь период"),
+}
+
 # Словарь для хранения пользовательских выборов диапазона дат
 # {user_id: {"start_date": date, "waiting_for": "end_date" или None}}
 custom_date_states = {}
 
+def get_export_jobs():
+    """
+    Очередь заданий экспорта бота (создаётся при старте; здесь - запасной вариант)
+    """
+    jobs = getattr(tlgbot, 'export_jobs', None)
+    if jobs is None:
+        jobs = tlgbot.export_jobs = ExportJobQueue(metrics=getattr(tlgbot, 'metrics', None))
+    return jobs
+
 async def init_export_manager():
     """
     Инициализация менеджера экспорта
@@ -30,13 +50,24 @@ async def init_export_manager():
     try:
         from core.database.manager import DatabaseManager
         from core.export.manager import DiaryExportManager
+        from cfg import config_tlg
         from cfg.config_tlg import DAYLOG_DB_PATH
         
-        # Создаем экземпляр DB с явным указанием пути к БД
-        db_manager = DatabaseManager(db_path=DAYLOG_DB_PATH)
+        # БД дневника бота; без неё — экземпляр с явным указанием пути к БД
+        db_manager = getattr(tlgbot, 'diary_db', None) or DatabaseManager(db_path=DAYLOG_DB_PATH)
+        
+        # Сжатие и разбиение больших экспортов на архив по годам/месяцам
+        archive = getattr(config_tlg, 'EXPORT_ARCHIVE_SETTINGS', None) or {}
         
-        # Создаем экземпляр менеджера экспорта
-        export_manager = DiaryExportManager(db_manager)
+        # Создаем экземпляр менеджера экспорта (с кэшем файлов, если он включён)
+        export_manager = DiaryExportManager(
+            db_manager,
+            cache=getattr(tlgbot, 'export_cache', None),
+            compression=archive.get('compression'),
+            compress_threshold=int(archive.get('threshold_mb', 4) * 1024 * 1024),
+            split=archive.get('split'),
+            split_threshold=int(archive.get('split_threshold_mb', 32) * 1024 * 1024),
+        )
         
         return export_manager
     except Exception as e:
@@ -47,11 +78,10 @@ async def show_export_options(event):
     """
     Показывает кнопки выбора периода для экспорта записей
     """
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
-    message = tlgbot.i18n.t('export_select_period', lang=lang) or "Выберите период для экспорта записей в Markdown:"
+    message = tlgbot.i18n.t('export_select_period', lang=lang) or "Выберите период для экспорта записей:"
     
     # Создаем кнопки выбора периода
     buttons = [
@@ -77,7 +107,7 @@ async def process_custom_date_input(event, user_id, date_input):
     """
     Обрабатывает ввод пользовательской даты
     """
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Проверяем, не хочет ли пользователь отменить операцию
@@ -141,11 +171,20 @@ async def process_custom_date_input(event, user_id, date_input):
 
 async def export_entries_by_period(event, period_type, start_date=None, end_date=None):
     """
-    Экспортирует записи за выбранный период
+    Ставит экспорт записей за выбранный период в очередь заданий
+    
+    Файл собирается в потоке пула, прогресс и итог показываются в статусном
+    сообщении с кнопкой отмены. Обработчик не ждёт окончания экспорта.
     """
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
-    lang = getattr(user, 'lang', None) or 'ru'
+    ctx = get_user_context(event, tlgbot)
+    lang = getattr(ctx.user, 'lang', None) or 'ru'
+    
+    export_jobs = get_export_jobs()
+    busy_msg = tlgbot.i18n.t('export_busy', lang=lang) or "Экспорт уже выполняется. Дождитесь его окончания или отмените."
+    if export_jobs.get(user_id):
+        await event.respond(busy_msg)
+        return
     
     # Инициализация менеджера экспорта
     export_manager = await init_export_manager()
@@ -153,59 +192,90 @@ async def export_entries_by_period(event, period_type, start_date=None, end_date
         await event.respond(tlgbot.i18n.t('export_error', lang=lang) or "Ошибка при инициализации экспорта.")
         return
     
-    entries = []
-    period_name = ""
-    
-    # Получаем записи в зависимости от выбранного периода
-    if period_type == "today":
-        entries = export_manager.get_today_entries(user_id)
-        period_name = tlgbot.i18n.t('period_today', lang=lang) or "сегодня"
-        
-    elif period_type == "week":
-        entries = export_manager.get_week_entries(user_id)
-        period_name = tlgbot.i18n.t('period_week', lang=lang) or "текущую неделю"
-        
-    elif period_type == "month":
-        entries = export_manager.get_month_entries(user_id)
-        period_name = tlgbot.i18n.t('period_month', lang=lang) or "текущий месяц"
-        
-    elif period_type == "all":
-        entries = export_manager.get_all_entries(user_id)
-        period_name = tlgbot.i18n.t('period_all', lang=lang) or "весь период"
-        
-    elif period_type == "custom" and start_date and end_date:
-        entries = export_manager.get_entries_by_custom_period(user_id, start_date, end_date)
+    # Границы периода: текущие неделя/месяц — по часовому поясу пользователя
+    if period_type == "custom" and start_date and end_date:
         # Форматируем период для отображения
         start_str = start_date.strftime("%d.%m.%Y")
         end_str = end_date.strftime("%d.%m.%Y")
         period_name = f"{start_str} - {end_str}"
-    
-    # Проверяем, есть ли записи для экспорта
-    if not entries:
-        no_entries_msg = tlgbot.i18n.t('export_no_entries', lang=lang, period=period_name) or f"Нет записей для экспорта за период: {period_name}"
-        await event.respond(no_entries_msg)
+    elif period_type in PERIOD_NAMES:
+        start_date, end_date = period_bounds(period_type, ctx.today())
+        key, fallback = PERIOD_NAMES[period_type]
+        period_name = tlgbot.i18n.t(key, lang=lang) or fallback
+    else:
+        logger.warning(f"Неизвестный период экспорта {period_type} для пользователя {user_id}")
         return
     
     # Формируем заголовок для файла экспорта
     title = tlgbot.i18n.t('export_title', lang=lang, period=period_name) or f"Мой дневник за {period_name}"
     
-    # Экспортируем записи в Markdown
-    filename, filepath = export_manager.export_markdown(user_id, entries, title)
+    # Формат из настроек пользователя (markdown, json, jsonl, csv)
+    export_format = export_format_of(ctx.settings.get('export_format'))
+    
+    # Статусное сообщение: прогресс и кнопка отмены
+    cancel_buttons = [Button.inline(tlgbot.i18n.t('btn_cancel', lang=lang) or "Отмена", data="export_cancel")]
+    status = await event.respond(
+        tlgbot.i18n.t('export_processing', lang=lang) or "Обработка экспорта...", buttons=cancel_buttons
+    )
+    
+    def run(job):
+        # поток пула: записи читаются курсором и сразу пишутся в файл кэша,
+        # а без кэша - в буфер в памяти (без лишней записи и чтения с диска)
+        job.total = export_manager.count_period(user_id, start_date, end_date)
+        export = export_manager.export_period if export_manager.cache is not None \
+            else export_manager.export_period_buffer
+        return export(user_id, start_date, end_date, export_format, title, progress=job.advance)
+    
+    async def report(job):
+        text = tlgbot.i18n.t('export_progress', lang=lang, done=job.done, total=job.total) \
+            or f"Экспорт: {job.done} из {job.total} записей..."
+        await status.edit(text, buttons=cancel_buttons)
     
-    if not filename or not filepath or not os.path.exists(filepath):
+    async def finish(job):
+        await deliver_export(event, status, job, lang, period_name)
+    
+    if export_jobs.submit(user_id, run, on_progress=report, on_done=finish) is None:
+        await status.edit(busy_msg, buttons=None)
+
+async def deliver_export(event, status, job, lang, period_name):
+    """
+    Итог задания экспорта: файл пользователю или сообщение об отмене/ошибке
+    
+    Результат задания - путь к файлу кэша или буфер с именем файла (его
+    Telethon читает напрямую и использует имя); буфер закрывается после отправки.
+    """
+    if job.status == "cancelled":
+        # сообщение уже заменено обработчиком кнопки отмены
+        return
+    filename, file, count = job.result if job.status == "done" else ("", None, None)
+    try:
+        await _send_export(event, status, filename, file, count, lang, period_name)
+    finally:
+        if file is not None and not isinstance(file, str):
+            file.close()
+
+async def _send_export(event, status, filename, file, count, lang, period_name):
+    """
+    Сообщение об итоге и отправка файла (путь или буфер)
+    """
+    # Проверяем, есть ли записи для экспорта
+    if count == 0:
+        no_entries_msg = tlgbot.i18n.t('export_no_entries', lang=lang, period=period_name) or f"Нет записей для экспорта за период: {period_name}"
+        await status.edit(no_entries_msg, buttons=None)
+        return
+    
+    if not filename or file is None or (isinstance(file, str) and not os.path.exists(file)):
         export_error_msg = tlgbot.i18n.t('export_file_error', lang=lang) or "Ошибка при создании файла экспорта."
-        await event.respond(export_error_msg)
+        await status.edit(export_error_msg, buttons=None)
         return
     
     # Отправляем файл пользователю
-    success_msg = tlgbot.i18n.t('export_success', lang=lang, count=len(entries)) or f"Экспортировано {len(entries)} записей."
-    await event.respond(success_msg)
+    success_msg = tlgbot.i18n.t('export_success', lang=lang, count=count) or f"Экспортировано {count} записей."
+    await status.edit(success_msg, buttons=None)
     
     caption = tlgbot.i18n.t('export_file_caption', lang=lang, period=period_name) or f"Экспорт дневника за {period_name}"
-    await tlgbot.send_file(event.chat_id, filepath, caption=caption)
-    
-    # Опционально: удаляем файл после отправки
-    # os.remove(filepath)
+    # файлы кэша остаются для повторных экспортов, их удаляет уборщик кэша
+    await tlgbot.send_file(event.chat_id, file, caption=caption)
 
 @tlgbot.on(events.NewMessage(pattern=r'^/export'))
 @require_diary_user
@@ -223,8 +293,7 @@ async def export_today_callback(event):
     """Обработчик выбора экспорта за сегодня"""
     await event.answer()
     # Редактируем сообщение, убирая кнопки
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     await event.edit(tlgbot.i18n.t('export_processing_today', lang=lang) or "Подготовка экспорта за сегодня...")
     await export_entries_by_period(event, "today")
@@ -234,8 +303,7 @@ async def export_week_callback(event):
     """Обработчик выбора экспорта за неделю"""
     await event.answer()
     # Редактируем сообщение, убирая кнопки
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     await event.edit(tlgbot.i18n.t('export_processing_week', lang=lang) or "Подготовка экспорта за текущую неделю...")
     await export_entries_by_period(event, "week")
@@ -245,8 +313,7 @@ async def export_month_callback(event):
     """Обработчик выбора экспорта за месяц"""
     await event.answer()
     # Редактируем сообщение, убирая кнопки
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     await event.edit(tlgbot.i18n.t('export_processing_month', lang=lang) or "Подготовка экспорта за текущий месяц...")
     await export_entries_by_period(event, "month")
@@ -256,8 +323,7 @@ async def export_all_callback(event):
     """Обработчик выбора экспорта всех записей"""
     await event.answer()
     # Редактируем сообщение, убирая кнопки
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     await event.edit(tlgbot.i18n.t('export_processing_all', lang=lang) or "Подготовка экспорта всех записей...")
     await export_entries_by_period(event, "all")
@@ -268,7 +334,7 @@ async def export_custom_callback(event):
     await event.answer()
     
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Редактируем сообщение, убирая кнопки
@@ -288,13 +354,16 @@ async def export_cancel_callback(event):
     await event.answer()
     
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Очищаем состояние пользователя, если оно было
     if user_id in custom_date_states:
         del custom_date_states[user_id]
     
+    # Идущий экспорт останавливается перед следующей записью, файл удаляется
+    get_export_jobs().cancel(user_id)
+    
     # Отправляем сообщение об отмене
     await event.edit(tlgbot.i18n.t('export_canceled', lang=lang) or "Экспорт отменен.")
 
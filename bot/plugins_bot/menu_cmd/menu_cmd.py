@@ -9,6 +9,7 @@
 from telethon import events, Button
 from bot.menu_system import build_menu, _is_admin_user
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
 
 # tlgbot и logger внедряются динамически загрузчиком
 tlgbot = globals().get('tlgbot')
@@ -16,32 +17,12 @@ logger = globals().get('logger')
 
 
 def _get_lang(event):
-    user_id = event.sender_id
-    
-    # 1. Проверяем настройки бота
-    if hasattr(tlgbot, 'settings'):
-        user = tlgbot.settings.get_user(user_id)
-        if user and getattr(user, 'lang', None):
-            return user.lang
-    
-    # 2. Проверяем язык в event (мог быть добавлен require_diary_user)
-    if hasattr(event, 'lang') and event.lang:
-        return event.lang
-        
-    # 3. Проверяем в базе данных
+    # язык уже определён в контексте апдейта: настройки бота, затем БД дневника
     try:
-        from core.database.manager import DatabaseManager
-        from cfg.config_tlg import DAYLOG_DB_PATH
-        
-        db = DatabaseManager(db_path=DAYLOG_DB_PATH)
-        db_user = db.get_user(user_id)
-        if db_user and db_user.get('language_code'):
-            return db_user['language_code']
+        return get_user_context(event, tlgbot).lang
     except Exception as e:
         if logger:
-            logger.error(f"menu_cmd: Error getting language from DB: {e}")
-    
-    # 4. Возвращаем дефолт
+            logger.error(f"menu_cmd: Error getting language: {e}")
     return getattr(getattr(tlgbot, 'i18n', None), 'default_lang', 'ru')
 
 
@@ -4,6 +4,7 @@
 
 from telethon import events
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
 
 # tlgbot глобально доступен в плагинах через динамическую загрузку
 tlgbot = globals().get('tlgbot')
@@ -49,8 +50,7 @@ def get_menu_text(key, lang='ru'):
 @require_diary_user
 async def menu_handler(event):
     """Обработчик кнопок главного меню"""
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or getattr(tlgbot.i18n, 'default_lang', 'ru')
     
     message_text = event.message.text.strip()
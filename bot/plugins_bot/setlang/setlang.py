@@ -8,6 +8,7 @@ from bot.menu_system import invalidate_menu, build_menu
 from cfg import config_tlg
 from core.database.manager import DatabaseManager
 from cfg.config_tlg import DAYLOG_DB_PATH
+from bot.user_context import get_user_context, refresh_user_context
 
 # локальный экземпляр менеджера дневника для обновления language_code
 _diary_db = DatabaseManager(db_path=DAYLOG_DB_PATH)
@@ -17,7 +18,7 @@ tlgbot = globals().get('tlgbot')
 
 @tlgbot.on(tlgbot.cmd('setlang'))
 async def setlang_handler(event):
-    user = tlgbot.settings.get_user(event.sender_id)
+    user = get_user_context(event, tlgbot).user
     # Формируем inline-кнопки для выбора языка на основе config_tlg.AVAILABLE_LANGS
     buttons = [
         [Button.inline(name, data=f"setlang_{code}")]
@@ -30,7 +31,7 @@ async def setlang_handler(event):
 
 @tlgbot.on(events.CallbackQuery(pattern=b"setlang_.*"))
 async def setlang_callback_handler(event):
-    user = tlgbot.settings.get_user(event.sender_id)
+    user = get_user_context(event, tlgbot).user
     data = event.data.decode("utf-8")
     lang_code = data.replace("setlang_", "")
     if lang_code not in config_tlg.AVAILABLE_LANGS:
@@ -52,6 +53,8 @@ async def setlang_callback_handler(event):
             tlgbot._logger.warning(f"Не удалось обновить language_code в дневниковой БД: {_e}")
         except Exception:
             pass
+    # язык изменился — контекст апдейта больше не актуален
+    refresh_user_context(event, tlgbot)
     # Инвалидация кэша меню для нового языка
     try:
         invalidate_menu(user.lang)
@@ -2,6 +2,7 @@ from telethon import events, Button
 from core.database.manager import DatabaseManager
 from cfg.config_tlg import DAYLOG_DB_PATH
 from bot.reminders.manager import schedule_user_reminder, disable_user_reminder, parse_hhmm
+from bot.user_context import get_user_context
 from datetime import date
 import re
 
@@ -31,10 +32,10 @@ TIME_REGEX = re.compile(r'^(?:[01]\d|2[0-3]):[0-5]\d$')
 
 PRESET_TIMES = ["18:00", "19:00", "20:00", "21:00", "22:00"]
 
-def _resolve_lang(user_id: int) -> str:
-    """Определение языка пользователя из settings-хранилища с fallback на ru."""
+def _resolve_lang(event) -> str:
+    """Определение языка пользователя из контекста апдейта с fallback на ru."""
     try:
-        user = tlgbot.settings.get_user(user_id)
+        user = get_user_context(event, tlgbot).user
         if user and getattr(user, 'lang', None):
             return user.lang
     except Exception:  # noqa: BLE001
@@ -43,8 +44,7 @@ def _resolve_lang(user_id: int) -> str:
 
 @tlgbot.on(events.NewMessage(pattern=r'/settings'))
 async def settings_root(event):
-    user_id = event.sender_id
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     await event.respond(
         tlgbot.i18n.t('settings_reminder_title', lang=lang),
         buttons=[
@@ -60,7 +60,7 @@ async def settings_root(event):
 
 @tlgbot.on(events.CallbackQuery(pattern=b'rem:set'))
 async def show_time_menu(event):
-    lang = _resolve_lang(event.sender_id)
+    lang = _resolve_lang(event)
     rows = []
     row = []
     for t in PRESET_TIMES:
@@ -89,14 +89,14 @@ async def set_preset_time(event):
         return
     db.update_user_settings(user_id, reminder_time=time_value, reminder_enabled=1)
     schedule_user_reminder(tlgbot, db, user_id, time_value)
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     await event.edit(tlgbot.i18n.t('settings_reminder_saved', lang=lang, time=time_value))
 
 @tlgbot.on(events.CallbackQuery(pattern=b'rem:custom'))
 async def ask_custom_time(event):
     user_id = event.sender_id
     WAIT_CUSTOM_TIME[user_id] = True
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     await event.edit(tlgbot.i18n.t('settings_reminder_enter_time', lang=lang))
 
 @tlgbot.on(events.CallbackQuery(pattern=b'rem:disable'))
@@ -104,13 +104,13 @@ async def disable_time(event):
     user_id = event.sender_id
     db.update_user_settings(user_id, reminder_enabled=0)
     disable_user_reminder(tlgbot, user_id)
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     await event.edit(tlgbot.i18n.t('settings_reminder_disabled', lang=lang))
 
 @tlgbot.on(events.CallbackQuery(pattern=b'setlang:open'))
 async def settings_open_setlang(event):
     """Показать выбор языка прямо из меню настроек."""
-    user = tlgbot.settings.get_user(event.sender_id)
+    user = get_user_context(event, tlgbot).user
     from cfg import config_tlg as _cfg  # локальный импорт
     buttons = [
         [Button.inline(name, data=f"setlang_{code}".encode())]
@@ -130,7 +130,7 @@ async def catch_custom_time(event):
     if not WAIT_CUSTOM_TIME.get(user_id):
         return
     text = event.raw_text.strip()
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     if not TIME_REGEX.match(text):
         await event.respond(tlgbot.i18n.t('settings_reminder_invalid_format', lang=lang))
         return
@@ -142,8 +142,7 @@ async def catch_custom_time(event):
 @tlgbot.on(events.CallbackQuery(pattern=b'settings:cancel'))
 async def settings_cancel(event):
     """Обработчик кнопки Отмена в меню настроек."""
-    user_id = event.sender_id
-    lang = _resolve_lang(user_id)
+    lang = _resolve_lang(event)
     
     # Сначала ответим на callback, чтобы убрать индикатор загрузки
     await event.answer()
@@ -3,6 +3,7 @@
 """
 
 from telethon import events, Button
+from bot.user_context import get_user_context
 from bot.menu_system import build_menu, send_main_menu, init_menu_system
 import pytz
 
@@ -57,7 +58,7 @@ def create_timezone_buttons():
 @tlgbot.on(tlgbot.cmd('start'))
 async def start_cmd_plugin(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or getattr(tlgbot.i18n, 'default_lang', 'ru')
     try:
         from core.database.manager import DatabaseManager
@@ -114,7 +115,7 @@ async def start_cmd_plugin(event):
 @tlgbot.on(events.CallbackQuery(pattern=r'^tz:'))
 async def timezone_callback(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or getattr(tlgbot.i18n, 'default_lang', 'ru')
     
     # Получаем выбранный часовой пояс из callback data
@@ -1,6 +1,5 @@
 # Плагин для команды /today с мастером заполнения записи
 
-from datetime import date
 try:
     from bot.menu_system import register_menu
     # Регистрация пункта меню (если вызов повторится — будет проигнорирован)
@@ -11,6 +10,8 @@ except Exception:
     pass
 from telethon import events
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
+from bot.tlgbotcore.logging_config import lazy, log_sampled
 from core.diary import DiaryManager
 
 # tlgbot глобально доступен в плагинах через динамическую загрузку
@@ -24,11 +25,9 @@ diary_manager = DiaryManager(tlgbot, logger, getattr(tlgbot, 'i18n', None))
 # Глобальный обработчик для отслеживания всех callback-данных (отладочный)
 @tlgbot.on(events.CallbackQuery())
 async def global_callback_monitor(event):
-    try:
-        data = event.data.decode("utf-8")
-        logger.debug(f"[TODAY] GLOBAL CALLBACK MONITOR: {data}")
-    except Exception as e:
-        logger.debug(f"[TODAY] GLOBAL CALLBACK MONITOR: Error processing callback: {str(e)}")
+    # срабатывает на каждую кнопку: пишем выборочно и без декодирования при выключенном DEBUG
+    log_sampled(logger, 100, "[TODAY] GLOBAL CALLBACK MONITOR: %s",
+                lazy(event.data.decode, "utf-8", "replace"))
     # Обязательно возвращаем False, чтобы событие было обработано другими обработчиками
     return False
 
@@ -37,12 +36,13 @@ async def global_callback_monitor(event):
 @require_diary_user
 async def today_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
-    lang = getattr(user, 'lang', None) or 'ru'
+    ctx = get_user_context(event, tlgbot)
+    lang = getattr(ctx.user, 'lang', None) or 'ru'
     
-    logger.debug(f"[TODAY] Command handler started for user {user_id}, lang: {lang}")
+    logger.debug("[TODAY] Command handler started for user %s, lang: %s", user_id, lang)
     
-    today_date = date.today()
+    # «сегодня» — по часовому поясу пользователя, а не сервера
+    today_date = ctx.today()
     
     # Проверяем, существует ли уже запись за сегодня
     entry_exists = await diary_manager.check_existing_entry(event, user_id, today_date, lang, prefix="today")
@@ -56,7 +56,7 @@ async def today_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="mood_.*"))
 async def mood_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -68,7 +68,7 @@ async def mood_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="weather_.*"))
 async def weather_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -80,7 +80,7 @@ async def weather_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="location_.*"))
 async def location_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -92,7 +92,7 @@ async def location_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="events_.*"))
 async def events_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -110,7 +110,7 @@ async def handle_manual_input(event):
     if diary_manager.get_user_state(user_id) is None:
         return
     
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Используем метод process_manual_input из DiaryManager
@@ -121,11 +121,11 @@ async def handle_manual_input(event):
 @tlgbot.on(events.CallbackQuery(pattern="cancel_creation"))
 async def cancel_creation_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Отладочное сообщение
-    logger.debug(f"[TODAY] Cancel creation handler called for user {user_id}")
+    logger.debug("[TODAY] Cancel creation handler called for user %s", user_id)
     
     # Очищаем данные пользователя
     diary_manager.clear_user_data(user_id)
@@ -139,12 +139,12 @@ async def cancel_creation_handler(event):
 @require_diary_user
 async def handle_today_editing(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Добавляем подробный лог для отладки
     data = event.data.decode("utf-8")
-    logger.debug(f"[TODAY] Edit handler called with data: {data}, user_id: {user_id}")
+    logger.debug("[TODAY] Edit handler called with data: %s, user_id: %s", data, user_id)
     
     if data == "cancel_edit_today":
         # Пользователь отказался от редактирования
@@ -152,7 +152,7 @@ async def handle_today_editing(event):
         return
     
     # Начинаем редактирование
-    today_date = date.today()
+    today_date = get_user_context(event, tlgbot).today()
     
     if data == "edit_today_events":
         # Редактирование только событий
@@ -12,15 +12,17 @@ import calendar
 import re
 from telethon import events, Button
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
 
 # tlgbot глобально доступен в плагинах через динамическую загрузку
 tlgbot = globals().get('tlgbot')
 # Логгер доступен через глобальные переменные
 logger = globals().get('logger')
 
-async def parse_date(date_str):
+async def parse_date(date_str, today=None):
     """
     Парсит дату из строки в формате DD.MM.YYYY или DD.MM или DD.MM.*
+    DD.MM относится к году `today` (локальная дата пользователя)
     Возвращает tuple:
     - Если обычная дата, то (date_obj, False)
     - Если дата с годом *, то (None, (day, month))
@@ -43,7 +45,7 @@ async def parse_date(date_str):
             return date(year, month, day), False
         elif short_match:
             day, month = map(int, short_match.groups())
-            current_year = datetime.now().year
+            current_year = (today or date.today()).year
             return date(current_year, month, day), False
         elif all_years_match:
             day, month = map(int, all_years_match.groups())
@@ -68,14 +70,14 @@ async def get_entry_by_date(user_id, entry_date):
         db_manager = DatabaseManager(db_path=DAYLOG_DB_PATH)
         
         # Дополнительное логирование для отладки
-        logger.debug(f"Getting entry with user_id={user_id}, entry_date={entry_date}, type={type(entry_date)}")
+        logger.debug("Getting entry with user_id=%s, entry_date=%s, type=%s", user_id, entry_date, type(entry_date))
         
         # Используем напрямую объект date для запроса к БД
         entry = db_manager.get_diary_entry(user_id, entry_date)
         
         # Для отладки выведем информацию о полученной записи
         date_str = entry_date.strftime("%Y-%m-%d")
-        logger.debug(f"Поиск записи для пользователя {user_id} за дату {date_str}: {entry}")
+        logger.debug("Поиск записи для пользователя %s за дату %s: %s", user_id, date_str, entry)
         
         return entry
     except Exception as e:
@@ -95,12 +97,12 @@ async def get_entries_by_day_month(user_id, day, month):
         db_manager = DatabaseManager(db_path=DAYLOG_DB_PATH)
         
         # Логирование
-        logger.debug(f"Searching entries for user_id={user_id}, day={day}, month={month}")
+        logger.debug("Searching entries for user_id=%s, day=%s, month=%s", user_id, day, month)
         
         # Получаем записи за все годы
         entries = db_manager.get_diary_entries_by_day_month(user_id, day, month)
         
-        logger.debug(f"Найдено {len(entries)} записей")
+        logger.debug("Найдено %s записей", len(entries))
         
         return entries
     except Exception as e:
@@ -120,24 +122,24 @@ async def get_entries_by_period(user_id, start_date, end_date):
         db_manager = DatabaseManager(db_path=DAYLOG_DB_PATH)
         
         # Логирование
-        logger.debug(f"Searching entries for user_id={user_id}, period={start_date} to {end_date}")
+        logger.debug("Searching entries for user_id=%s, period=%s to %s", user_id, start_date, end_date)
         
         # Получаем записи за период
         entries = db_manager.get_entries_by_period(user_id, start_date, end_date)
         
-        logger.debug(f"Найдено {len(entries)} записей за период")
+        logger.debug("Найдено %s записей за период", len(entries))
         
         return entries
     except Exception as e:
         logger.error(f"Ошибка при получении записей из БД за период: {e}")
         return []
 
-def get_week_dates():
+def get_week_dates(today=None):
     """
     Возвращает начальную и конечную даты текущей недели
     Неделя считается с понедельника по воскресенье
     """
-    today = date.today()
+    today = today or date.today()
     # Получаем номер дня недели (0 - понедельник, 6 - воскресенье)
     weekday = today.weekday()
     # Начало недели (понедельник)
@@ -147,11 +149,11 @@ def get_week_dates():
     
     return start_of_week, end_of_week
 
-def get_month_dates():
+def get_month_dates(today=None):
     """
     Возвращает начальную и конечную даты текущего месяца
     """
-    today = date.today()
+    today = today or date.today()
     # Первый день месяца
     start_of_month = date(today.year, today.month, 1)
     # Последний день месяца
@@ -164,8 +166,7 @@ async def display_period_entries(event, entries, period_name):
     """
     Форматирует и отображает записи за период
     """
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     try:
@@ -201,8 +202,7 @@ async def show_period_selection(event):
     """
     Показывает кнопки выбора периода для просмотра записей
     """
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     message = tlgbot.i18n.t('view_select_period', lang=lang) or "Выберите период для просмотра записей:"
@@ -225,8 +225,7 @@ async def display_entry(event, entry, display_date):
     """
     Форматирует и отображает запись пользователю
     """
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     try:
@@ -257,8 +256,7 @@ async def display_multiple_entries(event, entries):
     """
     Форматирует и отображает несколько записей пользователю
     """
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     try:
@@ -310,8 +308,8 @@ async def view_command_handler(event):
     Если дата не указана, выводится меню выбора периода
     """
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
-    lang = getattr(user, 'lang', None) or 'ru'
+    ctx = get_user_context(event, tlgbot)
+    lang = getattr(ctx.user, 'lang', None) or 'ru'
     
     try:
         # Если пришли не из текстового сообщения (например из menu:view callback через dispatch)
@@ -324,7 +322,7 @@ async def view_command_handler(event):
         command_text = (event.message.text or '').strip()
         parts = command_text.split(maxsplit=1)
         
-        logger.debug(f"Command /view received: {command_text}")
+        logger.debug("Command /view received: %s", command_text)
         
         # Определяем дату для поиска
         target_date = None
@@ -333,10 +331,10 @@ async def view_command_handler(event):
         if len(parts) > 1 and parts[1]:
             # Пользователь указал дату
             date_str = parts[1].strip()
-            logger.debug(f"Parsing date string: {date_str}")
+            logger.debug("Parsing date string: %s", date_str)
             
             # Новая функция parse_date возвращает tuple (date_obj, day_month_tuple)
-            target_date, day_month_all_years = await parse_date(date_str)
+            target_date, day_month_all_years = await parse_date(date_str, ctx.today())
             
             if not target_date and not day_month_all_years:
                 # Не удалось распарсить дату
@@ -353,7 +351,7 @@ async def view_command_handler(event):
         if day_month_all_years:
             # Запрос для всех годов
             day, month = day_month_all_years
-            logger.debug(f"Searching entries for day={day}, month={month} across all years")
+            logger.debug("Searching entries for day=%s, month=%s across all years", day, month)
             
             # Получаем записи
             entries = await get_entries_by_day_month(user_id, day, month)
@@ -362,7 +360,7 @@ async def view_command_handler(event):
             await display_multiple_entries(event, entries)
         else:
             # Обычный запрос по конкретной дате
-            logger.debug(f"Target date for search: {target_date}, type: {type(target_date)}")
+            logger.debug("Target date for search: %s, type: %s", target_date, type(target_date))
             
             # Получаем запись из БД
             entry = await get_entry_by_date(user_id, target_date)
@@ -389,8 +387,10 @@ async def view_period_handler(event):
     Обработчик кнопок выбора периода
     """
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
-    lang = getattr(user, 'lang', None) or 'ru'
+    ctx = get_user_context(event, tlgbot)
+    lang = getattr(ctx.user, 'lang', None) or 'ru'
+    # «сегодня», неделя и месяц — по часовому поясу пользователя
+    today = ctx.today()
     
     # Получаем выбранный период из данных кнопки
     period = event.data.decode('utf-8').replace('view_period_', '')
@@ -402,13 +402,12 @@ async def view_period_handler(event):
         # Удаляем сообщение с меню выбора периода, чтобы не замусоривать диалог
         try:
             await event.delete()
-            logger.debug(f"view.py: deleted period selection menu message for period={period}")
+            logger.debug("view.py: deleted period selection menu message for period=%s", period)
         except Exception as e:
             logger.error(f"view.py: error deleting period selection menu message: {e}")
         
         if period == 'today':
             # Показываем запись за сегодня
-            today = date.today()
             entry = await get_entry_by_date(user_id, today)
             
             if entry:
@@ -420,7 +419,7 @@ async def view_period_handler(event):
                 
         elif period == 'week':
             # Показываем записи за текущую неделю
-            start_of_week, end_of_week = get_week_dates()
+            start_of_week, end_of_week = get_week_dates(today)
             
             # Получаем записи за неделю
             entries = await get_entries_by_period(user_id, start_of_week, end_of_week)
@@ -433,7 +432,7 @@ async def view_period_handler(event):
             
         elif period == 'month':
             # Показываем записи за текущий месяц
-            start_of_month, end_of_month = get_month_dates()
+            start_of_month, end_of_month = get_month_dates(today)
             
             # Получаем записи за месяц
             entries = await get_entries_by_period(user_id, start_of_month, end_of_month)
@@ -441,7 +440,7 @@ async def view_period_handler(event):
             # Формируем название периода для отображения
             month_names = ["январь", "февраль", "март", "апрель", "май", "июнь", 
                          "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь"]
-            current_month = month_names[date.today().month - 1]
+            current_month = month_names[today.month - 1]
             period_name = tlgbot.i18n.t('current_month', lang=lang, month=current_month) or f"текущий месяц ({current_month})"
             
             # Отображаем результаты
@@ -467,8 +466,7 @@ async def view_period_handler(event):
 # Добавляем обработчик для команды /help, чтобы включить информацию о команде /view
 @tlgbot.on(events.NewMessage(pattern=r'^/view_help$'))
 async def view_help_handler(event):
-    user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     help_text = tlgbot.i18n.t('view_command_help', lang=lang) or """
@@ -1,6 +1,7 @@
 # Плагин для команды /yesterday с мастером заполнения записи за предыдущий день
 
-from datetime import date, timedelta
+import logging
+from datetime import timedelta
 try:
     from bot.menu_system import register_menu
     register_menu({
@@ -10,6 +11,7 @@ except Exception:
     pass
 from telethon import events
 from bot.require_diary_user import require_diary_user
+from bot.user_context import get_user_context
 from core.diary import DiaryManager
 
 # tlgbot глобально доступен в плагинах через динамическую загрузку
@@ -24,12 +26,11 @@ diary_manager = DiaryManager(tlgbot, logger, getattr(tlgbot, 'i18n', None))
 @tlgbot.on(events.CallbackQuery())
 async def log_all_yesterday_callbacks(event):
     # Логируем только те события, которые могут относиться к команде yesterday
-    try:
-        data = event.data.decode("utf-8")
-        if "yesterday" in data or "cancel_edit_yesterday" in data:
-            logger.debug(f"[YESTERDAY] GLOBAL CALLBACK MONITOR: {data}")
-    except Exception as e:
-        logger.debug(f"[YESTERDAY] GLOBAL CALLBACK MONITOR: Error processing callback: {str(e)}")
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    data = event.data.decode("utf-8", "replace")
+    if "yesterday" in data:
+        logger.debug("[YESTERDAY] GLOBAL CALLBACK MONITOR: %s", data)
     # Обязательно возвращаем False, чтобы событие было обработано другими обработчиками
     return False
 
@@ -38,15 +39,16 @@ async def log_all_yesterday_callbacks(event):
 @require_diary_user
 async def yesterday_handler(event):
     # Добавляем отладочную информацию в начале обработчика
-    logger.debug(f"[YESTERDAY] Command handler started")
+    logger.debug("[YESTERDAY] Command handler started")
     
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
-    lang = getattr(user, 'lang', None) or 'ru'
+    ctx = get_user_context(event, tlgbot)
+    lang = getattr(ctx.user, 'lang', None) or 'ru'
     
-    logger.debug(f"[YESTERDAY] User ID: {user_id}, Lang: {lang}")
+    logger.debug("[YESTERDAY] User ID: %s, Lang: %s", user_id, lang)
     
-    yesterday_date = date.today() - timedelta(days=1)
+    # «вчера» — по часовому поясу пользователя, а не сервера
+    yesterday_date = ctx.today() - timedelta(days=1)
     
     # Проверяем, существует ли уже запись за вчера
     entry_exists = await diary_manager.check_existing_entry(event, user_id, yesterday_date, lang, prefix="yesterday")
@@ -60,7 +62,7 @@ async def yesterday_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="yesterday_mood_.*"))
 async def yesterday_mood_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -72,7 +74,7 @@ async def yesterday_mood_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="yesterday_weather_.*"))
 async def yesterday_weather_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -84,7 +86,7 @@ async def yesterday_weather_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="yesterday_location_.*"))
 async def yesterday_location_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -96,7 +98,7 @@ async def yesterday_location_callback_handler(event):
 @tlgbot.on(events.CallbackQuery(pattern="yesterday_events_.*"))
 async def yesterday_events_callback_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     data = event.data.decode("utf-8")
@@ -114,7 +116,7 @@ async def yesterday_handle_manual_input(event):
     if diary_manager.get_user_state(user_id) is None:
         return
     
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Используем метод process_manual_input из DiaryManager
@@ -126,12 +128,12 @@ async def yesterday_handle_manual_input(event):
 @require_diary_user
 async def handle_yesterday_editing(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Добавляем подробный лог для отладки
     data = event.data.decode("utf-8")
-    logger.debug(f"[YESTERDAY] Edit handler called with data: {data}, user_id: {user_id}")
+    logger.debug("[YESTERDAY] Edit handler called with data: %s, user_id: %s", data, user_id)
     
     if data == "cancel_edit_yesterday":
         # Пользователь отказался от редактирования
@@ -139,7 +141,7 @@ async def handle_yesterday_editing(event):
         return
     
     # Начинаем редактирование
-    yesterday_date = date.today() - timedelta(days=1)
+    yesterday_date = get_user_context(event, tlgbot).today() - timedelta(days=1)
     
     if data == "edit_yesterday_events":
         # Редактирование только событий
@@ -153,11 +155,11 @@ async def handle_yesterday_editing(event):
 @tlgbot.on(events.CallbackQuery(pattern="cancel_creation"))
 async def cancel_creation_handler(event):
     user_id = event.sender_id
-    user = getattr(tlgbot, 'settings', None).get_user(user_id) if getattr(tlgbot, 'settings', None) else None
+    user = get_user_context(event, tlgbot).user
     lang = getattr(user, 'lang', None) or 'ru'
     
     # Отладочное сообщение
-    logger.debug(f"[YESTERDAY] Cancel creation handler called for user {user_id}")
+    logger.debug("[YESTERDAY] Cancel creation handler called for user %s", user_id)
     
     # Очищаем данные пользователя
     diary_manager.clear_user_data(user_id)
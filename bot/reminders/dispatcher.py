@@ -0,0 +1,172 @@
+"""Рассылка напоминаний: ограниченная параллельность, лимит скорости, повторы.
+
+Пачка наступивших пользователей фильтруется одним запросом
+(`get_reminder_recipients`), сообщения отправляются параллельно, но не больше
+`concurrency` одновременно и не быстрее `rate` в секунду (поверх общей очереди
+исходящих). Ошибки классифицируются:
+
+- FloodWait — повтор через указанное Telegram время;
+- бот заблокирован / пользователь удалён — напоминания пользователю выключаются;
+- прочие ошибки — повтор с экспоненциальной задержкой, не больше `max_attempts`.
+
+Каждая попытка пишется в `reminder_deliveries`; повторы после простоя
+выбираются оттуда по частичному индексу. Повтор за прошедшую локальную дату
+(у пользователя уже наступил следующий день) не отправляется, а закрывается
+статусом `expired`.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from telethon.errors import (
+    FloodWaitError,
+    InputUserDeactivatedError,
+    PeerIdInvalidError,
+    UserDeactivatedBanError,
+    UserDeactivatedError,
+    UserIsBlockedError,
+)
+
+from bot.tlgbotcore.outbox import Priority, TokenBucket, priority as outbox_priority
+from core.database.manager import DatabaseManager
+from core.timezones import get_timezone_service
+
+logger = logging.getLogger(__name__)
+
+# пользователю больше не доставить: напоминания выключаются
+BLOCKED_ERRORS = (
+    UserIsBlockedError,
+    InputUserDeactivatedError,
+    UserDeactivatedError,
+    UserDeactivatedBanError,
+    PeerIdInvalidError,
+)
+
+# (user_id, local_date, status, last_error, next_attempt_at) — строка для журнала
+Delivery = Tuple[int, str, str, Optional[str], Optional[int]]
+
+
+class ReminderDispatcher:
+    """Отправка пачек напоминаний с журналом доставки."""
+
+    def __init__(self, tlgbot: Any, db: DatabaseManager, concurrency: int = 20, rate: float = 20.0,
+                 max_attempts: int = 5, retry_delay: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time) -> None:
+        self.tlgbot = tlgbot
+        self.db = db
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self.timezones = get_timezone_service()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._bucket = TokenBucket(rate, max(rate, 1.0), clock())
+        self._deliveries = None
+        metrics = getattr(tlgbot, "metrics", None)
+        if metrics is not None:
+            self._deliveries = metrics.counter(
+                "tlgbot_reminder_deliveries_total", "Попытки доставки напоминаний", ("status",))
+
+    async def dispatch(self, due: Iterable[Tuple[int, Union[date, str]]],
+                       attempts: Optional[Dict[Tuple[int, str], int]] = None) -> int:
+        """Разослать напоминания пачке (user_id, локальная дата); вернуть число отправленных.
+
+        `attempts` — уже сделанные попытки по (user_id, дата) для повторов из журнала.
+        """
+        attempts = attempts or {}
+        batch = [(user_id, d if isinstance(d, str) else d.isoformat()) for user_id, d in due]
+        if not batch:
+            return 0
+        recipients = self.db.get_reminder_recipients(batch)
+        if len(recipients) < len(batch):
+            logger.debug("[reminder] skip %s of %s: entry exists or already sent",
+                         len(batch) - len(recipients), len(batch))
+        deliveries: List[Delivery] = list(await asyncio.gather(*(
+            self._deliver(row, attempts.get((row["user_id"], row["local_date"]), 0) + 1)
+            for row in recipients
+        )))
+        # повтор больше не нужен (запись уже сделана или напомнили) — закрываем его
+        chosen = {(row["user_id"], row["local_date"]) for row in recipients}
+        deliveries.extend(
+            (user_id, local_date, "skipped", None, None)
+            for user_id, local_date in batch if (user_id, local_date) in attempts
+            and (user_id, local_date) not in chosen
+        )
+        sent = self._record(deliveries)
+        if sent:
+            logger.info("[reminder] sent %s reminders", sent)
+        return sent
+
+    async def retry_due(self, now_ts: Optional[float] = None) -> int:
+        """Повторить доставки из журнала, время которых наступило.
+
+        Повторы за дату, которая у пользователя уже прошла, закрываются как `expired`.
+        """
+        now_ts = int(self._wall_clock() if now_ts is None else now_ts)
+        rows = self.db.get_reminder_retries(now_ts)
+        if not rows:
+            return 0
+        today = self.timezones.local_dates((row["timezone"] for row in rows),
+                                           datetime.fromtimestamp(now_ts, timezone.utc))
+        due = [row for row in rows if row["local_date"] >= today[row["timezone"]].isoformat()]
+        if len(due) < len(rows):
+            expired = [(row["user_id"], row["local_date"], "expired", row["last_error"], None)
+                       for row in rows if row["local_date"] < today[row["timezone"]].isoformat()]
+            logger.info("[reminder] %s retries expired", len(expired))
+            self._record(expired)
+        if not due:
+            return 0
+        logger.debug("[reminder] retrying %s deliveries", len(due))
+        return await self.dispatch(
+            [(row["user_id"], row["local_date"]) for row in due],
+            attempts={(row["user_id"], row["local_date"]): row["attempts"] for row in due},
+        )
+
+    def _record(self, deliveries: List[Delivery]) -> int:
+        """Записать попытки в журнал и метрики; вернуть число отправленных."""
+        self.db.record_reminder_deliveries(deliveries)
+        sent = 0
+        for delivery in deliveries:
+            sent += delivery[2] == "sent"
+            if self._deliveries is not None:
+                self._deliveries.inc(status=delivery[2])
+        return sent
+
+    async def _throttle(self) -> None:
+        while True:
+            wait = self._bucket.delay(self._clock())
+            if wait <= 0:
+                self._bucket.take(self._clock())
+                return
+            await asyncio.sleep(wait)
+
+    async def _deliver(self, row: Dict, attempt: int) -> Delivery:
+        user_id, local_date = row["user_id"], row["local_date"]
+        lang = row.get("language_code") or "ru"
+        async with self._semaphore:
+            await self._throttle()
+            try:
+                # напоминания уступают очередь ответам пользователям
+                with outbox_priority(Priority.REMINDER):
+                    await self.tlgbot.send_message(user_id, self.tlgbot.i18n.t("reminder_no_entry", lang=lang))
+            except FloodWaitError as e:
+                # очередь исходящих уже повторяла запрос; ждём указанное время и пробуем снова
+                return self._retry(user_id, local_date, attempt, f"FloodWait {e.seconds}s", e.seconds)
+            except BLOCKED_ERRORS as e:
+                logger.info("[reminder] disabled user=%s: %s", user_id, type(e).__name__)
+                return user_id, local_date, "blocked", type(e).__name__, None
+            except Exception as e:
+                logger.error(f"[reminder] error user={user_id}: {e}")
+                return self._retry(user_id, local_date, attempt, f"{type(e).__name__}: {e}",
+                                   self.retry_delay * 2 ** (attempt - 1))
+        return user_id, local_date, "sent", None, None
+
+    def _retry(self, user_id: int, local_date: str, attempt: int, error: str, delay: float) -> Delivery:
+        if attempt >= self.max_attempts:
+            logger.warning("[reminder] giving up user=%s after %s attempts: %s", user_id, attempt, error)
+            return user_id, local_date, "failed", error, None
+        return user_id, local_date, "retry", error, int(self._wall_clock() + delay)
@@ -0,0 +1,201 @@
+"""Движок напоминаний: одна задача раз в минуту вместо задачи на пользователя.
+
+У каждого пользователя в `user_settings.reminder_utc_minute` хранится минута
+суток по UTC, когда наступает его локальное время напоминания. Колонка
+поддерживается при смене времени/пояса (`DatabaseManager.update_user_settings`)
+и пересчитывается, когда у пояса меняется смещение (переход на летнее время).
+Тик выбирает наступившие минуты по индексу и рассылает напоминания пачками
+через `ReminderDispatcher` (параллельность, лимит скорости, повторы).
+
+Состояние движка (смещения поясов и последняя обработанная минута) хранится
+в `system_info`: при старте пересчитываются только пояса, чьё смещение
+изменилось за время остановки, и строки без минуты, а пропущенные минуты
+догоняются одним запросом по диапазону. Раз в сутки тик удаляет из журнала
+доставки завершённые строки старше `delivery_retention_days`.
+"""
+
+import json
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from core.database.manager import DatabaseManager
+from core.timezones import get_timezone_service
+
+from .dispatcher import ReminderDispatcher
+
+logger = logging.getLogger(__name__)
+
+TICK_JOB_ID = "reminder_tick"
+STATE_KEY = "reminder_engine_state"
+MINUTES_PER_DAY = 24 * 60
+
+
+class ReminderEngine:
+    """Поминутный тик напоминаний поверх общего `AsyncIOScheduler`."""
+
+    def __init__(self, tlgbot: Any, db: DatabaseManager, batch_size: int = 500,
+                 max_catchup_minutes: int = 5, max_downtime_minutes: int = 180,
+                 delivery_retention_days: int = 30, **dispatcher_settings: Any) -> None:
+        self.tlgbot = tlgbot
+        self.db = db
+        self.batch_size = batch_size
+        self.timezones = get_timezone_service()
+        # concurrency, rate, max_attempts, retry_delay — см. ReminderDispatcher
+        self.dispatcher = ReminderDispatcher(tlgbot, db, **dispatcher_settings)
+        # после простоя цикла событий догоняем пропущенные минуты, но не больше этого
+        self.max_catchup_minutes = max_catchup_minutes
+        # после перезапуска бота — не больше этого (и не больше суток)
+        self.max_downtime_minutes = min(max_downtime_minutes, MINUTES_PER_DAY - 1)
+        self.delivery_retention_days = delivery_retention_days
+        self._purged_on: Optional[date] = None
+        self._catchup = max_catchup_minutes
+        self._last_minute: Optional[datetime] = None
+        self._offsets: Dict[Optional[str], int] = {}
+        self._offsets_hour: Optional[datetime] = None
+
+    def start(self, scheduler: Any) -> None:
+        """Восстановить состояние, пересчитать изменившееся и поставить задачу тика."""
+        self.db.ensure_reminder_columns()
+        started = time.perf_counter()
+        changed = self.restore(datetime.now(timezone.utc))
+        scheduler.add_job(
+            self.tick, "cron", second=0, id=TICK_JOB_ID, replace_existing=True,
+            coalesce=True, max_instances=1, misfire_grace_time=60, timezone="UTC",
+        )
+        logger.info("[reminder] engine started: %s rows re-derived in %.1f ms",
+                    changed, (time.perf_counter() - started) * 1000)
+
+    def restore(self, now: datetime) -> int:
+        """Поднять сохранённое состояние; вернуть число пересчитанных строк.
+
+        Без сохранённого состояния (первый запуск) пересчитываются все пояса.
+        """
+        now = now.replace(second=0, microsecond=0)
+        state = self._load_state()
+        if state is None:
+            changed = self.sync_offsets(now)
+        else:
+            saved = state["offsets"]
+            current = {tz_name: self.timezones.offset_minutes(tz_name, now) for tz_name in saved}
+            stale = [tz_name for tz_name, offset in current.items() if saved[tz_name] != offset]
+            self._offsets = current
+            self._offsets_hour = now.replace(minute=0)
+            changed = self.db.rederive_reminder_minutes(stale, on=now) if stale else 0
+            changed += self.db.fill_missing_reminder_minutes(on=now)
+            if stale:
+                logger.info("[reminder] offsets changed while stopped for %s", stale)
+        self._last_minute = now
+        last = state["last_minute"] if state else None
+        if last and last < now:
+            downtime = int((now - last).total_seconds()) // 60
+            if downtime <= self.max_downtime_minutes:
+                # первый тик догонит минуты, пропущенные за время остановки
+                self._last_minute = last
+                self._catchup = max(self.max_catchup_minutes, downtime + 1)
+            else:
+                logger.warning("[reminder] stopped for %s min, missed reminders are skipped", downtime)
+        self._save_state()
+        return changed
+
+    def sync_offsets(self, now: datetime) -> int:
+        """Пересчитать минуты для поясов, чьё смещение от UTC изменилось.
+
+        Проверяется раз в час (переходы DST происходят на границе часа);
+        при первом вызове пересчитываются все пояса.
+        """
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        if self._offsets_hour == hour:
+            return 0
+        self._offsets_hour = hour
+        pairs = self.db.get_reminder_timezones()
+        current = {tz_name: self.timezones.offset_minutes(tz_name, now) for tz_name, _ in pairs}
+        changed = [tz for tz, offset in current.items() if self._offsets.get(tz) != offset]
+        self._offsets.update(current)
+        if not changed:
+            return 0
+        self._save_state()
+        rows = self.db.rederive_reminder_minutes(changed, on=now, pairs=pairs)
+        if rows:
+            logger.info("[reminder] offsets changed for %s: %s rows re-derived", changed, rows)
+        return rows
+
+    async def tick(self, now: Optional[datetime] = None) -> int:
+        """Разослать напоминания за наступившие (и пропущенные) минуты; вернуть число отправок."""
+        now = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+        self.sync_offsets(now)
+        last = self._last_minute or now - timedelta(minutes=1)
+        first = max(last + timedelta(minutes=1), now - timedelta(minutes=self._catchup - 1))
+        self._catchup = self.max_catchup_minutes
+        self._last_minute = max(now, last)
+        sent = 0
+        if first <= now:
+            sent += await self.process_window(first, now)
+            self._save_state()
+        # отложенные доставки (FloodWait, временные ошибки), в том числе после простоя
+        sent += await self.dispatcher.retry_due(now.timestamp())
+        self.purge_deliveries(now)
+        return sent
+
+    def purge_deliveries(self, now: datetime) -> int:
+        """Раз в сутки удалить старые завершённые строки журнала доставки."""
+        if self._purged_on == now.date():
+            return 0
+        self._purged_on = now.date()
+        before = (now - timedelta(days=self.delivery_retention_days)).date().isoformat()
+        removed = self.db.purge_reminder_deliveries(before)
+        if removed:
+            logger.info("[reminder] purged %s deliveries before %s", removed, before)
+        return removed
+
+    async def process_minute(self, minute: datetime) -> int:
+        return await self.process_window(minute, minute)
+
+    async def process_window(self, first: datetime, last: datetime) -> int:
+        """Разослать напоминания за минуты от `first` до `last` включительно (не больше суток)."""
+        first_of_day = first.hour * 60 + first.minute
+        rows = self.db.get_due_reminder_users(first_of_day, last.hour * 60 + last.minute)
+        if not rows:
+            return 0
+        logger.debug("[reminder] %s..%s: %s due", first.strftime("%H:%M"), last.strftime("%H:%M"), len(rows))
+        sent = 0
+        for start in range(0, len(rows), self.batch_size):
+            due = []
+            for row in rows[start:start + self.batch_size]:
+                # минута окна, в которую пользователю было пора
+                shift = (row["reminder_utc_minute"] - first_of_day) % MINUTES_PER_DAY
+                local_date = self.timezones.local_date(row.get("timezone"), first + timedelta(minutes=shift))
+                due.append((row["user_id"], local_date))
+            sent += await self.dispatcher.dispatch(due)
+        return sent
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        raw = self.db.get_system_value(STATE_KEY)
+        if not raw:
+            return None
+        try:
+            state = json.loads(raw)
+            last = state.get("last_minute")
+            return {
+                # пояс None хранится пустой строкой: ключи JSON — только строки
+                "offsets": {tz_name or None: int(offset) for tz_name, offset in state["offsets"].items()},
+                "last_minute": datetime.fromisoformat(last) if last else None,
+            }
+        except (ValueError, TypeError, KeyError, AttributeError) as e:
+            logger.warning("[reminder] saved engine state ignored: %s", e)
+            return None
+
+    def _save_state(self) -> None:
+        self.db.set_system_value(STATE_KEY, json.dumps({
+            "offsets": {tz_name or "": offset for tz_name, offset in self._offsets.items()},
+            "last_minute": self._last_minute.isoformat() if self._last_minute else None,
+        }))
+
+
+def start_reminder_engine(tlgbot: Any, db: DatabaseManager, scheduler: Any, **kwargs: Any) -> ReminderEngine:
+    """Создать движок, запустить его и сделать доступным как `tlgbot.reminders`."""
+    engine = ReminderEngine(tlgbot, db, **kwargs)
+    engine.start(scheduler)
+    tlgbot.reminders = engine
+    return engine
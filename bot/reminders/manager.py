@@ -1,9 +1,10 @@
 import logging
-from datetime import date, datetime
-from zoneinfo import ZoneInfo
+from datetime import date
 from typing import Optional
 
 from core.database.manager import DatabaseManager
+from core.timezones import get_timezone_service
+from bot.tlgbotcore.outbox import Priority, priority as outbox_priority
 
 logger = logging.getLogger(__name__)
 
@@ -19,72 +20,79 @@ def parse_hhmm(value: str) -> Optional[tuple[int, int]]:
         return None
     return None
 
-async def send_reminder_job(user_id: int, tlgbot, db: DatabaseManager):
+async def _deliver(tlgbot, user_id: int, lang: str) -> bool:
+    try:
+        # tlgbot уже является Telethon client; напоминания уступают очередь ответам пользователям
+        with outbox_priority(Priority.REMINDER):
+            await tlgbot.send_message(user_id, tlgbot.i18n.t("reminder_no_entry", lang=lang))
+        return True
+    except Exception as e:
+        logger.error(f"[reminder] error user={user_id}: {e}")
+        return False
+
+
+async def send_due_reminder(tlgbot, db: DatabaseManager, user_row: dict, local_date: date) -> bool:
+    """Отправить напоминание одному пользователю; True — отправлено."""
+    user_id = user_row["user_id"]
     try:
-        user_row = db.get_user(user_id)
-        tz_name = (user_row.get("timezone") if user_row else "Europe/Moscow") or "Europe/Moscow"
-        try:
-            tz = ZoneInfo(tz_name)
-        except Exception:
-            tz = ZoneInfo("Europe/Moscow")
-        now_local = datetime.now(tz)
-        local_date = now_local.date()
         # если уже отправляли сегодня (перезапуск бота после времени) — не слать повторно
-        last_rem = user_row.get("last_reminder_date") if user_row else None
-        if last_rem == local_date.isoformat():
-            logger.debug(f"[reminder] skip user={user_id} reason=already_sent date={local_date}")
-            return
+        if user_row.get("last_reminder_date") == local_date.isoformat():
+            logger.debug("[reminder] skip user=%s reason=already_sent date=%s", user_id, local_date)
+            return False
         entry = db.get_diary_entry(user_id=user_id, entry_date=local_date)
         if entry:
-            logger.debug(f"[reminder] skip user={user_id} reason=entry_exists")
-            return
-        lang = user_row.get("language_code", "ru") if user_row else "ru"
-        # tlgbot уже является Telethon client; используем прямой вызов
-        await tlgbot.send_message(user_id, tlgbot.i18n.t("reminder_no_entry", lang=lang))
+            logger.debug("[reminder] skip user=%s reason=entry_exists", user_id)
+            return False
+        if not await _deliver(tlgbot, user_id, user_row.get("language_code") or "ru"):
+            return False
         db.update_last_reminder_date(user_id, local_date.isoformat())
-        logger.info(f"[reminder] sent user={user_id} date={local_date} tz={tz.key}")
+        logger.info("[reminder] sent user=%s date=%s", user_id, local_date)
+        return True
     except Exception as e:
         logger.error(f"[reminder] error user={user_id}: {e}")
+        return False
 
 
-def schedule_user_reminder(tlgbot, db: DatabaseManager, user_id: int, hhmm: str):
-    if not hasattr(tlgbot, "scheduler"):
-        logger.error("[reminder] scheduler not attached to bot")
-        return
-    job_id = str(user_id)
-    scheduler = tlgbot.scheduler
-    # remove existing
+async def send_reminder_job(user_id: int, tlgbot, db: DatabaseManager):
+    """Напоминание одному пользователю (вне тика движка)."""
     try:
-        scheduler.remove_job(job_id)
-    except Exception:
-        pass
-    parsed = parse_hhmm(hhmm)
-    if not parsed:
-        logger.error(f"[reminder] invalid time '{hhmm}' for user={user_id}")
+        user_row = db.get_user(user_id) or {"user_id": user_id}
+        local_date = get_timezone_service().local_date(user_row.get("timezone"))
+    except Exception as e:
+        logger.error(f"[reminder] error user={user_id}: {e}")
         return
-    hour, minute = parsed
-    # timezone per user
-    user_row = db.get_user(user_id)
-    tz_name = (user_row.get("timezone") if user_row else "Europe/Moscow") or "Europe/Moscow"
-    scheduler.add_job(
-        send_reminder_job,
-        "cron",
-        hour=hour,
-        minute=minute,
-        id=job_id,
-        kwargs={"user_id": user_id, "tlgbot": tlgbot, "db": db},
-        replace_existing=True,
-        misfire_grace_time=300,
-        timezone=tz_name,
-    )
-    logger.info(f"[reminder] rescheduled user={user_id} time={hhmm} tz={tz_name}")
+    await send_due_reminder(tlgbot, db, {**user_row, "user_id": user_id}, local_date)
+
+
+def schedule_user_reminder(tlgbot, db: DatabaseManager, user_id: int, hhmm: str) -> Optional[int]:
+    """Учесть новое время напоминания пользователя.
+
+    Отдельных задач планировщика нет: поминутный тик (`ReminderEngine`) берёт
+    пользователей по `reminder_utc_minute`. Здесь время проверяется, колонка
+    пересчитывается, а задача старого формата (если осталась) снимается.
+    Возвращает минуту суток по UTC или None при неверном времени.
+    """
+    _remove_legacy_job(tlgbot, user_id)
+    if not parse_hhmm(hhmm):
+        logger.error(f"[reminder] invalid time '{hhmm}' for user={user_id}")
+        return None
+    minute = db.update_reminder_minute(user_id)
+    logger.info("[reminder] rescheduled user=%s time=%s utc_minute=%s", user_id, hhmm, minute)
+    return minute
 
 
 def disable_user_reminder(tlgbot, user_id: int):
-    if not hasattr(tlgbot, "scheduler"):
-        return
-    try:
-        tlgbot.scheduler.remove_job(str(user_id))
+    """Напоминания выключены флагом reminder_enabled; снимаем только старую задачу."""
+    if _remove_legacy_job(tlgbot, user_id):
         logger.info(f"[reminder] disabled user={user_id}")
+
+
+def _remove_legacy_job(tlgbot, user_id: int) -> bool:
+    scheduler = getattr(tlgbot, "scheduler", None)
+    if scheduler is None:
+        return False
+    try:
+        scheduler.remove_job(str(user_id))
+        return True
     except Exception:
-        pass
+        return False
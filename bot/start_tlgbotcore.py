@@ -2,28 +2,18 @@ from cfg import config_tlg as config
 from bot.tlgbotcore.di_container import DIContainer, BotFactory, IConfig, ISettingsStorage
 from bot.tlgbotcore.storage_factory import StorageFactory
 from bot.tlgbotcore.logging_config import setup_logging
-from bot.tlgbotcore.i18n import I18n
+from bot.tlgbotcore.i18n import I18n, get_i18n
 import asyncio
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from core.database.manager import DatabaseManager
+from core.export.cache import ExportCache
+from core.export.jobs import ExportJobQueue
 from cfg.config_tlg import DAYLOG_DB_PATH
-from bot.reminders.manager import schedule_user_reminder
-
-
-async def load_reminder_jobs(tlg):
-    """Загрузка задач напоминаний из БД."""
-    db = DatabaseManager(db_path=DAYLOG_DB_PATH)
-    db.ensure_reminder_columns()
-    users = db.get_users_with_reminders()
-    count = 0
-    for u in users:
-        reminder_time = u.get("reminder_time")
-        if not reminder_time:
-            continue
-        schedule_user_reminder(tlg, db, u["user_id"], reminder_time)
-        count += 1
-    logging.getLogger(__name__).info(f"[reminder] loaded jobs count={count}")
+from bot.reminders.engine import start_reminder_engine
+from bot.user_context import resolve_user_context
+from bot.menu_system import init_menu_system, prebuild_menus
+from bot.tlgbotcore.shutdown import JOBS, drain_apscheduler
 
 
 class ConfigAdapter:
@@ -37,6 +27,21 @@ class ConfigAdapter:
         self.TLG_ADMIN_ID_CLIENT = config_module.TLG_ADMIN_ID_CLIENT
         self.TYPE_DB = config_module.TYPE_DB
         self.SETTINGS_DB_PATH = config_module.SETTINGS_DB_PATH
+        self.PLUGINS_LOAD_MODE = getattr(config_module, "PLUGINS_LOAD_MODE", "eager")
+        self.PLUGINS_WATCH = getattr(config_module, "PLUGINS_WATCH", False)
+        self.PLUGINS_WATCH_INTERVAL = getattr(config_module, "PLUGINS_WATCH_INTERVAL", 1.0)
+        self.LOCALES_WATCH = getattr(config_module, "LOCALES_WATCH", False)
+        self.LOCALES_WATCH_INTERVAL = getattr(config_module, "LOCALES_WATCH_INTERVAL", 2.0)
+        self.METRICS_FILE = getattr(config_module, "METRICS_FILE", None)
+        self.METRICS_FILE_INTERVAL = getattr(config_module, "METRICS_FILE_INTERVAL", 15.0)
+        self.METRICS_HTTP_HOST = getattr(config_module, "METRICS_HTTP_HOST", "127.0.0.1")
+        self.METRICS_HTTP_PORT = getattr(config_module, "METRICS_HTTP_PORT", None)
+        self.OUTBOX_SETTINGS = getattr(config_module, "OUTBOX_SETTINGS", None)
+        self.REMINDER_SETTINGS = getattr(config_module, "REMINDER_SETTINGS", None)
+        self.EXPORT_SETTINGS = getattr(config_module, "EXPORT_SETTINGS", None)
+        self.EXPORT_CACHE_SETTINGS = getattr(config_module, "EXPORT_CACHE_SETTINGS", None)
+        self.UPDATE_SCHEDULER_SETTINGS = getattr(config_module, "UPDATE_SCHEDULER_SETTINGS", None)
+        self.SHUTDOWN_DEADLINE = getattr(config_module, "SHUTDOWN_DEADLINE", 8.0)
 
 
 async def _main_async():
@@ -48,7 +53,8 @@ async def _main_async():
     container.register_instance(IConfig, config_adapter)
     
     # Регистрация i18n (глобально или через DI)
-    i18n = I18n(locales_path="bot/locales", default_lang=config.DEFAULT_LANG)
+    # тот же экземпляр, что создал run_bot.py: локали не читаются повторно
+    i18n = get_i18n(locales_path="bot/locales", default_lang=config.DEFAULT_LANG)
     container.register_instance(I18n, i18n)
     
     # Регистрация хранилища через фабрику
@@ -72,11 +78,52 @@ async def _main_async():
     scheduler = AsyncIOScheduler(timezone="UTC")
     scheduler.start()
     tlg.scheduler = scheduler  # делаем доступным плагинам
+    # при остановке: новых запусков нет, идущие напоминания дорабатывают до дедлайна
+    tlg.shutdown.add_step('scheduler', lambda timeout: drain_apscheduler(scheduler, timeout), order=JOBS)
+    tlg.shutdown.install_signal_handlers()
+
+    # БД дневника и контекст пользователя, вычисляемый один раз на апдейт
+    tlg.diary_db = DatabaseManager(db_path=DAYLOG_DB_PATH)
+    tlg.user_context_resolver = lambda event: resolve_user_context(tlg, event)
+    # экспорт в пуле потоков; при остановке идущие задания отменяются
+    tlg.export_jobs = ExportJobQueue(metrics=tlg.metrics, **(config_adapter.EXPORT_SETTINGS or {}))
+    tlg.shutdown.add_step('export_jobs', tlg.export_jobs.shutdown, order=JOBS)
+    # кэш файлов экспорта и его уборщик (в потоке планировщика)
+    cache_settings = dict(config_adapter.EXPORT_CACHE_SETTINGS or {})
+    if cache_settings.get("enabled", True):
+        tlg.export_cache = ExportCache(
+            quota_bytes=int(cache_settings.get("quota_mb", 512) * 1024 * 1024),
+            ttl_seconds=cache_settings.get("ttl_hours", 24) * 3600,
+            metrics=tlg.metrics,
+        )
+        scheduler.add_job(
+            tlg.export_cache.sweep, "interval", minutes=cache_settings.get("sweep_minutes", 30),
+            id="export_cache_sweep", replace_existing=True, coalesce=True, max_instances=1,
+        )
 
     await tlg.start_core(bot_token=config.I_BOT_TOKEN)
-    # После загрузки плагинов и старта — загрузим задачи
-    await load_reminder_jobs(tlg)
-    await tlg.disconnected
+    # клавиатуры меню для всех (язык, роль) — один раз после загрузки плагинов
+    init_menu_system(tlg, logging.getLogger("bot.menu_system"))
+    prebuild_menus()
+    await tlg.start_metrics_exporter(
+        file_path=config_adapter.METRICS_FILE,
+        interval=config_adapter.METRICS_FILE_INTERVAL,
+        http_host=config_adapter.METRICS_HTTP_HOST,
+        http_port=config_adapter.METRICS_HTTP_PORT,
+    )
+    # После загрузки плагинов и старта — поминутный тик напоминаний (одна задача на всех)
+    start_reminder_engine(tlg, tlg.diary_db, scheduler, **(config_adapter.REMINDER_SETTINGS or {}))
+    if config_adapter.PLUGINS_WATCH:
+        tlg.start_plugin_watcher(interval=config_adapter.PLUGINS_WATCH_INTERVAL)
+    if config_adapter.LOCALES_WATCH:
+        tlg.start_locale_watcher(interval=config_adapter.LOCALES_WATCH_INTERVAL)
+
+    # работаем до SIGTERM/SIGINT или обрыва соединения, затем останавливаемся по шагам
+    stop = asyncio.ensure_future(tlg.shutdown.wait())
+    disconnected = asyncio.ensure_future(tlg.disconnected)
+    await asyncio.wait({stop, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+    await tlg.graceful_shutdown(stop.result() if stop.done() else 'disconnected')
+    stop.cancel()
 
 
 def main():
@@ -97,7 +144,9 @@ def main():
     setup_logging(
         level=log_level,
         log_file="logs/tlgbotcore.log",
-        enable_debug=(log_level == logging.DEBUG)
+        enable_debug=(log_level == logging.DEBUG),
+        max_bytes=getattr(config, "LOG_MAX_BYTES", 10 * 1024 * 1024),
+        backup_count=getattr(config, "LOG_BACKUP_COUNT", 5)
     )
     
     asyncio.run(_main_async())
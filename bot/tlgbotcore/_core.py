@@ -50,7 +50,8 @@ async def get_name_user(client, user_id):
 def _get_event_lang(event):
     """Return language code for the user who triggered the event, fallback to bot default."""
     try:
-        user = tlgbot.settings.get_user(event.sender_id)
+        ctx = tlgbot.user_context(event)
+        user = ctx.user if ctx is not None else tlgbot.settings.get_user(event.sender_id)
         return getattr(user, 'lang', tlgbot.i18n.default_lang)
     except Exception:
         return tlgbot.i18n.default_lang
@@ -127,13 +128,23 @@ async def load_reload(event):
     else:
         try:
 
-            if shortname in tlgbot._plugins:
-                await tlgbot.remove_plugin(shortname)
-
-            # так как плагин хранится в папке с именем плагина
-            tlgbot.load_plugin(f"{shortname}/{shortname}")
-
             lang = _get_event_lang(event)
+            if shortname in tlgbot._plugins or shortname in tlgbot._lazy_plugins:
+                # атомарная подмена обработчиков, при ошибке остаётся прежняя версия
+                loaded = await tlgbot.reload_plugin(shortname)
+                reason = 'plugin_reload_rolled_back'
+            else:
+                # так как плагин хранится в папке с именем плагина;
+                # откатывать нечего - прежней версии не было
+                loaded = tlgbot.load_plugin(f"{shortname}/{shortname}")
+                reason = 'plugin_load_error_reason'
+            if not loaded:
+                await event.respond(tlgbot.i18n.t(
+                    'reload_failed', lang=lang, name=shortname,
+                    error=tlgbot.i18n.t(reason, lang=lang, name=shortname)
+                ))
+                return
+
             msg = await event.respond(
                 tlgbot.i18n.t('reload_success', lang=lang, name=shortname)
             )
@@ -242,7 +253,7 @@ async def add_user_admin(event):
             lang=getattr(config_tlg, "DEFAULT_LANG", "ru")
         )
         tlgbot.settings.add_user(new_user)
-        tlgbot.refresh_admins()
+        tlgbot.user_changed(new_user)
         
         # Сохраняем ID и имя для обработчика кнопок
         notify_add_user_id = id_new_user
@@ -300,7 +311,7 @@ async def del_user_admin(event):
             id_del_user = await conv.get_response()
             id_del_user = id_del_user.message
 
-        if not (int(id_del_user) in tlgbot.admins):
+        if not tlgbot.is_admin(id_del_user):
             # Сохраняем ID для обработчика кнопок
             notify_del_user_id = id_del_user
             
@@ -318,7 +329,7 @@ async def del_user_admin(event):
             
             # Удаляем пользователя
             tlgbot.settings.del_user(int(id_del_user))
-            tlgbot.refresh_admins()
+            tlgbot.user_changed(user_id=int(id_del_user))
             await tlgbot.load_all_plugins()
         else:
             await conv.send_message(tlgbot.i18n.t('deluser_admin_forbidden', lang=lang))
@@ -74,5 +74,9 @@ class BotFactory:
             api_hash=config.TLG_APP_API_HASH,
             bot_token=config.I_BOT_TOKEN,
             admins=config.TLG_ADMIN_ID_CLIENT,
-            settings_storage=storage  # внедряем готовое хранилище
+            settings_storage=storage,  # внедряем готовое хранилище
+            plugin_load_mode=getattr(config, 'PLUGINS_LOAD_MODE', 'eager'),
+            outbox_settings=getattr(config, 'OUTBOX_SETTINGS', None),
+            update_scheduler_settings=getattr(config, 'UPDATE_SCHEDULER_SETTINGS', None),
+            shutdown_deadline=getattr(config, 'SHUTDOWN_DEADLINE', 8.0),
         )
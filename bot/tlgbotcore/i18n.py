@@ -1,23 +1,318 @@
 """
 утилита для загрузки и получения сообщений по ключу и языку
+
+При загрузке локали компилируются в плоские каталоги: каждый язык заранее
+слит с языком по умолчанию, а шаблоны разобраны один раз. Строка без
+параметров хранится готовой, строка с параметрами — как быстрый форматтер.
+
+Скомпилированные каталоги можно заранее сохранить в бинарный бандл
+(`scripts/build_locales.py`): на старте он читается одним чтением вместо
+разбора всех JSON. Если JSON новее бандла, используются JSON.
 """
 
+import hashlib
 import json
+import logging
+import marshal
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
+from string import Formatter
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple, Union
+
+# готовая строка или форматтер, принимающий словарь параметров
+Template = Union[str, Callable[[Mapping[str, Any]], str]]
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+BUNDLE_NAME = "locales.bundle"
+# версия формата бандла; меняется при несовместимых изменениях компиляции
+BUNDLE_VERSION = 1
+_BUNDLE_MAGIC = b"DLI18N"
+
+_formatter = Formatter()
+
+
+def compile_template(msg: str) -> Template:
+    """Разобрать шаблон str.format один раз.
+
+    Без полей — сразу результат (с раскрытыми `{{`/`}}`). Простые поля
+    `{name}`, `{name!r}` переводятся в %-шаблон: `tmpl % kwargs` выполняется
+    в C без повторного разбора скобок. Поля со спецификацией формата,
+    атрибутами или позиционные оставляются на `str.format_map`.
+    """
+    try:
+        pieces = list(_formatter.parse(msg))
+    except ValueError:
+        return msg.format_map  # битый шаблон упадёт при вызове, как и раньше
+    parts, has_fields = [], False
+    for literal, name, spec, conversion in pieces:
+        parts.append(literal.replace('%', '%%'))
+        if name is None:
+            continue
+        if not name.isidentifier() or spec or conversion not in (None, 's', 'r', 'a'):
+            return msg.format_map
+        parts.append('%%(%s)%s' % (name, conversion or 's'))
+        has_fields = True
+    if not has_fields:
+        return msg.format()
+    return ''.join(parts).__mod__
+
+
+def _snapshot(locales_path) -> Snapshot:
+    """Состояние файлов локалей: путь -> (mtime_ns, размер)."""
+    result: Snapshot = {}
+    for path in Path(locales_path).glob("*.json"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # файл удалили между glob и stat
+        result[path] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def _content_hash(snapshot: Snapshot) -> str:
+    """Хэш содержимого файлов локалей (имена и байты)."""
+    digest = hashlib.sha256()
+    for path in sorted(snapshot):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        digest.update(path.read_bytes() + b"\0")
+    return digest.hexdigest()
+
+
+def _bundle_header() -> bytes:
+    # marshal не переносим между версиями Python — версия формата в заголовке
+    return _BUNDLE_MAGIC + bytes([BUNDLE_VERSION, marshal.version])
+
+
+def _dump_template(template: Template) -> Any:
+    if template.__class__ is str:
+        return template
+    return (template.__name__ == '__mod__', template.__self__)
+
+
+def _load_template(value: Any) -> Template:
+    if value.__class__ is str:
+        return value
+    percent, text = value
+    return text.__mod__ if percent else text.format_map
+
+
+@dataclass
+class LocaleReload:
+    """Подготовленная вне цикла событий перезагрузка локалей."""
+    snapshot: Snapshot
+    locales: Dict[str, dict]
+    catalogs: Dict[str, Dict[str, Template]]
+    langs: Set[str]
+    errors: Dict[str, str] = field(default_factory=dict)
+
 
 class I18n:
-    def __init__(self, locales_path="locales", default_lang="ru"):
+    def __init__(self, locales_path="locales", default_lang="ru", bundle_path=None, use_bundle=True):
         self.locales = {}
-        self.default_lang = default_lang
-        self.load_locales(locales_path)
+        self.locales_path = locales_path
+        self._catalogs: Dict[str, Dict[str, Template]] = {}
+        self._default_catalog: Dict[str, Template] = {}
+        self._default_lang = default_lang
+        self._snapshot: Snapshot = {}
+        self._reload_listeners: List[Callable[[Set[str]], Any]] = []
+        self._logger = logging.getLogger(__name__)
+        if bundle_path is None:
+            bundle_path = Path(locales_path) / BUNDLE_NAME
+        if not (use_bundle and self.load_bundle(bundle_path)):
+            self.load_locales(locales_path)
+
+    @property
+    def default_lang(self):
+        return self._default_lang
+
+    @default_lang.setter
+    def default_lang(self, lang):
+        self._default_lang = lang
+        self.compile()
 
     def load_locales(self, locales_path):
-        for file in Path(locales_path).glob("*.json"):
+        self.locales_path = locales_path
+        snapshot = _snapshot(locales_path)
+        for file in snapshot:
             lang = file.stem
             with open(file, encoding="utf-8") as f:
                 self.locales[lang] = json.load(f)
+        self._snapshot = snapshot
+        self.compile()
+
+    def load_bundle(self, bundle_path) -> bool:
+        """Загрузить каталоги из бандла, если он есть и соответствует JSON.
+
+        Свежесть проверяется по (mtime_ns, размер) файлов, а при расхождении —
+        по хэшу содержимого (например, после git checkout). Возвращает False,
+        если бандла нет, он другой версии или устарел.
+        """
+        try:
+            data = Path(bundle_path).read_bytes()
+        except OSError:
+            return False
+        header = _bundle_header()
+        if not data.startswith(header):
+            self._logger.info("Бандл локалей %s другой версии, читаются JSON", bundle_path)
+            return False
+        try:
+            bundle = marshal.loads(data[len(header):])
+        except (EOFError, ValueError, TypeError):
+            self._logger.warning("Бандл локалей %s повреждён, читаются JSON", bundle_path)
+            return False
+
+        snapshot = _snapshot(self.locales_path)
+        stamps = {path.name: stamp for path, stamp in snapshot.items()}
+        if stamps != bundle["stamps"] and (
+                set(stamps) != set(bundle["stamps"]) or _content_hash(snapshot) != bundle["hash"]):
+            self._logger.info("Бандл локалей %s устарел, читаются JSON", bundle_path)
+            return False
+
+        self.locales = bundle["locales"]
+        self._snapshot = snapshot
+        if bundle["default_lang"] != self._default_lang:
+            self.compile()
+            return True
+        self._catalogs = {
+            lang: {key: _load_template(value) for key, value in catalog.items()}
+            for lang, catalog in bundle["catalogs"].items()
+        }
+        self._default_catalog = self._catalogs.get(self._default_lang, {})
+        return True
+
+    def save_bundle(self, bundle_path=None) -> Path:
+        """Сохранить загруженные локали и скомпилированные каталоги в бандл."""
+        path = Path(bundle_path) if bundle_path is not None else Path(self.locales_path) / BUNDLE_NAME
+        bundle = {
+            "default_lang": self._default_lang,
+            "stamps": {p.name: stamp for p, stamp in self._snapshot.items()},
+            "hash": _content_hash(self._snapshot),
+            "locales": self.locales,
+            "catalogs": {
+                lang: {key: _dump_template(t) for key, t in catalog.items()}
+                for lang, catalog in self._catalogs.items()
+            },
+        }
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(_bundle_header() + marshal.dumps(bundle))
+        os.replace(tmp, path)  # читатели видят либо старый бандл, либо новый
+        return path
+
+    def compile(self):
+        """Пересобрать каталоги из self.locales (после изменения словарей)."""
+        self._catalogs = self._build_catalogs(self.locales)
+        self._default_catalog = self._catalogs.get(self._default_lang, {})
+
+    def _build_catalogs(self, locales, previous=None, langs=None):
+        """Собрать каталоги; из `previous` берутся готовые для языков вне `langs`."""
+        rebuild_all = previous is None or langs is None or self._default_lang in langs
+        if rebuild_all:
+            base = locales.get(self._default_lang, {})
+            default = {key: compile_template(msg) for key, msg in base.items() if msg}
+        else:
+            default = previous.get(self._default_lang, {})
+        catalogs = {}
+        for lang, messages in locales.items():
+            if lang == self._default_lang:
+                catalogs[lang] = default
+            elif not rebuild_all and lang not in langs and lang in previous:
+                catalogs[lang] = previous[lang]
+            else:
+                catalog = dict(default)
+                # пустая строка в языке, как и раньше, уступает языку по умолчанию
+                catalog.update((key, compile_template(msg)) for key, msg in messages.items() if msg)
+                catalogs[lang] = catalog
+        return catalogs
+
+    # ------- Горячая перезагрузка
+    def add_reload_listener(self, callback: Callable[[Set[str]], Any]) -> None:
+        """Вызывать `callback(langs)` после подмены каталогов (сбросить свои кэши)."""
+        if callback not in self._reload_listeners:
+            self._reload_listeners.append(callback)
+
+    def prepare_reload(self) -> Optional[LocaleReload]:
+        """Прочитать и скомпилировать только изменившиеся файлы локалей.
+
+        Ничего не меняет в объекте, поэтому безопасна в отдельном потоке.
+        Возвращает None, если файлы не менялись.
+        """
+        current = _snapshot(self.locales_path)
+        if current == self._snapshot:
+            return None
+        locales = dict(self.locales)
+        langs: Set[str] = set()
+        errors: Dict[str, str] = {}
+        for path, stamp in current.items():
+            if self._snapshot.get(path) == stamp:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    messages = json.load(f)
+                if not isinstance(messages, dict):
+                    raise ValueError("ожидается объект JSON")
+            except (OSError, ValueError) as exc:
+                # прежний перевод остаётся до следующего сохранения файла
+                errors[path.stem] = str(exc)
+                continue
+            locales[path.stem] = messages
+            langs.add(path.stem)
+        for path in set(self._snapshot) - set(current):
+            if path.stem != self._default_lang and locales.pop(path.stem, None) is not None:
+                langs.add(path.stem)
+        catalogs = self._build_catalogs(locales, self._catalogs, langs) if langs else self._catalogs
+        if self._default_lang in langs:
+            langs = set(locales) | langs  # от языка по умолчанию зависят все каталоги
+        return LocaleReload(current, locales, catalogs, langs, errors)
+
+    def apply_reload(self, prepared: LocaleReload) -> Set[str]:
+        """Подменить каталоги (в потоке цикла событий) и оповестить слушателей."""
+        self._snapshot = prepared.snapshot
+        for lang, error in prepared.errors.items():
+            self._logger.error("Локаль %s не перезагружена: %s", lang, error)
+        if not prepared.langs:
+            return set()
+        # замена ссылками: t() видит либо старые каталоги, либо новые целиком
+        self.locales = prepared.locales
+        self._catalogs = prepared.catalogs
+        self._default_catalog = prepared.catalogs.get(self._default_lang, {})
+        for callback in list(self._reload_listeners):
+            try:
+                callback(set(prepared.langs))
+            except Exception:
+                self._logger.exception("Ошибка обработчика перезагрузки локалей")
+        return set(prepared.langs)
+
+    def reload_changed(self) -> Set[str]:
+        """Синхронная перезагрузка изменившихся файлов; вернуть затронутые языки."""
+        prepared = self.prepare_reload()
+        return self.apply_reload(prepared) if prepared is not None else set()
 
     def t(self, key, lang=None, **kwargs):
-        lang = lang or self.default_lang
-        msg = self.locales.get(lang, {}).get(key) or self.locales[self.default_lang].get(key, key)
-        return msg.format(**kwargs)
\ No newline at end of file
+        catalog = self._catalogs.get(lang) if lang else None
+        template = (catalog or self._default_catalog).get(key)
+        if template is None:
+            # нет ни в языке, ни в языке по умолчанию — возвращаем сам ключ
+            template = self.locales.get(self._default_lang, {}).get(key, key)
+            return template.format(**kwargs)
+        if template.__class__ is str:
+            return template
+        return template(kwargs)
+
+
+def build_bundle(locales_path="bot/locales", default_lang="ru", bundle_path=None) -> Path:
+    """Скомпилировать JSON-локали в бинарный бандл (шаг сборки)."""
+    return I18n(locales_path, default_lang, use_bundle=False).save_bundle(bundle_path)
+
+
+_shared: Dict[Tuple[Path, str], I18n] = {}
+
+
+def get_i18n(locales_path="bot/locales", default_lang="ru") -> I18n:
+    """Общий экземпляр I18n для каталога и языка: локали читаются один раз за процесс."""
+    key = (Path(locales_path).resolve(), default_lang)
+    i18n = _shared.get(key)
+    if i18n is None:
+        i18n = _shared[key] = I18n(locales_path=locales_path, default_lang=default_lang)
+    return i18n
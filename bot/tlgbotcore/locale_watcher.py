@@ -0,0 +1,56 @@
+"""Наблюдатель за файлами локалей для горячей перезагрузки переводов.
+
+Папка локалей опрашивается по mtime. Изменившиеся JSON читаются и
+компилируются в отдельном потоке, а подмена каталогов `I18n` происходит
+в цикле событий одним присваиванием — обработчики не ждут разбора JSON.
+"""
+
+import asyncio
+import logging
+from typing import Any, Optional, Set
+
+
+class LocaleWatcher:
+    """Периодически перечитывает изменившиеся файлы `bot.i18n`."""
+
+    def __init__(self, bot: Any, interval: float = 2.0) -> None:
+        self.bot = bot
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._logger = logging.getLogger(__name__)
+
+    async def check_once(self) -> Set[str]:
+        """Перечитать изменившиеся файлы; вернуть языки, чьи каталоги подменены."""
+        i18n = self.bot.i18n
+        prepared = await asyncio.to_thread(i18n.prepare_reload)
+        if prepared is None:
+            return set()
+        langs = i18n.apply_reload(prepared)
+        if langs:
+            self._logger.info(self.bot._t('locales_reloaded', langs=', '.join(sorted(langs))))
+        return langs
+
+    async def run(self) -> None:
+        self._logger.info(self.bot._t('locale_watcher_started', path=self.bot.i18n.locales_path,
+                                      interval=self.interval))
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                try:
+                    await self.check_once()
+                except Exception as exc:
+                    self._logger.exception(self.bot._t('locale_watcher_error', error=exc))
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
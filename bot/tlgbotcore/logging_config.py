@@ -1,14 +1,33 @@
+"""Настройка логирования бота.
+
+Логгеры только кладут запись в очередь (`QueueHandler`), а консольный и
+файловый хэндлеры работают в потоке `QueueListener`, поэтому запись на диск
+не блокирует цикл событий. Файл ротируется по размеру.
+
+Для горячих путей — `lazy()` (значение считается только при форматировании
+записи) и `log_sampled()` (пишется каждое n-е сообщение).
+"""
+
+import atexit
 import logging
+import queue
 import sys
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, Optional, Tuple
 from pathlib import Path
 
+# поток записи логов; останавливается stop_logging() (в т.ч. при выходе)
+_listener: Optional[QueueListener] = None
+_atexit_registered = False
+
 
 def setup_logging(
     level: int = logging.INFO,
     log_file: Optional[str] = None,
-    enable_debug: bool = False
-) -> None:
+    enable_debug: bool = False,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5
+) -> QueueListener:
     """
     Настройка логирования с улучшенным форматированием и опциональным файлом.
     
@@ -16,7 +35,12 @@ def setup_logging(
         level: Уровень логирования (по умолчанию INFO)
         log_file: Путь к файлу логов (опционально)
         enable_debug: Включить отладочную информацию
+        max_bytes: Размер файла логов для ротации (0 — без ротации)
+        backup_count: Сколько старых файлов хранить
     """
+    global _listener, _atexit_registered
+    stop_logging()
+
     # Очищаем существующие хэндлеры
     root = logging.getLogger()
     root.handlers.clear()
@@ -36,7 +60,7 @@ def setup_logging(
     console_handler = logging.StreamHandler(stream=sys.stdout)
     console_handler.setFormatter(console_formatter)
     console_handler.setLevel(level)
-    root.addHandler(console_handler)
+    handlers = [console_handler]
     
     # Файловый хэндлер (если указан)
     if log_file:
@@ -48,10 +72,21 @@ def setup_logging(
             datefmt="%Y-%m-%d %H:%M:%S"
         )
         
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
         file_handler.setFormatter(file_formatter)
         file_handler.setLevel(logging.DEBUG)  # В файл пишем всё
-        root.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Логгеры пишут в очередь, хэндлеры — в потоке слушателя
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(stop_logging)
+        _atexit_registered = True
     
     # Настройка уровней для внешних библиотек
     logging.getLogger('telethon').setLevel(logging.WARNING)
@@ -61,6 +96,53 @@ def setup_logging(
     # Отключаем icecream в продакшене
     if not enable_debug:
         disable_icecream()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Дописать записи из очереди и остановить поток логирования."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class LazyMessage:
+    """Аргумент лога, вычисляемый только если запись действительно форматируется."""
+
+    __slots__ = ('_func', '_args')
+
+    def __init__(self, func: Callable[..., Any], *args: Any) -> None:
+        self._func = func
+        self._args = args
+
+    def __str__(self) -> str:
+        return str(self._func(*self._args))
+
+
+def lazy(func: Callable[..., Any], *args: Any) -> LazyMessage:
+    """`logger.debug("меню: %s", lazy(render, rows))` — render вызовется только при включённом DEBUG."""
+    return LazyMessage(func, *args)
+
+
+# (логгер, шаблон) -> сколько раз вызывали
+_sample_counters: Dict[Tuple[str, str], int] = {}
+
+
+def log_sampled(logger: logging.Logger, every: int, msg: str, *args: Any, level: int = logging.DEBUG) -> None:
+    """Записать каждое `every`-е сообщение с шаблоном `msg` (первое — всегда).
+
+    При выключенном уровне — одна проверка `isEnabledFor`, без форматирования.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    key = (logger.name, msg)
+    count = _sample_counters.get(key, 0) + 1
+    _sample_counters[key] = count
+    if every <= 1 or count % every == 1:
+        logger.log(level, f"{msg} [%d-е, пишется 1 из {every}]", *args, count, stacklevel=2)
 
 
 class ColoredFormatter(logging.Formatter):
@@ -76,6 +158,8 @@ class ColoredFormatter(logging.Formatter):
     RESET = '\033[0m'
     
     def format(self, record):
+        # Копия записи: тот же объект дальше получает файловый хэндлер без цветов
+        record = logging.makeLogRecord(record.__dict__)
         # Добавляем цвет к уровню логирования
         levelname = record.levelname
         if levelname in self.COLORS:
@@ -0,0 +1,237 @@
+"""Очередь исходящих сообщений с учётом лимитов Telegram.
+
+Все отправки (`send_message`, `respond`, `reply`, `send_file`, `edit`,
+`answer`) проходят через `TlgBotCore._call`, который перед запросом берёт
+разрешение у `Outbox`: токен глобального бакета и токен бакета чата.
+Разрешения выдаются по классам приоритета — ответы в обработчиках раньше
+напоминаний и рассылок. FloodWait не теряет сообщение: чат ставится на
+паузу на указанное Telegram время, и запрос повторяется.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError
+
+
+class Priority(IntEnum):
+    """Классы приоритета исходящих сообщений (меньше — раньше)."""
+
+    INTERACTIVE = 0  # ответ на действие пользователя
+    NORMAL = 1       # всё остальное по умолчанию
+    REMINDER = 2     # напоминания по расписанию
+    BROADCAST = 3    # массовые рассылки
+
+
+# приоритет текущей задачи; обработчики событий выставляют INTERACTIVE
+_current_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    'outbox_priority', default=Priority.NORMAL
+)
+
+
+@contextlib.contextmanager
+def priority(level: Priority) -> Iterator[None]:
+    """Отправлять сообщения внутри блока с приоритетом `level`."""
+    token = _current_priority.set(level)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """Классический token bucket: `rate` токенов в секунду, не больше `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Через сколько секунд будет доступен токен (0 — уже сейчас)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float) -> None:
+        """Пауза после FloodWait: токенов нет до `now + seconds`."""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.blocked_until
+
+    def is_idle(self, now: float) -> bool:
+        return now >= self.blocked_until and self.delay(now) == 0 and self.tokens >= self.capacity
+
+
+class Outbox:
+    """Планировщик исходящих запросов: бакеты (глобальный и по чатам) и приоритеты."""
+
+    # чаты с полным бакетом забываются, когда их становится больше
+    MAX_IDLE_CHATS = 10000
+
+    def __init__(self, metrics: Any = None, global_rate: float = 25.0, global_burst: float = 30.0,
+                 chat_rate: float = 1.0, chat_burst: float = 5.0, max_flood_wait: float = 300.0,
+                 max_retries: int = 3, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._chats: Dict[int, TokenBucket] = {}
+        self.max_flood_wait = max_flood_wait
+        self.max_retries = max_retries
+        # по классу приоритета: очередь (chat_id, future, время постановки)
+        self._queues: Dict[Priority, List[Tuple[Optional[int], asyncio.Future, float]]] = {
+            p: [] for p in Priority
+        }
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._logger = logging.getLogger(__name__)
+
+        self._depth = self._wait = self._floods = None
+        if metrics is not None:
+            self._depth = metrics.gauge(
+                'tlgbot_outbox_depth', 'Исходящие запросы в ожидании отправки', ('priority',))
+            self._wait = metrics.histogram(
+                'tlgbot_outbox_wait_seconds', 'Время ожидания в очереди исходящих', ('priority',))
+            self._floods = metrics.counter(
+                'tlgbot_outbox_flood_waits_total', 'Полученные FloodWait', ('priority',))
+
+    def depth(self, level: Optional[Priority] = None) -> int:
+        if level is not None:
+            return len(self._queues[level])
+        return sum(len(q) for q in self._queues.values())
+
+    def _update_depth(self, level: Priority) -> None:
+        if self._depth is not None:
+            self._depth.set(len(self._queues[level]), priority=level.name.lower())
+
+    def _chat_bucket(self, chat_id: Optional[int], now: float) -> Optional[TokenBucket]:
+        if chat_id is None:
+            return None
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_IDLE_CHATS:
+                self._chats = {k: b for k, b in self._chats.items() if not b.is_idle(now)}
+            bucket = self._chats[chat_id] = TokenBucket(self._chat_rate, self._chat_burst, now)
+        return bucket
+
+    async def acquire(self, chat_id: Optional[int], level: Optional[Priority] = None) -> None:
+        """Дождаться разрешения на один запрос в чат `chat_id`."""
+        level = current_priority() if level is None else level
+        loop = asyncio.get_running_loop()
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = loop.create_task(self._pump())
+
+        enqueued = self._clock()
+        future = loop.create_future()
+        self._queues[level].append((chat_id, future, enqueued))
+        self._update_depth(level)
+        self._wakeup.set()
+        await future
+        if self._wait is not None:
+            self._wait.observe(self._clock() - enqueued, priority=level.name.lower())
+
+    def _grant_next(self, now: float) -> Optional[float]:
+        """Выдать одно разрешение; вернуть 0 при выдаче, иначе сколько ждать (None — очередь пуста)."""
+        wait = self._global.delay(now)
+        if wait > 0:
+            return wait if self.depth() else None
+        wait_chat: Optional[float] = None
+        for level in Priority:
+            queue = self._queues[level]
+            for i, (chat_id, future, _) in enumerate(queue):
+                if future.done():  # ожидающий отменён
+                    continue
+                bucket = self._chat_bucket(chat_id, now)
+                delay = bucket.delay(now) if bucket is not None else 0.0
+                if delay > 0:
+                    wait_chat = delay if wait_chat is None else min(wait_chat, delay)
+                    continue
+                self._global.take(now)
+                if bucket is not None:
+                    bucket.take(now)
+                # заодно выбрасываются отменённые ожидающие
+                self._queues[level] = [
+                    item for j, item in enumerate(queue) if j != i and not item[1].done()
+                ]
+                self._update_depth(level)
+                future.set_result(None)
+                return 0.0
+            if any(item[1].done() for item in queue):
+                self._queues[level] = [item for item in queue if not item[1].done()]
+                self._update_depth(level)
+        return wait_chat
+
+    async def _pump(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            wait = self._grant_next(self._clock())
+            if wait == 0:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def penalize(self, chat_id: Optional[int], seconds: float) -> None:
+        """Учесть FloodWait: пауза для чата, а без чата — для всех отправок."""
+        now = self._clock()
+        bucket = self._chat_bucket(chat_id, now)
+        (bucket if bucket is not None else self._global).block(seconds, now)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def send(self, chat_id: Optional[int], call: Callable[[], Awaitable[Any]],
+                   level: Optional[Priority] = None) -> Any:
+        """Выполнить запрос через очередь, повторяя его после FloodWait."""
+        level = current_priority() if level is None else level
+        attempt = 0
+        while True:
+            await self.acquire(chat_id, level)
+            try:
+                return await call()
+            except FloodWaitError as exc:
+                if self._floods is not None:
+                    self._floods.inc(priority=level.name.lower())
+                if attempt >= self.max_retries or exc.seconds > self.max_flood_wait:
+                    raise
+                attempt += 1
+                self._logger.warning(
+                    f"FloodWait {exc.seconds} с для чата {chat_id}, повтор {attempt}/{self.max_retries}"
+                )
+                self.penalize(chat_id, exc.seconds)
+
+    async def close(self) -> None:
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            try:
+                await self._pump_task
+            except asyncio.CancelledError:
+                pass
+            self._pump_task = None
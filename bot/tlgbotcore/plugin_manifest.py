@@ -0,0 +1,186 @@
+"""Статический манифест плагина для ленивой загрузки.
+
+Манифест извлекается из исходника плагина через AST, без импорта модуля:
+команды (`tlgbot.cmd` / `tlgbot.admin_cmd`), шаблоны `events.NewMessage` /
+`events.CallbackQuery` и литеральные вызовы `register_menu({...})`.
+Всё, что нельзя разобрать статически, трактуется консервативно: плагин
+срабатывает на любое событие такого типа или загружается сразу (eager).
+"""
+
+import ast
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Pattern, Union
+
+# типы событий, которые понимает ленивый загрузчик
+_MESSAGE_BUILDERS = {"NewMessage"}
+_CALLBACK_BUILDERS = {"CallbackQuery"}
+_COMMAND_FACTORIES = {"cmd", "admin_cmd"}
+
+
+@dataclass
+class PluginManifest:
+    """Триггеры плагина, достаточные для решения «пора ли его импортировать»."""
+
+    shortname: str
+    path: Path
+    commands: List[str] = field(default_factory=list)
+    message_patterns: List[str] = field(default_factory=list)
+    callback_patterns: List[bytes] = field(default_factory=list)
+    catch_all_messages: bool = False
+    catch_all_callbacks: bool = False
+    menu_entries: List[Dict[str, Any]] = field(default_factory=list)
+    eager: bool = False
+
+    def __post_init__(self) -> None:
+        self._message_res: Optional[List[Pattern[str]]] = None
+        self._callback_res: Optional[List[Pattern[bytes]]] = None
+
+    @property
+    def handles_messages(self) -> bool:
+        return self.catch_all_messages or bool(self.commands or self.message_patterns)
+
+    @property
+    def handles_callbacks(self) -> bool:
+        return self.catch_all_callbacks or bool(self.callback_patterns)
+
+    def _compile(self) -> None:
+        message_res = [
+            re.compile(rf"(?i)^[/.](?:{cmd})(?:@\w+)?(?:\s|$)") for cmd in self.commands
+        ]
+        message_res += [re.compile(p) for p in self.message_patterns]
+        self._message_res = message_res
+        self._callback_res = [re.compile(p) for p in self.callback_patterns]
+
+    def matches_message(self, text: str) -> bool:
+        """Может ли сообщение с таким текстом заинтересовать плагин."""
+        if self.catch_all_messages:
+            return True
+        if self._message_res is None:
+            self._compile()
+        assert self._message_res is not None
+        return any(rx.match(text) for rx in self._message_res)
+
+    def matches_callback(self, data: bytes) -> bool:
+        """Может ли callback с такими данными заинтересовать плагин."""
+        if self.catch_all_callbacks:
+            return True
+        if self._callback_res is None:
+            self._compile()
+        assert self._callback_res is not None
+        return any(rx.match(data) for rx in self._callback_res)
+
+
+def _tail_name(node: ast.AST) -> Optional[str]:
+    """`events.NewMessage` -> 'NewMessage', `NewMessage` -> 'NewMessage'."""
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _constant(node: Optional[ast.AST]) -> Union[str, bytes, None]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (str, bytes)):
+        return node.value
+    return None
+
+
+def _keyword(call: ast.Call, name: str) -> Optional[ast.AST]:
+    for kw in call.keywords:
+        if kw.arg == name:
+            return kw.value
+    return None
+
+
+def _is_tlgbot_on(decorator: ast.AST) -> bool:
+    return (
+        isinstance(decorator, ast.Call)
+        and isinstance(decorator.func, ast.Attribute)
+        and decorator.func.attr == "on"
+        and _tail_name(decorator.func.value) == "tlgbot"
+        and len(decorator.args) == 1
+    )
+
+
+def _add_builder(manifest: PluginManifest, node: ast.AST) -> None:
+    """Разбор выражения, переданного в `@tlgbot.on(...)`."""
+    if not isinstance(node, ast.Call):
+        name = _tail_name(node)
+        if name in _MESSAGE_BUILDERS:
+            manifest.catch_all_messages = True
+        elif name in _CALLBACK_BUILDERS:
+            manifest.catch_all_callbacks = True
+        else:
+            manifest.eager = True
+        return
+
+    name = _tail_name(node.func)
+    if (
+        name in _COMMAND_FACTORIES
+        and isinstance(node.func, ast.Attribute)
+        and _tail_name(node.func.value) == "tlgbot"
+    ):
+        command = _constant(node.args[0]) if node.args else None
+        if isinstance(command, str):
+            manifest.commands.append(command)
+        else:
+            manifest.catch_all_messages = True
+    elif name in _MESSAGE_BUILDERS:
+        pattern = _constant(_keyword(node, "pattern"))
+        if isinstance(pattern, str):
+            manifest.message_patterns.append(pattern)
+        else:
+            manifest.catch_all_messages = True
+    elif name in _CALLBACK_BUILDERS:
+        pattern = _constant(_keyword(node, "pattern"))
+        data = _constant(_keyword(node, "data"))
+        if pattern is not None:
+            manifest.callback_patterns.append(pattern.encode() if isinstance(pattern, str) else pattern)
+        elif data is not None:
+            raw = data.encode() if isinstance(data, str) else data
+            manifest.callback_patterns.append(re.escape(raw) + b"$")
+        else:
+            manifest.catch_all_callbacks = True
+    else:
+        manifest.eager = True
+
+
+def _add_menu_entry(manifest: PluginManifest, call: ast.Call) -> None:
+    if _tail_name(call.func) != "register_menu" or not call.args:
+        return
+    try:
+        entry = ast.literal_eval(call.args[0])
+    except (ValueError, SyntaxError):
+        return
+    if isinstance(entry, dict):
+        manifest.menu_entries.append(entry)
+
+
+def extract_manifest(path: Union[str, Path]) -> PluginManifest:
+    """Построить манифест плагина по его исходнику.
+
+    Если файл не разбирается или у плагина нет распознанных триггеров,
+    манифест помечается `eager` — такой плагин грузится сразу.
+    """
+    path = Path(path)
+    manifest = PluginManifest(shortname=path.stem, path=path)
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        manifest.eager = True
+        return manifest
+
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if _is_tlgbot_on(decorator):
+                    assert isinstance(decorator, ast.Call)
+                    _add_builder(manifest, decorator.args[0])
+        elif isinstance(node, ast.Call):
+            _add_menu_entry(manifest, node)
+
+    if not (manifest.handles_messages or manifest.handles_callbacks):
+        manifest.eager = True
+    return manifest
@@ -0,0 +1,104 @@
+"""Наблюдатель за файлами плагинов для горячей перезагрузки.
+
+Если установлен пакет `watchfiles` (inotify/FSEvents), изменения приходят
+событиями файловой системы; иначе папка плагинов опрашивается по mtime.
+В обоих случаях решение «что перезагрузить» принимается сравнением снимков
+(mtime_ns, размер), поэтому перезагружается только изменившийся файл.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from watchfiles import awatch
+except ImportError:  # pragma: no cover - необязательная зависимость
+    awatch = None
+
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+class PluginWatcher:
+    """Следит за папкой плагинов и перезагружает изменившиеся по одному.
+
+    `_core` лежит вне папки плагинов и никогда не перезагружается.
+    """
+
+    def __init__(self, bot: Any, interval: float = 1.0, use_watchfiles: bool = True) -> None:
+        self.bot = bot
+        self.root = Path(bot._plugin_path)
+        self.interval = interval
+        self.use_watchfiles = use_watchfiles and awatch is not None
+        self._snapshot: Snapshot = self.snapshot()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._logger = logging.getLogger(__name__)
+
+    def snapshot(self) -> Snapshot:
+        """Текущее состояние файлов плагинов: путь -> (mtime_ns, размер)."""
+        result: Snapshot = {}
+        if not self.root.is_dir():
+            return result
+        for path in self.root.glob("*/*.py"):
+            if path.stem.startswith('__') or path.stem.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # файл удалили между glob и stat
+            result[path] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    async def check_once(self) -> List[str]:
+        """Сравнить снимок с прошлым и применить изменения; вернуть имена плагинов."""
+        current = self.snapshot()
+        previous, self._snapshot = self._snapshot, current
+        touched: List[str] = []
+
+        for path, stamp in sorted(current.items()):
+            if previous.get(path) == stamp or path.stem == '_core':
+                continue
+            # при откате прежняя версия остаётся, повтор — при следующем сохранении
+            if await self.bot.reload_plugin(path.stem, path):
+                touched.append(path.stem)
+
+        for path in sorted(set(previous) - set(current)):
+            shortname = path.stem
+            if shortname == '_core':
+                continue
+            if shortname in self.bot._plugins or shortname in self.bot._lazy_plugins:
+                await self.bot.remove_plugin(shortname)
+                touched.append(shortname)
+        return touched
+
+    async def _safe_check(self) -> None:
+        try:
+            await self.check_once()
+        except Exception as exc:
+            self._logger.exception(self.bot._t('plugin_watcher_error', error=exc))
+
+    async def run(self) -> None:
+        backend = "watchfiles" if self.use_watchfiles else f"polling {self.interval}s"
+        self._logger.info(self.bot._t('plugin_watcher_started', path=self.root, backend=backend))
+        if self.use_watchfiles:
+            async for _ in awatch(self.root, stop_event=self._stop):
+                await self._safe_check()
+            return
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                await self._safe_check()
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._stop.clear()
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
@@ -0,0 +1,162 @@
+"""Координатор корректной остановки бота.
+
+По SIGTERM/SIGINT шаги остановки выполняются по порядку в пределах общего
+дедлайна: перестать принимать апдейты, дождаться обработчиков, остановить
+планировщик, дослать исходящие, сбросить буферы, отключиться, закрыть БД.
+Каждый шаг получает оставшееся время и может вернуть число брошенных
+элементов — оно попадает в итоговый отчёт.
+"""
+
+import asyncio
+import inspect
+import logging
+import signal
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# порядок фаз остановки (меньше — раньше)
+STOP_INTAKE = 10
+DRAIN = 20
+JOBS = 30
+OUTBOX = 40
+FLUSH = 50
+EXPORT = 60
+DISCONNECT = 70
+CLOSE = 80
+
+
+@dataclass
+class ShutdownReport:
+    """Итог остановки: статус шагов и брошенные элементы."""
+
+    reason: str = ''
+    elapsed: float = 0.0
+    steps: Dict[str, str] = field(default_factory=dict)
+    abandoned: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def clean(self) -> bool:
+        return all(status == 'ok' for status in self.steps.values()) and not any(self.abandoned.values())
+
+
+@dataclass(order=True)
+class _Step:
+    order: int
+    seq: int
+    name: str = field(compare=False)
+    callback: Callable[[float], Any] = field(compare=False)
+
+
+class ShutdownCoordinator:
+    """Упорядоченные шаги остановки с общим дедлайном."""
+
+    def __init__(self, deadline: float = 8.0, logger: Optional[logging.Logger] = None,
+                 translate: Optional[Callable[..., str]] = None) -> None:
+        self.deadline = deadline
+        self._steps: List[_Step] = []
+        self._triggered: Optional[asyncio.Event] = None
+        self._reason = ''
+        self._report: Optional[ShutdownReport] = None
+        self._running: Optional[asyncio.Task] = None
+        self._logger = logger or logging.getLogger(__name__)
+        self._t = translate or (lambda key, **kwargs: f"{key} {kwargs}")
+
+    def add_step(self, name: str, callback: Callable[[float], Any], order: int = FLUSH) -> None:
+        """Добавить шаг; `callback(remaining_seconds)` может быть корутиной и вернуть число брошенных."""
+        self._steps = [s for s in self._steps if s.name != name]
+        self._steps.append(_Step(order, len(self._steps), name, callback))
+        self._steps.sort()
+
+    @property
+    def step_names(self) -> List[str]:
+        return [s.name for s in self._steps]
+
+    def _event(self) -> asyncio.Event:
+        if self._triggered is None:
+            self._triggered = asyncio.Event()
+        return self._triggered
+
+    @property
+    def triggered(self) -> bool:
+        return self._triggered is not None and self._triggered.is_set()
+
+    def trigger(self, reason: str = 'requested') -> None:
+        if not self.triggered:
+            self._reason = reason
+            self._event().set()
+
+    async def wait(self) -> str:
+        """Дождаться сигнала остановки; вернуть причину."""
+        await self._event().wait()
+        return self._reason
+
+    def install_signal_handlers(self, signals=(signal.SIGTERM, signal.SIGINT)) -> None:
+        loop = asyncio.get_running_loop()
+        self._event()
+        for sig in signals:
+            try:
+                loop.add_signal_handler(sig, self.trigger, sig.name)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Windows или не главный поток
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(
+                    self.trigger, signal.Signals(signum).name))
+
+    async def run(self, reason: Optional[str] = None) -> ShutdownReport:
+        """Выполнить шаги остановки (повторный вызов возвращает тот же отчёт)."""
+        if self._running is None:
+            if reason is not None:
+                self.trigger(reason)
+            self._running = asyncio.ensure_future(self._run())
+        return await asyncio.shield(self._running)
+
+    async def _run(self) -> ShutdownReport:
+        report = ShutdownReport(reason=self._reason or 'requested')
+        started = time.monotonic()
+        self._logger.info(self._t('shutdown_started', reason=report.reason, deadline=self.deadline))
+        for step in self._steps:
+            remaining = max(0.0, self.deadline - (time.monotonic() - started))
+            try:
+                result = step.callback(remaining)
+                if inspect.isawaitable(result):
+                    # шаг без времени всё равно получает шанс на быстрые действия
+                    result = await asyncio.wait_for(result, timeout=max(remaining, 0.1))
+                report.steps[step.name] = 'ok'
+                if isinstance(result, int) and not isinstance(result, bool) and result:
+                    report.abandoned[step.name] = result
+            except asyncio.TimeoutError:
+                report.steps[step.name] = 'timeout'
+                self._logger.warning(self._t('shutdown_step_timeout', step=step.name))
+            except Exception as exc:
+                report.steps[step.name] = 'error'
+                self._logger.exception(self._t('shutdown_step_failed', step=step.name, error=exc))
+        report.elapsed = time.monotonic() - started
+        abandoned = ', '.join(f"{k}={v}" for k, v in report.abandoned.items()) or '0'
+        self._logger.info(self._t(
+            'shutdown_report', elapsed=f"{report.elapsed:.2f}",
+            steps=len(report.steps), abandoned=abandoned,
+        ))
+        self._report = report
+        return report
+
+    @property
+    def report(self) -> Optional[ShutdownReport]:
+        return self._report
+
+
+async def drain_apscheduler(scheduler: Any, timeout: float) -> int:
+    """Остановить AsyncIOScheduler: новых запусков нет, идущие задачи дорабатывают до таймаута.
+
+    Возвращает число задач, прерванных по дедлайну.
+    """
+    if scheduler is None or not getattr(scheduler, 'running', False):
+        return 0
+    scheduler.pause()
+    pending = set()
+    for executor in getattr(scheduler, '_executors', {}).values():
+        pending.update(f for f in getattr(executor, '_pending_futures', ()) if not f.done())
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+    abandoned = sum(1 for f in pending if not f.done())
+    scheduler.shutdown(wait=False)
+    return abandoned
@@ -1,10 +1,21 @@
 import os
-from typing import Optional, List, Dict, Any, Union
+import time
+import functools
+from typing import Optional, List, Dict, Any, Union, Tuple, Callable, FrozenSet, Iterable
+from types import ModuleType
 from telethon import TelegramClient  # , events, connection, Button
 import telethon.utils
 import telethon.events
+from telethon.tl.functions.messages import SendMessageRequest, SetBotCallbackAnswerRequest
+from telethon.tl.types import InputReplyToMessage, PeerChat
 from . import hacks
 from .models import Role
+from .plugin_manifest import PluginManifest, extract_manifest
+from .metrics import MetricsRegistry, MetricsExporter
+from .outbox import Outbox, Priority, priority as outbox_priority
+from .update_scheduler import UpdateScheduler
+from . import shutdown as shutdown_phases
+from .shutdown import ShutdownCoordinator, ShutdownReport
 
 import asyncio
 import logging
@@ -12,29 +23,84 @@ from pathlib import Path
 import importlib.util
 import inspect
 
+# запросы, которые проходят через очередь исходящих (лимиты Telegram на отправку)
+OUTBOX_REQUESTS = frozenset({
+    'SendMessageRequest', 'SendMediaRequest', 'SendMultiMediaRequest', 'EditMessageRequest',
+    'ForwardMessagesRequest', 'SetBotCallbackAnswerRequest',
+})
+
+# режимы загрузки плагинов
+PLUGIN_LOAD_MODES = ("eager", "parallel", "lazy")
+
 
 class TlgBotCore(TelegramClient):
     def __init__(self, session: str, *, plugin_path: str = "plugins", settings_storage: Optional[Any] = None, admins: List[int] = [],
-                 bot_token: Optional[str] = None, proxy_server: Optional[str] = None, proxy_port: Optional[int] = None, proxy_key: Optional[str] = None, **kwargs: Any) -> None:
+                 bot_token: Optional[str] = None, proxy_server: Optional[str] = None, proxy_port: Optional[int] = None, proxy_key: Optional[str] = None,
+                 plugin_load_mode: str = "eager", outbox_settings: Optional[Dict[str, Any]] = None,
+                 update_scheduler_settings: Optional[Dict[str, Any]] = None, shutdown_deadline: float = 8.0,
+                 **kwargs: Any) -> None:
         self._logger = logging.getLogger(session)
         self._name = session
         self._plugins: Dict[str, Any] = {}
         self._plugin_path = plugin_path
+        if plugin_load_mode not in PLUGIN_LOAD_MODES:
+            self._logger.warning(f"Неизвестный режим загрузки плагинов {plugin_load_mode!r}, используется eager")
+            plugin_load_mode = "eager"
+        self._plugin_load_mode = plugin_load_mode
+        # время импорта каждого плагина (секунды) и отчёт о последней загрузке
+        self._plugin_timings: Dict[str, float] = {}
+        self.startup_report: Dict[str, Any] = {}
+        # ленивые плагины: манифест загружен, модуль ещё нет
+        self._lazy_plugins: Dict[str, PluginManifest] = {}
+        # обработчики импортируемых прямо сейчас модулей (имя модуля -> список)
+        self._staged_handlers: Dict[str, List[Tuple[Any, Any]]] = {}
+        # наблюдатель за файлами плагинов (горячая перезагрузка)
+        self._plugin_watcher: Optional[Any] = None
+        # наблюдатель за файлами локалей (перезагрузка переводов)
+        self._locale_watcher: Optional[Any] = None
+        # метрики обработчиков и вызовов Telegram API
+        self.metrics = MetricsRegistry()
+        self._metrics_exporter: Optional[MetricsExporter] = None
+        self._handler_calls = self.metrics.counter(
+            'tlgbot_handler_calls_total', 'Вызовы обработчиков событий', ('plugin', 'handler', 'status'))
+        self._handler_latency = self.metrics.histogram(
+            'tlgbot_handler_latency_seconds', 'Время работы обработчика от вызова до возврата', ('plugin', 'handler'))
+        self._api_calls = self.metrics.counter(
+            'tlgbot_api_calls_total', 'Вызовы Telegram API', ('method', 'status'))
+        self._api_latency = self.metrics.histogram(
+            'tlgbot_api_latency_seconds', 'Время вызова Telegram API', ('method',))
+        # построение контекста пользователя один раз на апдейт (см. bot/user_context.py)
+        self.user_context_resolver: Optional[Callable[[Any], Any]] = None
+        # очередь исходящих: лимиты, приоритеты, повтор после FloodWait
+        outbox_settings = dict(outbox_settings or {})
+        self.outbox: Optional[Outbox] = None
+        if outbox_settings.pop('enabled', True):
+            self.outbox = Outbox(self.metrics, **outbox_settings)
+        # обработка апдейтов: ограниченный пул, порядок внутри чата, сброс нагрузки
+        scheduler_settings = dict(update_scheduler_settings or {})
+        self._busy_reply_interval = scheduler_settings.pop('busy_reply_interval', 10.0)
+        self._busy_replied: Dict[Any, float] = {}
+        self.update_scheduler: Optional[UpdateScheduler] = None
+        if scheduler_settings.pop('enabled', True):
+            self.update_scheduler = UpdateScheduler(
+                super()._dispatch_update, on_shed=self._reply_busy, metrics=self.metrics, **scheduler_settings
+            )
         
         # Внедрение зависимости хранилища настроек
         self.settings = settings_storage
         
-        # получение всех пользователей из БД
+        # администраторы: неизменяемое множество id, проверка за O(1)
+        self._admins: FrozenSet[int] = frozenset()
+        self._admin_listeners: List[Callable[[FrozenSet[int], FrozenSet[int]], Any]] = []
         if self.settings is not None:
-            from .models import Role
             self.admins = self.settings.get_user_type_id(Role.admin)  # список администраторов бота
         else:
             self.admins = admins  # fallback к переданным админам
         # логируем с локализацией (если i18n доступен через self.i18n)
         try:
-            self._logger.info(self._t('admins_list', admins=self.admins))
+            self._logger.info(self._t('admins_list', admins=sorted(self._admins)))
         except Exception:
-            self._logger.info(f"Админы ботов {self.admins}")
+            self._logger.info(f"Админы ботов {sorted(self._admins)}")
         # END настройки бота
 
         if bot_token is None:
@@ -45,6 +111,18 @@ class TlgBotCore(TelegramClient):
 
         super().__init__(session, **kwargs)
 
+        # корректная остановка: шаги ядра, приложение добавляет свои (планировщик и т.п.)
+        self._accepting_updates = True
+        self._dropped_updates = 0
+        self.shutdown = ShutdownCoordinator(shutdown_deadline, logger=self._logger, translate=self._t)
+        self.shutdown.add_step('stop_updates', self._shutdown_stop_intake, shutdown_phases.STOP_INTAKE)
+        self.shutdown.add_step('drain_updates', self._shutdown_drain_updates, shutdown_phases.DRAIN)
+        self.shutdown.add_step('outbox', self._shutdown_drain_outbox, shutdown_phases.OUTBOX)
+        self.shutdown.add_step('unload_plugins', self._shutdown_unload_plugins, shutdown_phases.FLUSH)
+        self.shutdown.add_step('metrics', self._shutdown_metrics, shutdown_phases.EXPORT)
+        self.shutdown.add_step('disconnect', lambda timeout: self.disconnect(), shutdown_phases.DISCONNECT)
+        self.shutdown.add_step('settings_storage', self._shutdown_close_storage, shutdown_phases.CLOSE)
+
         # # получим все папки плагинов
         # content = os.listdir(self._plugin_path)
         #
@@ -57,12 +135,69 @@ class TlgBotCore(TelegramClient):
         #             self.load_plugin_from_file(p)
         # ------- END Загрузка плагинов бота
 
+    # ------- Администраторы
+    @property
+    def admins(self) -> FrozenSet[int]:
+        """Id администраторов бота (frozenset; меняется через `admins = ...`, add_admin/remove_admin)."""
+        return self._admins
+
+    @admins.setter
+    def admins(self, ids: Iterable[Any]) -> None:
+        normalized = set()
+        for admin_id in ids or ():
+            try:
+                normalized.add(int(admin_id))
+            except (TypeError, ValueError):
+                self._logger.warning("Некорректный id администратора: %r", admin_id)
+        self._replace_admins(frozenset(normalized))
+
+    def _replace_admins(self, new: FrozenSet[int]) -> None:
+        old = self._admins
+        if new == old:
+            return
+        self._admins = new
+        added, removed = new - old, old - new
+        for callback in list(self._admin_listeners):
+            try:
+                callback(added, removed)
+            except Exception:
+                self._logger.exception("Ошибка обработчика изменения списка админов")
+
+    def is_admin(self, user_id: Any) -> bool:
+        """Проверка без выборки из хранилища и без построения множеств."""
+        if user_id.__class__ is not int:
+            try:
+                user_id = int(user_id)
+            except (TypeError, ValueError):
+                return False
+        return user_id in self._admins
+
+    def add_admin_listener(self, callback: Callable[[FrozenSet[int], FrozenSet[int]], Any]) -> None:
+        """Вызывать `callback(added, removed)` при изменении множества админов."""
+        if callback not in self._admin_listeners:
+            self._admin_listeners.append(callback)
+
+    def add_admin(self, user_id: int) -> None:
+        self._replace_admins(self._admins | {int(user_id)})
+
+    def remove_admin(self, user_id: int) -> None:
+        self._replace_admins(self._admins - {int(user_id)})
+
+    def user_changed(self, user: Any = None, user_id: Optional[int] = None) -> None:
+        """Учесть добавление/изменение (`user`) или удаление (`user_id`) пользователя в хранилище."""
+        if user is None:
+            self.remove_admin(user_id)
+        elif getattr(user, 'role', None) == Role.admin:
+            self.add_admin(user.id)
+        else:
+            self.remove_admin(user.id)
+
     def refresh_admins(self) -> None:
-        """Обновить список админов из хранилища настроек."""
+        """Перечитать список админов из хранилища настроек (полная синхронизация)."""
         try:
             if self.settings is not None:
                 self.admins = self.settings.get_user_type_id(Role.admin)
-                self._logger.info(self._t('admins_refreshed', admins=self.admins))
+                self._logger.info(self._t('admins_refreshed', admins=sorted(self._admins)))
             else:
                 self.admins = []
         except Exception:
@@ -109,102 +244,477 @@ class TlgBotCore(TelegramClient):
             self._logger.exception(self._t('core_critical_error', error=exc))
             raise
 
-    def load_plugin(self, shortname: str) -> None:
-        self.load_plugin_from_file(f"{self._plugin_path}/{shortname}.py")
+    def load_plugin(self, shortname: str) -> bool:
+        return self.load_plugin_from_file(f"{self._plugin_path}/{shortname}.py")
+
+    def _plugin_files(self) -> List[Path]:
+        """Файлы плагинов в детерминированном порядке (папка/файл)."""
+        content = os.listdir(self._plugin_path)
+        self._logger.info(self._t('found_directories', content=content))
+        files: List[Path] = []
+        for directory in sorted(content):
+            dir_path = f"{self._plugin_path}/{directory}"
+            if os.path.isdir(dir_path):
+                self._logger.info(self._t('loading_plugins_from', directory=directory))
+                files.extend(sorted(Path(dir_path).glob("*.py")))  # путь может быть и абсолютным
+        return [p for p in files if not (p.stem.startswith('__') or p.stem.startswith('.'))]
 
     async def load_all_plugins(self) -> None:
-        """Загрузка всех плагинов из папок с удалением старых обработчиков."""
+        """Загрузка всех плагинов из папок с удалением старых обработчиков.
+
+        Режим задаётся `plugin_load_mode`:
+            eager    - последовательный импорт (как раньше);
+            parallel - модули исполняются в пуле потоков, обработчики
+                       регистрируются после, в порядке файлов;
+            lazy     - при старте читается только манифест, модуль
+                       импортируется при первом подходящем событии.
+        """
         try:
             # Удаляем все старые плагины (кроме _core)
             for shortname in list(self._plugins.keys()):
                 if shortname != "_core":
                     await self.remove_plugin(shortname)
-
-            # получим все папки плагинов
-            content = os.listdir(self._plugin_path)
-            self._logger.info(self._t('found_directories', content=content))
+            for shortname in list(self._lazy_plugins.keys()):
+                self._drop_lazy_plugin(shortname)
+
+            started = time.perf_counter()
+            self._plugin_timings = {k: v for k, v in self._plugin_timings.items() if k == "_core"}
+            files = self._plugin_files()
+
+            to_import: List[Path] = []
+            lazy: List[str] = []
+            for plugin_file in files:
+                if self._plugin_load_mode == "lazy":
+                    manifest = extract_manifest(plugin_file)
+                    if not manifest.eager:
+                        self._register_lazy_plugin(manifest)
+                        lazy.append(manifest.shortname)
+                        continue
+                to_import.append(plugin_file)
+
+            if self._plugin_load_mode == "parallel":
+                imported = await asyncio.gather(
+                    *(asyncio.to_thread(self._import_plugin, p) for p in to_import)
+                )
+            else:
+                imported = [self._import_plugin(p) for p in to_import]
 
             loaded_count = 0
             failed_count = 0
-
-            for directory in content:
-                dir_path = f"{self._plugin_path}/{directory}"
-                if os.path.isdir(dir_path):
-                    self._logger.info(self._t('loading_plugins_from', directory=directory))
-                    for plugin_file in Path().glob(f"{dir_path}/*.py"):
-                        if self.load_plugin_from_file(plugin_file):
-                            loaded_count += 1
-                        else:
-                            failed_count += 1
+            for result in imported:
+                if result is None:
+                    failed_count += 1
+                    continue
+                self._commit_plugin(*result)
+                loaded_count += 1
 
             self._logger.info(self._t('plugins_load_summary', loaded=loaded_count, failed=failed_count))
+            self._report_startup(time.perf_counter() - started, lazy)
 
         except Exception as exc:
             self._logger.exception(self._t('plugins_load_error', error=exc))
 
+    def _report_startup(self, total: float, lazy: List[str]) -> None:
+        """Отчёт о времени загрузки плагинов (самые медленные сверху)."""
+        timings = sorted(self._plugin_timings.items(), key=lambda t: t[1], reverse=True)
+        self.startup_report = {
+            'mode': self._plugin_load_mode,
+            'total': total,
+            'imported': dict(timings),
+            'lazy': list(lazy),
+        }
+        self._logger.info(self._t(
+            'plugins_startup_report', mode=self._plugin_load_mode,
+            total_ms=f"{total * 1000:.1f}", loaded=len(timings), lazy=len(lazy)
+        ))
+        for name, seconds in timings:
+            self._logger.info(self._t('plugin_import_time', name=name, ms=f"{seconds * 1000:.1f}"))
+
     def load_plugin_from_file(self, path: Union[str, Path]) -> bool:
         """Загрузка плагина из файла с улучшенной обработкой ошибок."""
         path = Path(path)
         shortname = path.stem
-        
+
         # Пропускаем системные файлы
         if shortname.startswith('__') or shortname.startswith('.'):
             return True
-        
+
+        result = self._import_plugin(path)
+        if result is None:
+            return False
+        self._commit_plugin(*result)
+        return True
+
+    def _import_plugin(self, path: Union[str, Path]) -> Optional[Tuple[str, ModuleType, List[Tuple[Any, Any]]]]:
+        """Исполнить модуль плагина, не трогая живой список обработчиков.
+
+        Обработчики, зарегистрированные модулем через `tlgbot.on`, собираются
+        отдельно и попадают в клиент только в `_commit_plugin`. Поэтому
+        упавший плагин не оставляет после себя «половину» обработчиков,
+        а метод можно вызывать из пула потоков.
+        """
+        path = Path(path)
+        shortname = path.stem
+
         # Запрещаем перезагрузку _core плагина
         if shortname == '_core' and shortname in self._plugins:
             self._logger.warning(self._t('core_reload_forbidden'))
-            return False
-        
+            return None
+
         name = f"_TlgBotCorePlugins.{self._name}.{shortname}"
-        
+        started = time.perf_counter()
+        self._staged_handlers[name] = []
+
         try:
             spec = importlib.util.spec_from_file_location(name, path)
             if spec is None or spec.loader is None:
                 self._logger.error(self._t('spec_create_failed', path=path))
-                return False
-                
+                return None
+
             mod = importlib.util.module_from_spec(spec)
-            
+
             # Добавляем атрибуты в модуль динамически
             setattr(mod, 'tlgbot', self)
             setattr(mod, 'logger', logging.getLogger(shortname))
-            
+
             # Загружаем модуль
             if spec.loader is not None:
                 spec.loader.exec_module(mod)
             else:
                 self._logger.error(self._t('no_loader_for', name=shortname))
-                return False
-            
+                return None
+
             # Health-check: проверка наличия tlgbot
             if not hasattr(mod, 'tlgbot'):
                 self._logger.error(self._t('plugin_no_tlgbot', name=shortname))
-                return False
-            
-            self._plugins[shortname] = mod
-            self._logger.info(self._t('plugin_loaded', name=shortname))
-            return True
-            
+                return None
+
+            self._plugin_timings[shortname] = time.perf_counter() - started
+            return shortname, mod, self._staged_handlers[name]
+
         except ImportError as exc:
             self._logger.error(self._t('plugin_import_error', name=shortname, error=exc))
-            return False
+            return None
         except SyntaxError as exc:
             self._logger.error(self._t('plugin_syntax_error', name=shortname, error=exc))
-            return False
+            return None
         except Exception as exc:
             self._logger.exception(self._t('plugin_unexpected_error', name=shortname, path=path, error=exc))
-            return False
+            return None
+        finally:
+            self._staged_handlers.pop(name, None)
 
-    async def remove_plugin(self, shortname: str) -> None:
-        name = self._plugins[shortname].__name__
+    def _commit_plugin(self, shortname: str, mod: ModuleType, handlers: List[Tuple[Any, Any]]) -> None:
+        """Зарегистрировать импортированный плагин и его обработчики.
 
+        Обработчики встают в конец, как при обычном `tlgbot.on`; у ленивого
+        плагина - на место его заглушек.
+        """
+        if shortname in self._lazy_plugins:
+            # активация идёт изнутри диспатча telethon по `_event_builders`:
+            # список подменяется целиком, а не правится на месте
+            self._lazy_plugins.pop(shortname)
+            self._swap_handlers(self._lazy_module(shortname), handlers)
+        else:
+            self._event_builders.extend(handlers)
+        self._plugins[shortname] = mod
+        self._logger.info(self._t('plugin_loaded', name=shortname))
+
+    def _instrument(self, callback: Any) -> Any:
+        """Обернуть обработчик замером времени, числа вызовов и ошибок.
+
+        Обёртка сохраняет `__module__`/`__name__` и ссылку `__wrapped__`,
+        поэтому `remove_plugin` и `remove_event_handler` работают как раньше.
+        """
+        if getattr(callback, '__tlgbot_instrumented__', False):
+            return callback
+        plugin = str(getattr(callback, '__module__', '')).rsplit('.', 1)[-1]
+        handler = getattr(callback, '__name__', repr(callback))
+        calls = self._handler_calls
+        latency = self._handler_latency
+
+        @functools.wraps(callback)
+        async def instrumented(event):
+            started = time.perf_counter()
+            status = 'ok'
+            # ошибка контекста не роняет обработчик (см. user_context)
+            self.user_context(event)
+            try:
+                # ответы пользователю идут в очереди исходящих первыми
+                with outbox_priority(Priority.INTERACTIVE):
+                    return await callback(event)
+            except telethon.events.StopPropagation:
+                raise
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started, plugin=plugin, handler=handler)
+                calls.inc(plugin=plugin, handler=handler, status=status)
+
+        instrumented.__tlgbot_instrumented__ = True
+        return instrumented
+
+    def user_context(self, event: Any) -> Any:
+        """Контекст пользователя апдейта: вычисляется один раз и кэшируется на событии.
+
+        Ошибка резолвера логируется и даёт None: обработчики, которым контекст
+        не нужен (`/start`, `noauthbot`, команды `_core`), работают как раньше.
+        """
+        if event is None or self.user_context_resolver is None:
+            return None
+        ctx = getattr(event, 'user_context', None)
+        if ctx is None:
+            try:
+                ctx = self.user_context_resolver(event)
+            except Exception:
+                self._logger.exception(self._t('user_context_error', user_id=getattr(event, 'sender_id', None)))
+                return None
+            try:
+                event.user_context = ctx
+            except AttributeError:
+                pass
+        return ctx
+
+    def add_event_handler(self, callback: Any, event: Any = None) -> None:
+        """Регистрация обработчика; во время импорта плагина — в его буфер."""
+        builders = telethon.events._get_handlers(callback)
+        staged = self._staged_handlers.get(getattr(callback, '__module__', None))
+        callback = self._instrument(callback)
+        if staged is None:
+            super().add_event_handler(callback, event)
+            return
+
+        if builders is not None:
+            staged.extend((builder, callback) for builder in builders)
+            return
+        if isinstance(event, type):
+            event = event()
+        elif not event:
+            event = telethon.events.Raw()
+        staged.append((event, callback))
+
+    def remove_event_handler(self, callback: Any, event: Any = None) -> int:
+        """Удаление обработчика по исходной функции (с учётом обёртки метрик)."""
+        if event and not isinstance(event, type):
+            event = type(event)
+        found = 0
         for i in reversed(range(len(self._event_builders))):
             ev, cb = self._event_builders[i]
-            if cb.__module__ == name:
+            if (cb == callback or getattr(cb, '__wrapped__', None) == callback) \
+                    and (not event or isinstance(ev, event)):
                 del self._event_builders[i]
+                found += 1
+        return found
+
+    async def _call(self, sender: Any, request: Any, ordered: bool = False,
+                    flood_sleep_threshold: Optional[int] = None) -> Any:
+        """Все RPC проходят здесь: отправки — через очередь исходящих, замер времени."""
+        method = 'batch' if isinstance(request, (list, tuple)) else type(request).__name__
+        if self.outbox is None or method not in OUTBOX_REQUESTS:
+            return await self._timed_call(method, sender, request, ordered, flood_sleep_threshold)
+        try:
+            chat_id = telethon.utils.get_peer_id(request.peer)
+        except (AttributeError, TypeError, ValueError):
+            chat_id = None
+        # FloodWait обрабатывает очередь: пауза только для этого чата, остальные идут дальше
+        threshold = 0 if flood_sleep_threshold is None else flood_sleep_threshold
+        return await self.outbox.send(
+            chat_id, lambda: self._timed_call(method, sender, request, ordered, threshold)
+        )
+
+    async def _timed_call(self, method: str, sender: Any, request: Any, ordered: bool,
+                          flood_sleep_threshold: Optional[int]) -> Any:
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            return await super()._call(sender, request, ordered=ordered,
+                                       flood_sleep_threshold=flood_sleep_threshold)
+        except Exception as exc:
+            status = type(exc).__name__
+            raise
+        finally:
+            self._api_latency.observe(time.perf_counter() - started, method=method)
+            self._api_calls.inc(method=method, status=status)
+
+    @staticmethod
+    def _update_chat_id(update: Any) -> Optional[int]:
+        """Чат апдейта (как в telethon conversation), None — если апдейт не привязан к чату."""
+        peer = getattr(update, 'peer', None)
+        if peer is None:
+            peer = getattr(getattr(update, 'message', None), 'peer_id', None)
+        try:
+            if peer is not None:
+                return telethon.utils.get_peer_id(peer)
+            user_id = getattr(update, 'user_id', None)
+            if user_id is not None:
+                return user_id
+            chat_id = getattr(update, 'chat_id', None)
+            if chat_id is not None:
+                return telethon.utils.get_peer_id(PeerChat(chat_id))
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    async def _dispatch_update(self, update: Any) -> None:
+        """Апдейт уходит в очередь своего чата; обработка — в пуле планировщика."""
+        if not self._accepting_updates:
+            self._dropped_updates += 1
+            return
+        scheduler = self.update_scheduler
+        if scheduler is None:
+            return await super()._dispatch_update(update)
+        chat_id = self._update_chat_id(update)
+        if chat_id is not None and self._conversations.get(chat_id):
+            # обработчик чата ждёт ответа в conversation: очередь чата занята им самим
+            return await super()._dispatch_update(update)
+        scheduler.submit(chat_id, update)
+
+    def _reply_busy(self, chat_id: Any, update: Any) -> None:
+        """Ответить «занят, попробуйте позже» на отброшенный апдейт (не чаще раза в интервал)."""
+        if not isinstance(chat_id, int):
+            return
+        now = time.monotonic()
+        if now - self._busy_replied.get(chat_id, float('-inf')) < self._busy_reply_interval:
+            return
+        if len(self._busy_replied) > 10000:
+            self._busy_replied.clear()
+        self._busy_replied[chat_id] = now
+        text = self._t('busy_try_again')
+        query_id = getattr(update, 'query_id', None)
+        if query_id is not None:
+            request = SetBotCallbackAnswerRequest(query_id, message=text, alert=False)
+        elif getattr(update, 'message', None) is not None and not getattr(update.message, 'out', False):
+            request = SendMessageRequest(
+                update.message.peer_id, text, reply_to=InputReplyToMessage(update.message.id)
+            )
+        else:
+            return
+        task = asyncio.get_running_loop().create_task(self(request))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def start_metrics_exporter(self, file_path: Optional[str] = None, interval: float = 15.0,
+                                     http_host: str = '127.0.0.1', http_port: Optional[int] = None) -> Optional[MetricsExporter]:
+        """Запустить запись метрик в файл Prometheus и/или HTTP-эндпоинт."""
+        if not file_path and http_port is None:
+            return None
+        if self._metrics_exporter is None:
+            self._metrics_exporter = MetricsExporter(
+                self.metrics, file_path=file_path, interval=interval,
+                http_host=http_host, http_port=http_port,
+            )
+            await self._metrics_exporter.start()
+        return self._metrics_exporter
+
+    # ------- Ленивая загрузка плагинов
+    def _register_lazy_plugin(self, manifest: PluginManifest) -> None:
+        """Зарегистрировать заглушку, которая импортирует плагин по первому событию."""
+        shortname = manifest.shortname
+
+        async def lazy_plugin_trigger(event):
+            await self._activate_lazy_plugin(shortname, event)
+
+        lazy_plugin_trigger.__module__ = self._lazy_module(shortname)
+
+        if manifest.handles_messages:
+            builder = telethon.events.NewMessage(
+                func=lambda e: manifest.matches_message(e.raw_text or ''),
+            )
+            self._event_builders.append((builder, lazy_plugin_trigger))
+        if manifest.handles_callbacks:
+            builder = telethon.events.CallbackQuery(
+                func=lambda e: manifest.matches_callback(e.data or b''),
+            )
+            self._event_builders.append((builder, lazy_plugin_trigger))
+
+        # пункты меню нужны сразу, иначе главное меню будет неполным
+        if manifest.menu_entries:
+            try:
+                from bot.menu_system import register_menu
+                for entry in manifest.menu_entries:
+                    register_menu(entry)
+            except Exception as exc:
+                self._logger.exception(self._t('plugin_unexpected_error', name=shortname, path=manifest.path, error=exc))
+
+        self._lazy_plugins[shortname] = manifest
+        self._logger.info(self._t('plugin_lazy_registered', name=shortname))
+
+    def _lazy_module(self, shortname: str) -> str:
+        """Условный модуль заглушек ленивого плагина (по нему их находят в списке)."""
+        return f"_TlgBotCoreLazy.{self._name}.{shortname}"
+
+    def _drop_lazy_plugin(self, shortname: str) -> None:
+        """Удалить заглушки ленивого плагина."""
+        self._lazy_plugins.pop(shortname, None)
+        self._swap_handlers(self._lazy_module(shortname), [])
+
+    def ensure_plugin_loaded(self, shortname: str) -> bool:
+        """Гарантировать, что плагин импортирован (для ленивого режима)."""
+        if shortname in self._plugins:
+            return True
+        manifest = self._lazy_plugins.get(shortname)
+        if manifest is None:
+            return False
+        result = self._import_plugin(manifest.path)
+        if result is None:
+            self._drop_lazy_plugin(shortname)
+            return False
+        self._commit_plugin(*result)
+        self._logger.info(self._t(
+            'plugin_lazy_activated', name=shortname,
+            ms=f"{self._plugin_timings.get(shortname, 0.0) * 1000:.1f}"
+        ))
+        return True
+
+    async def _activate_lazy_plugin(self, shortname: str, event: Any) -> None:
+        """Импортировать плагин и передать ему событие, разбудившее заглушку.
+
+        Текущий диспатч telethon доходит до конца по старому списку, где
+        вместо обработчиков плагина стоят заглушки, поэтому событие получает
+        их ровно один раз - через `_dispatch_to_plugin`.
+        """
+        if shortname not in self._lazy_plugins:
+            return  # уже активирован другим событием: заглушка ничего не делает
+        if not self.ensure_plugin_loaded(shortname):
+            return
+        await self._dispatch_to_plugin(self._plugins[shortname].__name__, event)
+
+    async def _dispatch_to_plugin(self, module: str, event: Any) -> None:
+        """Повторить диспатч telethon для обработчиков одного модуля."""
+        for builder, callback in list(self._event_builders):
+            if getattr(callback, '__module__', None) != module:
+                continue
+            if not isinstance(event, getattr(builder, 'Event', ())):
+                continue
+            if not builder.resolved:
+                await builder.resolve(self)
+            passed = builder.filter(event)
+            if inspect.isawaitable(passed):
+                passed = await passed
+            if not passed:
+                continue
+            try:
+                await callback(event)
+            except telethon.events.StopPropagation:
+                raise
+            except Exception:
+                self._logger.exception(self._t('plugin_handler_error', name=getattr(callback, '__name__', repr(callback))))
+
+    async def remove_plugin(self, shortname: str) -> None:
+        if shortname in self._lazy_plugins and shortname not in self._plugins:
+            self._drop_lazy_plugin(shortname)
+            self._logger.info(self._t('removed_plugin', name=shortname))
+            return
 
         plugin = self._plugins.pop(shortname)
+        self._swap_handlers(plugin.__name__, [])
+        await self._unload_module(shortname, plugin)
+
+        del plugin
+        self._logger.info(self._t('removed_plugin', name=shortname))
+
+    async def _unload_module(self, shortname: str, plugin: ModuleType) -> None:
+        """Вызвать `unload()` плагина, если он его объявил."""
         if callable(getattr(plugin, 'unload', None)):
             try:
                 unload = plugin.unload()
@@ -213,8 +723,172 @@ class TlgBotCore(TelegramClient):
             except Exception:
                 self._logger.exception(self._t('unload_unhandled_exception', name=shortname))
 
-        del plugin
-        self._logger.info(self._t('removed_plugin', name=shortname))
+    def _swap_handlers(self, module: str, handlers: List[Tuple[Any, Any]]) -> None:
+        """Атомарно заменить обработчики модуля `module` на `handlers`.
+
+        Новый список собирается отдельно и подменяется одним присваиванием:
+        диспатч, который уже итерирует старый список, доходит до конца без
+        пропусков. Новые обработчики встают на место старых, так что
+        приоритет плагина не меняется.
+        """
+        current = self._event_builders
+        items = current[:]
+        positions = [i for i, (_, cb) in enumerate(items) if getattr(cb, '__module__', None) == module]
+        index = positions[0] if positions else len(items)
+        dropped = set(positions)
+        kept = [item for i, item in enumerate(items) if i not in dropped]
+        kept[index:index] = handlers
+        self._event_builders = type(current)(kept)
+
+    # ------- Горячая перезагрузка плагинов
+    def _plugin_source(self, shortname: str) -> Optional[Path]:
+        """Путь к файлу плагина: загруженного, ленивого или по соглашению папка/файл."""
+        if shortname in self._plugins and getattr(self._plugins[shortname], '__file__', None):
+            return Path(self._plugins[shortname].__file__)
+        if shortname in self._lazy_plugins:
+            return self._lazy_plugins[shortname].path
+        path = Path(self._plugin_path) / shortname / f"{shortname}.py"
+        return path if path.exists() else None
+
+    async def _plugin_healthy(self, shortname: str, mod: ModuleType) -> bool:
+        """Health-check нового модуля: необязательная функция `health_check()`.
+
+        Плагин считается нездоровым, если функция бросила исключение или
+        вернула False. Плагины без `health_check` проходят проверку.
+        """
+        check = getattr(mod, 'health_check', None)
+        if not callable(check):
+            return True
+        try:
+            result = check()
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception:
+            self._logger.exception(self._t('plugin_health_check_failed', name=shortname))
+            return False
+        if result is False:
+            self._logger.error(self._t('plugin_health_check_failed', name=shortname))
+            return False
+        return True
+
+    async def reload_plugin(self, shortname: str, path: Union[str, Path, None] = None) -> bool:
+        """Перезагрузить один плагин, не трогая остальные.
+
+        Новая версия импортируется в буфер и проходит health-check; только
+        после этого её обработчики атомарно подменяют старые. Если импорт или
+        проверка не удались, продолжает работать прежняя версия плагина.
+        `_core` не перезагружается никогда.
+        """
+        if shortname == '_core':
+            self._logger.warning(self._t('core_reload_forbidden'))
+            return False
+        path = Path(path) if path is not None else self._plugin_source(shortname)
+        if path is None or not path.exists():
+            self._logger.error(self._t('plugin_reload_not_found', name=shortname))
+            return False
+
+        if shortname in self._lazy_plugins and shortname not in self._plugins:
+            # модуль ещё не импортирован — достаточно обновить манифест
+            self._drop_lazy_plugin(shortname)
+            self._register_lazy_plugin(extract_manifest(path))
+            return True
+
+        result = self._import_plugin(path)
+        if result is None or not await self._plugin_healthy(shortname, result[1]):
+            self._logger.error(self._t('plugin_reload_rolled_back', name=shortname))
+            return False
+
+        _, mod, handlers = result
+        old = self._plugins.get(shortname)
+        if old is None:
+            self._commit_plugin(shortname, mod, handlers)
+            return True
+
+        self._swap_handlers(mod.__name__, handlers)
+        self._plugins[shortname] = mod
+        await self._unload_module(shortname, old)
+        self._logger.info(self._t(
+            'plugin_reloaded', name=shortname,
+            ms=f"{self._plugin_timings.get(shortname, 0.0) * 1000:.1f}"
+        ))
+        return True
+
+    def start_plugin_watcher(self, interval: float = 1.0) -> Any:
+        """Запустить наблюдатель за папкой плагинов (горячая перезагрузка)."""
+        from .plugin_watcher import PluginWatcher
+
+        if self._plugin_watcher is None:
+            self._plugin_watcher = PluginWatcher(self, interval=interval)
+            self._plugin_watcher.start()
+        return self._plugin_watcher
+
+    def start_locale_watcher(self, interval: float = 2.0) -> Any:
+        """Запустить перезагрузку изменившихся файлов локалей `self.i18n`."""
+        from .locale_watcher import LocaleWatcher
+
+        if self._locale_watcher is None:
+            self._locale_watcher = LocaleWatcher(self, interval=interval)
+            self._locale_watcher.start()
+        return self._locale_watcher
+
+    # ------- Корректная остановка
+    async def graceful_shutdown(self, reason: str = 'requested') -> ShutdownReport:
+        """Остановить бот по шагам `self.shutdown` в пределах дедлайна и вернуть отчёт."""
+        return await self.shutdown.run(reason)
+
+    async def _shutdown_stop_intake(self, timeout: float) -> int:
+        self._accepting_updates = False
+        if self._plugin_watcher is not None:
+            await self._plugin_watcher.stop()
+        if self._locale_watcher is not None:
+            await self._locale_watcher.stop()
+        return 0
+
+    async def _shutdown_drain_updates(self, timeout: float) -> int:
+        """Дождаться обработчиков; вернуть число апдейтов, брошенных по дедлайну."""
+        scheduler = self.update_scheduler
+        abandoned = self._dropped_updates
+        if scheduler is None:
+            tasks = {t for t in getattr(self, '_event_handler_tasks', ()) if not t.done()}
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+            return abandoned + sum(1 for t in tasks if not t.done())
+        try:
+            await asyncio.wait_for(scheduler.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        abandoned += scheduler.pending + scheduler.active
+        await scheduler.close()
+        return abandoned
+
+    async def _shutdown_drain_outbox(self, timeout: float) -> int:
+        """Дослать исходящие сообщения; вернуть число недосланных."""
+        if self.outbox is None:
+            return 0
+        loop = asyncio.get_running_loop()
+        until = loop.time() + timeout
+        while self.outbox.depth() and loop.time() < until:
+            await asyncio.sleep(0.05)
+        left = self.outbox.depth()
+        await self.outbox.close()
+        return left
+
+    async def _shutdown_unload_plugins(self, timeout: float) -> int:
+        """`unload()` плагинов — место, где они сбрасывают свои буферы."""
+        for shortname, plugin in list(self._plugins.items()):
+            await self._unload_module(shortname, plugin)
+        return 0
+
+    async def _shutdown_metrics(self, timeout: float) -> int:
+        if self._metrics_exporter is not None:
+            await self._metrics_exporter.stop()
+        return 0
+
+    def _shutdown_close_storage(self, timeout: float) -> int:
+        close = getattr(self.settings, 'close', None)
+        if callable(close):
+            close()
+        return 0
 
     def await_event(self, event_matcher: Any, filter: Optional[Any] = None) -> asyncio.Future[Any]:
         fut: asyncio.Future[Any] = asyncio.Future()
@@ -250,9 +924,12 @@ class TlgBotCore(TelegramClient):
 
         # Динамический фильтр доступа
         async def access_filter(event):
+            ctx = self.user_context(event)
+            if ctx is not None:
+                return ctx.is_admin if admin_only else ctx.authorized
             user_id = event.sender_id
             if admin_only:
-                allowed = user_id in (self.admins if self.settings is None else self.settings.get_user_type_id(Role.admin))
+                allowed = self.is_admin(user_id)
             else:
                 allowed = user_id in (self.settings.get_all_user_id() if self.settings is not None else [])
                 if not allowed:
@@ -261,7 +938,7 @@ class TlgBotCore(TelegramClient):
                     pass
             return allowed
 
-        self._logger.debug(f"cmd: pattern={pattern}, admin_only={admin_only}")
+        self._logger.debug("cmd: pattern=%s, admin_only=%s", pattern, admin_only)
 
         return telethon.events.NewMessage(
             outgoing=not self.me.bot,
@@ -304,6 +981,26 @@ class TlgBotCore(TelegramClient):
             'plugin_unexpected_error': f"Неожиданная ошибка при загрузке плагина {kwargs.get('name')} из {kwargs.get('path')}: {kwargs.get('error')}",
             'unload_unhandled_exception': f"Unhandled exception unloading {kwargs.get('name')}",
             'removed_plugin': f"Removed plugin {kwargs.get('name')}",
+            'plugins_startup_report': f"Старт плагинов ({kwargs.get('mode')}): {kwargs.get('loaded')} импортировано за {kwargs.get('total_ms')} мс, {kwargs.get('lazy')} отложено",
+            'plugin_import_time': f"Импорт плагина {kwargs.get('name')}: {kwargs.get('ms')} мс",
+            'plugin_lazy_registered': f"Плагин {kwargs.get('name')} зарегистрирован лениво (по манифесту)",
+            'plugin_lazy_activated': f"Плагин {kwargs.get('name')} загружен по первому событию за {kwargs.get('ms')} мс",
+            'plugin_handler_error': f"Необработанное исключение в обработчике {kwargs.get('name')}",
+            'user_context_error': f"Не удалось получить контекст пользователя {kwargs.get('user_id')}",
+            'plugin_reloaded': f"Плагин {kwargs.get('name')} перезагружен за {kwargs.get('ms')} мс",
+            'plugin_reload_rolled_back': f"Перезагрузка плагина {kwargs.get('name')} отменена, работает прежняя версия",
+            'plugin_health_check_failed': f"Плагин {kwargs.get('name')} не прошёл health-check",
+            'plugin_reload_not_found': f"Файл плагина {kwargs.get('name')} не найден",
+            'plugin_watcher_started': f"Наблюдение за плагинами в {kwargs.get('path')} ({kwargs.get('backend')})",
+            'plugin_watcher_error': f"Ошибка наблюдателя плагинов: {kwargs.get('error')}",
+            'locale_watcher_started': f"Наблюдение за локалями в {kwargs.get('path')} (опрос {kwargs.get('interval')} с)",
+            'locales_reloaded': f"Локали перезагружены: {kwargs.get('langs')}",
+            'locale_watcher_error': f"Ошибка наблюдателя локалей: {kwargs.get('error')}",
+            'busy_try_again': "Бот сейчас перегружен, попробуйте ещё раз через минуту.",
+            'shutdown_started': f"Остановка бота ({kwargs.get('reason')}), дедлайн {kwargs.get('deadline')} с",
+            'shutdown_step_timeout': f"Шаг остановки {kwargs.get('step')} не уложился в дедлайн",
+            'shutdown_step_failed': f"Ошибка на шаге остановки {kwargs.get('step')}: {kwargs.get('error')}",
+            'shutdown_report': f"Бот остановлен за {kwargs.get('elapsed')} с, шагов: {kwargs.get('steps')}, брошено: {kwargs.get('abandoned')}",
             'no_access': "Нет доступа к этой команде."
         }
         return fallbacks.get(key, key)
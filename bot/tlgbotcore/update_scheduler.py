@@ -0,0 +1,142 @@
+"""Планировщик обработки апдейтов: ограниченный пул и FIFO по чатам.
+
+Telethon запускает обработку каждого апдейта отдельной задачей без ограничений,
+поэтому текст пользователя может обогнать его же нажатие кнопки. Здесь апдейты
+раскладываются по очередям чатов: разные чаты обрабатываются параллельно
+(не больше `workers` одновременно), апдейты одного чата — строго по порядку.
+При переполнении апдейт отбрасывается и вызывается `on_shed` (ответ «занят»).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+
+class UpdateScheduler:
+    """Пул из `workers` задач, раздающих апдейты по очередям чатов."""
+
+    def __init__(self, handler: Callable[[Any], Awaitable[None]], workers: int = 16,
+                 max_pending: int = 1000, max_chat_pending: int = 20,
+                 on_shed: Optional[Callable[[Hashable, Any], None]] = None, metrics: Any = None) -> None:
+        self._handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_chat_pending = max_chat_pending
+        self._on_shed = on_shed
+        # очередь чата: (апдейт, время постановки); чат в _ready не больше одного раза
+        self._chats: Dict[Hashable, Deque[Tuple[Any, float]]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending = 0
+        self._active = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._logger = logging.getLogger(__name__)
+
+        self._depth = self._wait = self._shed = self._busy = None
+        if metrics is not None:
+            self._depth = metrics.gauge('tlgbot_updates_pending', 'Апдейты в очередях чатов')
+            self._busy = metrics.gauge('tlgbot_updates_active', 'Апдейты в обработке')
+            self._wait = metrics.histogram(
+                'tlgbot_update_wait_seconds', 'Ожидание апдейта в очереди чата до начала обработки')
+            self._shed = metrics.counter('tlgbot_updates_shed_total', 'Апдейты, отброшенные при перегрузке')
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def chat_pending(self, key: Hashable) -> int:
+        queue = self._chats.get(key)
+        return len(queue) if queue else 0
+
+    def _start(self) -> None:
+        if self._ready is None:
+            self._ready = asyncio.Queue()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._tasks = [t for t in self._tasks if not t.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.get_running_loop().create_task(self._worker()))
+
+    def _update_gauges(self) -> None:
+        if self._depth is not None:
+            self._depth.set(self._pending)
+            self._busy.set(self._active)
+
+    def submit(self, key: Optional[Hashable], update: Any) -> bool:
+        """Поставить апдейт в очередь чата `key` (None — без упорядочивания).
+
+        Вызывается синхронно, поэтому порядок постановки совпадает с порядком
+        прихода апдейтов. Возвращает False, если апдейт отброшен из-за перегрузки.
+        """
+        self._start()
+        assert self._ready is not None and self._idle is not None
+        if key is None:
+            key = object()  # отдельная очередь: без порядка, но в пределах пула
+        queue = self._chats.get(key)
+        if self._pending >= self.max_pending or (queue is not None and len(queue) >= self.max_chat_pending):
+            if self._shed is not None:
+                self._shed.inc()
+            if self._on_shed is not None:
+                try:
+                    self._on_shed(key, update)
+                except Exception:
+                    self._logger.exception("Ошибка при ответе на отброшенный апдейт")
+            return False
+
+        if queue is None:
+            queue = self._chats[key] = deque()
+            self._ready.put_nowait(key)
+        queue.append((update, time.perf_counter()))
+        self._pending += 1
+        self._idle.clear()
+        self._update_gauges()
+        return True
+
+    async def _worker(self) -> None:
+        assert self._ready is not None and self._idle is not None
+        while True:
+            key = await self._ready.get()
+            queue = self._chats[key]
+            update, enqueued = queue.popleft()
+            self._pending -= 1
+            self._active += 1
+            self._update_gauges()
+            if self._wait is not None:
+                self._wait.observe(time.perf_counter() - enqueued)
+            try:
+                await self._handler(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._logger.exception("Необработанное исключение при обработке апдейта")
+            finally:
+                self._active -= 1
+                if queue:
+                    self._ready.put_nowait(key)
+                else:
+                    del self._chats[key]
+                if not self._pending and not self._active:
+                    self._idle.set()
+                self._update_gauges()
+
+    async def join(self) -> None:
+        """Дождаться, пока все поставленные апдейты будут обработаны."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self) -> None:
+        """Остановить воркеры; необработанные апдейты отбрасываются."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
@@ -0,0 +1,129 @@
+"""Контекст пользователя, вычисляемый один раз на апдейт.
+
+Раньше одно нажатие кнопки обращалось к хранилищу настроек и к БД дневника
+по нескольку раз (`settings.get_user` в каждом обработчике, `get_user_lang`,
+`require_diary_user`, `dispatch_command`). Теперь `TlgBotCore` перед вызовом
+обработчика один раз строит `UserContext` и кладёт его в `event.user_context`;
+обработчики и помощники читают язык, роль и настройки оттуда.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+from bot.tlgbotcore.models import Role, User
+from cfg.config_tlg import DAYLOG_DB_PATH, DEFAULT_LANG
+from core.timezones import DEFAULT_TIMEZONE, get_timezone_service
+
+logger = logging.getLogger(__name__)
+
+_default_diary_db = None
+
+
+def _diary_db(tlgbot: Any) -> Any:
+    """БД дневника бота (`tlgbot.diary_db`), иначе общий экземпляр по DAYLOG_DB_PATH."""
+    global _default_diary_db
+    db = getattr(tlgbot, 'diary_db', None)
+    if db is not None:
+        return db
+    if _default_diary_db is None:
+        from core.database.manager import DatabaseManager
+        _default_diary_db = DatabaseManager(db_path=DAYLOG_DB_PATH)
+    return _default_diary_db
+
+
+@dataclass
+class UserContext:
+    """Всё, что обработчику нужно знать о пользователе апдейта."""
+
+    user_id: Optional[int]
+    lang: str = DEFAULT_LANG
+    role: Optional[Role] = None
+    is_admin: bool = False
+    authorized: bool = False   # есть в хранилище настроек бота (допущен к командам)
+    registered: bool = False   # есть в БД дневника (выполнил /start)
+    timezone: str = DEFAULT_TIMEZONE
+    settings: Dict[str, Any] = field(default_factory=dict)
+    user: Optional[User] = None
+    diary_user: Optional[Dict[str, Any]] = None
+
+    def today(self, now: Optional[datetime] = None) -> date:
+        """Сегодняшняя дата в часовом поясе пользователя (а не сервера)."""
+        return get_timezone_service().local_date(self.timezone, now)
+
+
+def resolve_user_context(tlgbot: Any, event: Any) -> UserContext:
+    """Построить контекст: одно чтение хранилища настроек и один запрос к БД дневника."""
+    user_id = getattr(event, 'sender_id', None)
+    default_lang = getattr(getattr(tlgbot, 'i18n', None), 'default_lang', DEFAULT_LANG)
+    if user_id is None:
+        return UserContext(user_id=None, lang=default_lang)
+
+    storage = getattr(tlgbot, 'settings', None)
+    try:
+        user = storage.get_user(user_id) if storage is not None else None
+    except Exception as e:
+        # без хранилища настроек — минимальный контекст, обработчик решает сам
+        logger.error("Ошибка чтения пользователя %s из хранилища настроек: %s", user_id, e)
+        return UserContext(user_id=user_id, lang=default_lang)
+
+    try:
+        diary_user = _diary_db(tlgbot).get_user_with_settings(user_id)
+    except Exception:
+        diary_user = None
+
+    # порядок как в прежнем get_user_lang: настройки бота, БД дневника, клиент Telegram
+    lang = getattr(user, 'lang', None) or (diary_user or {}).get('language_code')
+    if not lang:
+        sender = getattr(event, 'sender', None)
+        lang = getattr(sender, 'lang_code', None) or default_lang
+
+    role = getattr(user, 'role', None)
+    check_admin = getattr(tlgbot, 'is_admin', None)
+    if check_admin is not None:
+        listed_admin = check_admin(user_id)
+    else:
+        admins = getattr(tlgbot, 'admins', ()) or ()
+        listed_admin = user_id in admins or str(user_id) in admins
+    return UserContext(
+        user_id=user_id,
+        lang=lang,
+        role=role,
+        is_admin=role == Role.admin or listed_admin,
+        authorized=user is not None,
+        registered=diary_user is not None,
+        timezone=(diary_user or {}).get('timezone') or DEFAULT_TIMEZONE,
+        settings=dict(diary_user or {}),
+        user=user,
+        diary_user=diary_user,
+    )
+
+
+def get_user_context(event: Any, tlgbot: Any = None) -> UserContext:
+    """Контекст пользователя апдейта (из `event.user_context` или вычисленный и сохранённый)."""
+    ctx = getattr(event, 'user_context', None)
+    if isinstance(ctx, UserContext):
+        return ctx
+    if tlgbot is None:
+        tlgbot = getattr(event, 'client', None)
+    if tlgbot is not None and callable(getattr(tlgbot, 'user_context', None)):
+        ctx = tlgbot.user_context(event)
+        if ctx is not None:
+            return ctx
+    ctx = resolve_user_context(tlgbot, event)
+    try:
+        event.user_context = ctx
+    except AttributeError:
+        pass
+    return ctx
+
+
+def refresh_user_context(event: Any, tlgbot: Any) -> UserContext:
+    """Пересчитать контекст после изменения пользователя (смена языка, часового пояса)."""
+    ctx = resolve_user_context(tlgbot, event)
+    try:
+        event.user_context = ctx
+    except AttributeError:
+        pass
+    return ctx
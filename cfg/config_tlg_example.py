@@ -40,4 +40,106 @@ DAYLOG_DB_PATH = "./data/database/daylog.db"  # путь к файлу БД дн
 # WARNING - предупреждения и ошибки
 # ERROR - только ошибки
 # CRITICAL - только критические ошибки
-LOG_LEVEL = "INFO"
\ No newline at end of file
+LOG_LEVEL = "INFO"
+
+# Ротация файла логов logs/tlgbotcore.log по размеру
+LOG_MAX_BYTES = 10 * 1024 * 1024  # 0 - без ротации
+LOG_BACKUP_COUNT = 5              # сколько старых файлов хранить
+
+# Режим загрузки плагинов при старте
+# eager    - последовательный импорт всех плагинов
+# parallel - импорт в пуле потоков, обработчики регистрируются в порядке файлов
+# lazy     - при старте читается только манифест (команды, callback, меню),
+#            модуль плагина импортируется при первом подходящем событии
+PLUGINS_LOAD_MODE = "eager"
+
+# Горячая перезагрузка плагинов при изменении файлов
+# Перезагружается только изменившийся плагин; если новая версия не импортируется
+# или её health_check() вернул False, продолжает работать прежняя версия.
+# При установленном пакете watchfiles используются события ФС, иначе опрос mtime.
+PLUGINS_WATCH = False
+PLUGINS_WATCH_INTERVAL = 1.0  # период опроса, секунды
+
+# Горячая перезагрузка переводов: изменившиеся bot/locales/*.json перечитываются
+# в фоне (по mtime), каталоги подменяются целиком, кэш меню сбрасывается.
+LOCALES_WATCH = False
+LOCALES_WATCH_INTERVAL = 2.0  # период опроса, секунды
+
+# Метрики в текстовом формате Prometheus (время обработчиков, вызовы Telegram API)
+# METRICS_FILE - файл для textfile collector node_exporter (None - не писать)
+# METRICS_HTTP_PORT - порт локального эндпоинта /metrics (None - не поднимать)
+METRICS_FILE = None  # например "logs/metrics.prom"
+METRICS_FILE_INTERVAL = 15.0  # период записи файла, секунды
+METRICS_HTTP_HOST = "127.0.0.1"
+METRICS_HTTP_PORT = None  # например 9108
+
+# Очередь исходящих сообщений (лимиты Telegram, приоритеты, повтор после FloodWait)
+# Ответы в обработчиках отправляются раньше напоминаний и рассылок.
+# None - значения по умолчанию; {"enabled": False} - отправлять напрямую, как раньше.
+OUTBOX_SETTINGS = {
+    "global_rate": 25.0,      # сообщений в секунду на весь бот
+    "global_burst": 30.0,     # допустимый всплеск
+    "chat_rate": 1.0,         # сообщений в секунду в один чат
+    "chat_burst": 5.0,
+    "max_flood_wait": 300.0,  # FloodWait дольше этого (сек) не ждём, а отдаём ошибку
+    "max_retries": 3,
+}
+
+# Рассылка напоминаний (поминутный тик, пачки пользователей)
+# Ошибки: FloodWait - повтор через указанное время, бот заблокирован - напоминания
+# пользователю выключаются, прочие - повтор с растущей задержкой. Попытки пишутся
+# в таблицу reminder_deliveries. None - значения по умолчанию.
+REMINDER_SETTINGS = {
+    "batch_size": 500,       # пользователей в одной пачке
+    "concurrency": 20,       # одновременных отправок
+    "rate": 20.0,            # напоминаний в секунду (поверх OUTBOX_SETTINGS)
+    "max_attempts": 5,       # попыток доставки на пользователя в день
+    "retry_delay": 60.0,     # первая задержка повтора, секунды (дальше удваивается)
+    "max_downtime_minutes": 180,  # после перезапуска догонять пропущенное не больше этого
+    "delivery_retention_days": 30,  # сколько дней хранить журнал reminder_deliveries
+}
+
+# Экспорт дневника (/export) выполняется в пуле потоков, не блокируя бота:
+# у пользователя одновременно один экспорт, прогресс обновляется в статусном
+# сообщении, кнопка «Отмена» останавливает его. None - значения по умолчанию.
+EXPORT_SETTINGS = {
+    "workers": 2,              # одновременных экспортов на весь бот
+    "progress_interval": 2.0,  # как часто обновлять прогресс, секунды
+}
+
+# Кэш файлов экспорта (data/exports): повторный экспорт неизменившегося периода
+# отдаёт готовый файл. Уборщик удаляет файлы без обращений дольше ttl_hours,
+# затем самые давние сверх quota_mb. {"enabled": False} - файл удаляется сразу
+# после отправки. None - значения по умолчанию.
+EXPORT_CACHE_SETTINGS = {
+    "enabled": True,
+    "quota_mb": 512,       # предельный размер каталога экспорта
+    "ttl_hours": 24,       # сколько хранить файл после последнего обращения
+    "sweep_minutes": 30,   # как часто запускать уборщика
+}
+
+# Сжатие экспорта: документ сжимается на лету, пока пишется. Размер оценивается
+# заранее по тексту записей периода. None - значения по умолчанию.
+EXPORT_ARCHIVE_SETTINGS = {
+    "compression": "auto",     # None - без сжатия, "auto" - zip сверх threshold_mb,
+                               # "zip" / "gzip" / "zstd" - всегда (zstd - при наличии библиотеки)
+    "threshold_mb": 4,         # с какого объёма текста сжимать в режиме auto
+    "split": "year",           # очень большие истории - zip по файлу на год ("year")
+                               # или месяц ("month"); None - всегда одним файлом
+    "split_threshold_mb": 32,  # с какого объёма текста разбивать
+}
+
+# Обработка входящих апдейтов: разные чаты параллельно, внутри чата строго по порядку
+# При переполнении очередей пользователь получает ответ «бот перегружен».
+# None - значения по умолчанию; {"enabled": False} - как раньше, без очередей.
+UPDATE_SCHEDULER_SETTINGS = {
+    "workers": 16,               # одновременно обрабатываемых апдейтов
+    "max_pending": 1000,         # всего апдейтов в очередях
+    "max_chat_pending": 20,      # апдейтов в очереди одного чата
+    "busy_reply_interval": 10.0, # не чаще одного ответа «перегружен» в чат за интервал, сек
+}
+
+# Корректная остановка по SIGTERM/SIGINT: за сколько секунд бот должен
+# дождаться обработчиков, напоминаний и исходящих сообщений. Держите меньше
+# stop_grace_period в docker-compose (по умолчанию 10 с), иначе придёт SIGKILL.
+SHUTDOWN_DEADLINE = 8.0
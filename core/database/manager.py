@@ -6,11 +6,13 @@
 
 import sqlite3
 import logging
-from datetime import datetime, date
-from typing import Optional, Dict, List, Tuple
+from datetime import datetime, date, timezone as dt_timezone
+from typing import Any, Iterable, Iterator, Optional, Dict, List, Tuple
 from contextlib import contextmanager
 import os
 
+from core.timezones import get_zone
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
@@ -37,6 +39,26 @@ sqlite3.register_adapter(datetime, adapt_datetime_iso)
 sqlite3.register_converter("date", convert_date)
 sqlite3.register_converter("datetime", convert_datetime)
 
+
+
+def reminder_utc_minute(reminder_time: Optional[str], tz_name: Optional[str],
+                        on: Optional[datetime] = None) -> Optional[int]:
+    """Минута суток по UTC (0..1439), в которую наступает локальное время HH:MM.
+
+    Смещение пояса берётся на дату `on` (по умолчанию сейчас), поэтому после
+    перехода на летнее/зимнее время значение нужно пересчитать.
+    """
+    try:
+        hour, minute = (int(part) for part in (reminder_time or "").split(":"))
+    except ValueError:
+        return None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    tz = get_zone(tz_name)
+    day = (on or datetime.now(dt_timezone.utc)).astimezone(tz).date()
+    offset = datetime(day.year, day.month, day.day, hour, minute, tzinfo=tz).utcoffset()
+    return (hour * 60 + minute - int(offset.total_seconds()) // 60) % 1440
+
 class DatabaseManager:
     """Основной класс для работы с базой данных"""
     
@@ -94,6 +116,12 @@ class DatabaseManager:
                     CREATE INDEX IF NOT EXISTS idx_diary_entries_date 
                     ON diary_entries (entry_date DESC)
                 ''')
+
+                # выборка пользователей по часовому поясу (наступление суток)
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_users_timezone
+                    ON users (timezone)
+                ''')
                 
                 # Создание таблицы настроек
                 cursor.execute('''
@@ -110,6 +138,8 @@ class DatabaseManager:
                     )
                 ''')
                 
+                self._ensure_reminder_schema(cursor)
+
                 # Создание системной таблицы
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS system_info (
@@ -176,6 +206,7 @@ class DatabaseManager:
                 cursor.execute('''
                     INSERT OR IGNORE INTO user_settings (user_id) VALUES (?)
                 ''', (user_id,))
+                self._refresh_reminder_minute(cursor, user_id)
                 
                 conn.commit()
                 logger.info(f"Пользователь {user_id} создан/обновлен")
@@ -205,6 +236,27 @@ class DatabaseManager:
             logger.error(f"Ошибка получения пользователя {user_id}: {e}")
             return None
 
+    def get_user_with_settings(self, user_id: int) -> Optional[Dict]:
+        """Пользователь вместе со всеми его настройками одним запросом"""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+
+                # s.* первым: при отсутствии строки настроек u.user_id не затирается NULL
+                cursor.execute('''
+                    SELECT s.*, u.*
+                    FROM users u
+                    LEFT JOIN user_settings s ON u.user_id = s.user_id
+                    WHERE u.user_id = ?
+                ''', (user_id,))
+
+                row = cursor.fetchone()
+                return dict(row) if row else None
+
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка получения пользователя {user_id}: {e}")
+            return None
+
     def update_user_activity(self, user_id: int):
         """Обновление времени последней активности"""
         try:
@@ -364,6 +416,78 @@ class DatabaseManager:
             logger.error(f"Ошибка получения записей за период {start_date}-{end_date}: {e}")
             return []
     
+    def iter_entries(self, user_id: int, start_date: Optional[date] = None,
+                     end_date: Optional[date] = None, newest_first: bool = True,
+                     batch_size: int = 200, columns: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """Записи пользователя курсором, пачками по `batch_size` (без списка в памяти).
+
+        Границы периода необязательны; порядок задаёт индекс (user_id, entry_date).
+        `columns` — только нужные колонки (по умолчанию все). Соединение
+        держится открытым, пока итератор не исчерпан или не закрыт.
+        """
+        where, params = self._period_filter(user_id, start_date, end_date)
+        order = "DESC" if newest_first else "ASC"
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                f"SELECT {', '.join(columns) if columns else '*'} FROM diary_entries "
+                f"WHERE {where} ORDER BY entry_date {order}",
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+
+    def count_entries(self, user_id: int, start_date: Optional[date] = None,
+                      end_date: Optional[date] = None) -> int:
+        """Число записей пользователя за период (по индексу, без чтения строк)"""
+        where, params = self._period_filter(user_id, start_date, end_date)
+        with self.get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM diary_entries WHERE {where}", params).fetchone()[0]
+
+    def get_entries_version(self, user_id: int, start_date: Optional[date] = None,
+                            end_date: Optional[date] = None) -> Tuple[int, Optional[str], float]:
+        """Версия записей за период: (число, MAX(updated_at), сумма julianday(updated_at)).
+
+        Меняется при добавлении, удалении и правке любой записи периода;
+        сумма страхует от смешанных форматов updated_at, где MAX не растёт.
+        """
+        where, params = self._period_filter(user_id, start_date, end_date)
+        with self.get_connection() as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*), MAX(updated_at), TOTAL(julianday(updated_at)) FROM diary_entries WHERE {where}",
+                params,
+            ).fetchone()
+        return row[0], row[1], row[2]
+
+    def get_entries_size(self, user_id: int, start_date: Optional[date] = None,
+                         end_date: Optional[date] = None) -> Tuple[int, int]:
+        """Число записей за период и байт текста в них (UTF-8) - оценка размера экспорта"""
+        where, params = self._period_filter(user_id, start_date, end_date)
+        text = " + ".join(
+            f"COALESCE(LENGTH(CAST({column} AS BLOB)), 0)"
+            for column in ("mood", "weather", "location", "events", "additional_notes")
+        )
+        with self.get_connection() as conn:
+            row = conn.execute(
+                f"SELECT COUNT(*), TOTAL({text}) FROM diary_entries WHERE {where}", params
+            ).fetchone()
+        return row[0], int(row[1])
+
+    @staticmethod
+    def _period_filter(user_id: int, start_date: Optional[date],
+                       end_date: Optional[date]) -> Tuple[str, List[Any]]:
+        conditions, params = ["user_id = ?"], [user_id]
+        if start_date is not None:
+            conditions.append("entry_date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("entry_date <= ?")
+            params.append(end_date)
+        return " AND ".join(conditions), params
+
     def delete_diary_entry(self, user_id: int, entry_date: date) -> bool:
         pass
     
@@ -419,6 +543,10 @@ class DatabaseManager:
                         UPDATE user_settings SET {fields}
                         WHERE user_id = ?
                     ''', values + [user_id])
+
+                # время или пояс изменились — пересчитать минуту напоминания по UTC
+                if {"reminder_time", "timezone"} & kwargs.keys():
+                    self._refresh_reminder_minute(cursor, user_id)
                 
                 conn.commit()
                 logger.info(f"Настройки пользователя {user_id} обновлены")
@@ -465,25 +593,256 @@ class DatabaseManager:
             logger.error(f"Ошибка получения статистики: {e}")
             return {}
 
+    # ---------------- Системные значения -----------------
+    def get_system_value(self, key: str) -> Optional[str]:
+        """Значение из system_info или None."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT value FROM system_info WHERE key = ?", (key,))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка чтения system_info {key}: {e}")
+            return None
+
+    def set_system_value(self, key: str, value: str) -> bool:
+        """Записать значение в system_info."""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('''
+                    INSERT INTO system_info (key, value) VALUES (?, ?)
+                    ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+                ''', (key, value))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка записи system_info {key}: {e}")
+            return False
+
     # ---------------- Напоминания -----------------
+    def _ensure_reminder_schema(self, cursor):
+        """Колонки и индекс напоминаний (миграция старых БД на месте)."""
+        cursor.execute("PRAGMA table_info(user_settings)")
+        cols = {row[1] for row in cursor.fetchall()}
+        if "last_reminder_date" not in cols:
+            cursor.execute("ALTER TABLE user_settings ADD COLUMN last_reminder_date TEXT")
+            logger.info("[reminder] добавлена колонка last_reminder_date")
+        if "reminder_utc_minute" not in cols:
+            # минута суток по UTC, в которую пора напомнить; NULL — ещё не вычислена
+            cursor.execute("ALTER TABLE user_settings ADD COLUMN reminder_utc_minute INTEGER")
+            logger.info("[reminder] добавлена колонка reminder_utc_minute")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_user_settings_reminder_minute
+            ON user_settings (reminder_utc_minute) WHERE reminder_enabled = 1
+        ''')
+        # журнал доставки: одна строка на (пользователь, локальная дата)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reminder_deliveries (
+                user_id INTEGER NOT NULL,
+                local_date TEXT NOT NULL,
+                status TEXT NOT NULL,          -- sent / retry / skipped / blocked / failed / expired
+                attempts INTEGER NOT NULL DEFAULT 1,
+                last_error TEXT,
+                next_attempt_at INTEGER,       -- unix-время повтора для status = 'retry'
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, local_date)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reminder_deliveries_retry
+            ON reminder_deliveries (next_attempt_at) WHERE status = 'retry'
+        ''')
+
+    def _refresh_reminder_minute(self, cursor, user_id: int):
+        cursor.execute('''
+            SELECT s.reminder_time, u.timezone
+            FROM user_settings s JOIN users u ON u.user_id = s.user_id
+            WHERE s.user_id = ?
+        ''', (user_id,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute(
+                "UPDATE user_settings SET reminder_utc_minute = ? WHERE user_id = ?",
+                (reminder_utc_minute(row[0], row[1]), user_id),
+            )
+
     def ensure_reminder_columns(self):
         """Гарантировать наличие колонок для напоминаний.
 
-        Добавляет last_reminder_date если её нет (формат YYYY-MM-DD),
-        остальное уже есть в user_settings.
+        Добавляет last_reminder_date (формат YYYY-MM-DD) и reminder_utc_minute,
+        если их нет; остальное уже есть в user_settings.
         """
         try:
             with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA table_info(user_settings)")
-                cols = {row[1] for row in cursor.fetchall()}
-                if "last_reminder_date" not in cols:
-                    cursor.execute("ALTER TABLE user_settings ADD COLUMN last_reminder_date TEXT")
-                    conn.commit()
-                    logger.info("[reminder] добавлена колонка last_reminder_date")
+                self._ensure_reminder_schema(conn.cursor())
+                conn.commit()
         except sqlite3.Error as e:
             logger.error(f"[reminder] ошибка ensure_reminder_columns: {e}")
 
+    def update_reminder_minute(self, user_id: int) -> Optional[int]:
+        """Пересчитать минуту напоминания по UTC для пользователя и вернуть её."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                self._refresh_reminder_minute(cursor, user_id)
+                conn.commit()
+                cursor.execute(
+                    "SELECT reminder_utc_minute FROM user_settings WHERE user_id = ?", (user_id,)
+                )
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка update_reminder_minute {user_id}: {e}")
+            return None
+
+    def get_reminder_timezones(self) -> List[Tuple[str, str]]:
+        """Различные пары (часовой пояс, время напоминания) у включённых напоминаний."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT DISTINCT u.timezone, s.reminder_time
+                    FROM user_settings s JOIN users u ON u.user_id = s.user_id
+                    WHERE s.reminder_enabled = 1 AND s.reminder_time IS NOT NULL
+                ''')
+                return [(row[0], row[1]) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка get_reminder_timezones: {e}")
+            return []
+
+    def rederive_reminder_minutes(self, timezones: Optional[Iterable[Optional[str]]] = None,
+                                  on: Optional[datetime] = None,
+                                  pairs: Optional[List[Tuple[str, str]]] = None) -> int:
+        """Пересчитать reminder_utc_minute (после смены смещения пояса, например DST).
+
+        Считается один раз на пару (пояс, время), а не на пользователя; без
+        `timezones` — все пояса. `pairs` — уже прочитанный результат
+        `get_reminder_timezones`. Возвращает число изменённых строк.
+        """
+        wanted = None if timezones is None else set(timezones)
+        changes = [
+            (reminder_utc_minute(time_value, tz_name, on), time_value, tz_name)
+            for tz_name, time_value in (self.get_reminder_timezones() if pairs is None else pairs)
+            if wanted is None or tz_name in wanted
+        ]
+        if not changes:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # один проход по user_settings с таблицей (пояс, время) -> минута,
+                # а не полный просмотр на каждую пару
+                cursor.execute('''
+                    CREATE TEMP TABLE IF NOT EXISTS reminder_minutes_map (
+                        minute INTEGER, reminder_time TEXT, timezone TEXT
+                    )
+                ''')
+                cursor.execute("DELETE FROM reminder_minutes_map")
+                cursor.executemany("INSERT INTO reminder_minutes_map VALUES (?, ?, ?)", changes)
+                cursor.execute('''
+                    UPDATE user_settings SET reminder_utc_minute = m.minute
+                    FROM users u, reminder_minutes_map m
+                    WHERE u.user_id = user_settings.user_id
+                      AND u.timezone IS m.timezone
+                      AND user_settings.reminder_time = m.reminder_time
+                      AND user_settings.reminder_utc_minute IS NOT m.minute
+                ''')
+                changed = cursor.rowcount
+                cursor.execute("DROP TABLE reminder_minutes_map")
+                conn.commit()
+                return changed
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка rederive_reminder_minutes: {e}")
+            return 0
+
+    def fill_missing_reminder_minutes(self, on: Optional[datetime] = None) -> int:
+        """Вычислить reminder_utc_minute там, где её ещё нет (NULL, например после миграции)."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT s.user_id, s.reminder_time, u.timezone
+                    FROM user_settings s JOIN users u ON u.user_id = s.user_id
+                    WHERE s.reminder_enabled = 1 AND s.reminder_utc_minute IS NULL
+                ''')
+                changes = [
+                    (minute, user_id)
+                    for user_id, time_value, tz_name in cursor.fetchall()
+                    if (minute := reminder_utc_minute(time_value, tz_name, on)) is not None
+                ]
+                cursor.executemany(
+                    "UPDATE user_settings SET reminder_utc_minute = ? WHERE user_id = ?", changes
+                )
+                conn.commit()
+                return len(changes)
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка fill_missing_reminder_minutes: {e}")
+            return 0
+
+    def get_due_reminder_users(self, minute: int, until: Optional[int] = None) -> List[Dict]:
+        """Пользователи с включёнными напоминаниями на минуту суток `minute` по UTC (индекс).
+
+        С `until` — на все минуты от `minute` до `until` включительно (через
+        полночь, если `until < minute`).
+        """
+        if until is None or until == minute:
+            condition, params = "s.reminder_utc_minute = ?", (minute,)
+        elif until > minute:
+            condition, params = "s.reminder_utc_minute BETWEEN ? AND ?", (minute, until)
+        else:
+            condition = "(s.reminder_utc_minute >= ? OR s.reminder_utc_minute <= ?)"
+            params = (minute, until)
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"""
+                    SELECT s.user_id, u.language_code, u.timezone, s.reminder_time,
+                           s.last_reminder_date, s.reminder_utc_minute
+                    FROM user_settings s
+                    JOIN users u ON u.user_id = s.user_id
+                    WHERE s.reminder_enabled = 1 AND {condition}
+                    """,
+                    params,
+                )
+                return [dict(r) for r in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка get_due_reminder_users: {e}")
+            return []
+
+    def get_user_timezones(self) -> List[Optional[str]]:
+        """Различные часовые пояса пользователей (по индексу idx_users_timezone)."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT DISTINCT timezone FROM users")
+                return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка получения часовых поясов: {e}")
+            return []
+
+    def get_users_by_timezones(self, timezones: Iterable[Optional[str]]) -> List[Dict]:
+        """Активные пользователи из указанных часовых поясов."""
+        timezones = list(timezones)
+        if not timezones:
+            return []
+        names = [tz_name for tz_name in timezones if tz_name is not None]
+        condition = f"timezone IN ({', '.join('?' * len(names))})" if names else "0"
+        if None in timezones:
+            condition = f"({condition} OR timezone IS NULL)"
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT user_id, language_code, timezone FROM users WHERE is_active = 1 AND {condition}",
+                    names,
+                )
+                return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка получения пользователей по часовым поясам: {e}")
+            return []
+
     def get_users_with_reminders(self) -> List[Dict]:
         """Получить пользователей у которых включены напоминания."""
         try:
@@ -502,6 +861,115 @@ class DatabaseManager:
             logger.error(f"[reminder] ошибка get_users_with_reminders: {e}")
             return []
 
+    def get_reminder_recipients(self, batch: Iterable[Tuple[int, str]]) -> List[Dict]:
+        """Кому из пачки (user_id, локальная дата YYYY-MM-DD) ещё нужно напомнить.
+
+        Один запрос с анти-join: напоминания включены, за локальную дату нет
+        записи дневника и сегодня напоминание ещё не отправлялось.
+        """
+        batch = list(batch)
+        result: List[Dict] = []
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # не больше ~1000 параметров на запрос (лимит SQLite старых версий — 999)
+                for start in range(0, len(batch), 450):
+                    chunk = batch[start:start + 450]
+                    values = ", ".join(["(?, ?)"] * len(chunk))
+                    params = [value for pair in chunk for value in pair]
+                    cursor.execute(f'''
+                        WITH due(user_id, local_date) AS (VALUES {values})
+                        SELECT due.user_id, due.local_date, u.language_code
+                        FROM due
+                        JOIN users u ON u.user_id = due.user_id
+                        JOIN user_settings s ON s.user_id = due.user_id
+                        WHERE s.reminder_enabled = 1
+                          AND s.last_reminder_date IS NOT due.local_date
+                          AND NOT EXISTS (
+                              SELECT 1 FROM diary_entries d
+                              WHERE d.user_id = due.user_id AND d.entry_date = due.local_date
+                          )
+                    ''', params)
+                    result.extend(dict(row) for row in cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка get_reminder_recipients: {e}")
+        return result
+
+    def record_reminder_deliveries(self, deliveries: Iterable[Tuple[int, str, str, Optional[str], Optional[int]]]) -> int:
+        """Записать попытки доставки (user_id, дата, статус, ошибка, время повтора).
+
+        Всё в одной транзакции: журнал `reminder_deliveries` (счётчик попыток
+        растёт), `last_reminder_date` для отправленных и выключение напоминаний
+        у заблокировавших бота.
+        """
+        rows = list(deliveries)
+        if not rows:
+            return 0
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany('''
+                    INSERT INTO reminder_deliveries (user_id, local_date, status, last_error, next_attempt_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, local_date) DO UPDATE SET
+                        status = excluded.status,
+                        attempts = attempts + 1,
+                        last_error = excluded.last_error,
+                        next_attempt_at = excluded.next_attempt_at,
+                        updated_at = CURRENT_TIMESTAMP
+                ''', rows)
+                cursor.executemany(
+                    "UPDATE user_settings SET last_reminder_date = ? WHERE user_id = ?",
+                    [(date_str, user_id) for user_id, date_str, status, _, _ in rows if status == "sent"],
+                )
+                cursor.executemany(
+                    "UPDATE user_settings SET reminder_enabled = 0 WHERE user_id = ?",
+                    [(user_id,) for user_id, _, status, _, _ in rows if status == "blocked"],
+                )
+                conn.commit()
+                return len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка record_reminder_deliveries: {e}")
+            return 0
+
+    def get_reminder_retries(self, now_ts: int, limit: int = 1000) -> List[Dict]:
+        """Доставки, которые пора повторить (частичный индекс по next_attempt_at)."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT r.user_id, r.local_date, r.attempts, r.last_error, u.timezone
+                    FROM reminder_deliveries r
+                    LEFT JOIN users u ON u.user_id = r.user_id
+                    WHERE r.status = 'retry' AND r.next_attempt_at <= ?
+                    ORDER BY r.next_attempt_at LIMIT ?
+                    """,
+                    (now_ts, limit),
+                )
+                return [dict(r) for r in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка get_reminder_retries: {e}")
+            return []
+
+    def purge_reminder_deliveries(self, before: str) -> int:
+        """Удалить из журнала доставки завершённые строки за локальные даты раньше `before`.
+
+        Строки `retry` не трогаются: их закрывает повтор (в том числе как `expired`).
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "DELETE FROM reminder_deliveries WHERE local_date < ? AND status != 'retry'",
+                    (before,),
+                )
+                conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"[reminder] ошибка purge_reminder_deliveries: {e}")
+            return 0
+
     def update_last_reminder_date(self, user_id: int, date_str: str):
         """Сохраняет дату последней отправки напоминания."""
         try:
@@ -263,7 +263,7 @@ class DiaryManager:
         # Если в режиме редактирования, добавляем кнопки "Заменить", "Добавить" и "Правка"
         if edit_mode:
             # Отладочное сообщение при создании кнопок
-            self.logger.debug(f"Creating edit mode buttons with data: {prefix}events_replace, {prefix}events_append and {prefix}events_edit")
+            self.logger.debug("Creating edit mode buttons with data: %sevents_replace, %sevents_append and %sevents_edit", prefix, prefix, prefix)
             
             replace_btn = Button.inline(self._t('btn_replace', lang=lang), data=f"{prefix}events_replace")
             append_btn = Button.inline(self._t('btn_append', lang=lang), data=f"{prefix}events_append")
@@ -401,7 +401,7 @@ class DiaryManager:
                 current_events = form_data.get("events") or self._t('not_specified', lang=lang)
                 
                 # Отладочное сообщение
-                self.logger.debug(f"Showing events form with edit_mode=True. User ID: {user_id}, Current events: {current_events}")
+                self.logger.debug("Showing events form with edit_mode=True. User ID: %s, Current events: %s", user_id, current_events)
                 
                 edit_events_message = self._t('edit_events_prompt', lang=lang, events=current_events)
                 await event.edit(
@@ -525,7 +525,7 @@ class DiaryManager:
         if choice == "manual":
             # Обработка ввода погоды вручную
             self.update_user_form_data(user_id, waiting_manual_weather=True)
-            self.logger.debug(f"Manual weather input mode activated. User ID: {user_id}")
+            self.logger.debug("Manual weather input mode activated. User ID: %s", user_id)
             await event.edit(
                 (self._t('today_weather_manual', lang=lang) or "Введите описание погоды:") + 
                 "\n\n" + self._t('type_cancel_to_abort', lang=lang)
@@ -638,7 +638,7 @@ class DiaryManager:
             current_events = form_data.get("events") or self._t('not_specified', lang=lang)
                 
             # Отладочное сообщение
-            self.logger.debug(f"Showing events form with edit_mode=True. User ID: {user_id}, Current events: {current_events}")
+            self.logger.debug("Showing events form with edit_mode=True. User ID: %s, Current events: %s", user_id, current_events)
                 
             # Исправляем вызов метода локализации, передавая параметр events напрямую
             edit_events_message = self._t('edit_events_prompt', lang=lang, events=current_events)
@@ -671,7 +671,7 @@ class DiaryManager:
             return
         
         # Отладочное сообщение для всех кнопок
-        self.logger.debug(f"Events callback handler called. User ID: {user_id}, Choice: {choice}")
+        self.logger.debug("Events callback handler called. User ID: %s, Choice: %s", user_id, choice)
         
         if choice == "back":
             # Возвращаемся к предыдущему шагу - местоположение
@@ -700,14 +700,14 @@ class DiaryManager:
         
         # Новые обработчики для режима редактирования
         if choice == "replace":
-            self.logger.debug(f"REPLACE button was clicked! User ID: {user_id}")
+            self.logger.debug("REPLACE button was clicked! User ID: %s", user_id)
             # Устанавливаем флаг режима замены
             self.update_user_form_data(user_id, events_mode="replace")
             form_data = self.get_user_form_data(user_id)
             current_events = form_data.get("events") or ""
             
             # Отладочное сообщение
-            self.logger.debug(f"Replace button clicked. User ID: {user_id}, Current events: {current_events}")
+            self.logger.debug("Replace button clicked. User ID: %s, Current events: %s", user_id, current_events)
             
             replace_message = self._t('events_replace_prompt', lang=lang, events=current_events)
             if not replace_message:
@@ -738,7 +738,7 @@ class DiaryManager:
             current_events = form_data.get("events") or ""
             
             # Отладочное сообщение
-            self.logger.debug(f"Edit button clicked. User ID: {user_id}, Current events: {current_events}")
+            self.logger.debug("Edit button clicked. User ID: %s, Current events: %s", user_id, current_events)
             
             edit_message = self._t('events_edit_prompt', lang=lang, events=current_events)
             if not edit_message:
@@ -781,7 +781,7 @@ class DiaryManager:
             }
             
             # Отладочная информация
-            self.logger.debug(f"Saving data: {entry_data}, edit_mode: {edit_mode}")
+            self.logger.debug("Saving data: %s, edit_mode: %s", entry_data, edit_mode)
             
             if edit_mode:
                 # Обновляем существующую запись
@@ -912,7 +912,7 @@ class DiaryManager:
                 current_events = form_data.get("events") or self._t('not_specified', lang=lang)
                 
                 # Отладочное сообщение
-                self.logger.debug(f"Showing events edit form with edit_mode=True. User ID: {user_id}, Current events: {current_events}")
+                self.logger.debug("Showing events edit form with edit_mode=True. User ID: %s, Current events: %s", user_id, current_events)
                 
                 # Исправляем вызов метода локализации, передавая параметр events напрямую
                 edit_events_message = self._t('edit_events_prompt', lang=lang, events=current_events)
@@ -970,7 +970,7 @@ class DiaryManager:
                 }
                 
                 # Отладочная информация
-                self.logger.debug(f"Saving data from text input: {entry_data}, edit_mode: {edit_mode}")
+                self.logger.debug("Saving data from text input: %s, edit_mode: %s", entry_data, edit_mode)
                 
                 if edit_mode:
                     # Обновляем существующую запись
@@ -1031,7 +1031,7 @@ class DiaryManager:
         entry = self.db.get_diary_entry(user_id, entry_date)
         
         # Добавляем отладочную информацию
-        self.logger.debug(f"Entry from DB for {entry_date} command: {entry}")
+        self.logger.debug("Entry from DB for %s command: %s", entry_date, entry)
         
         if entry:
             # Добавляем inline-кнопки для редактирования существующей записи
@@ -1044,7 +1044,7 @@ class DiaryManager:
             ]
             
             # Добавляем отладочную информацию для кнопок
-            self.logger.debug(f"Creating buttons for edit options. User ID: {user_id}")
+            self.logger.debug("Creating buttons for edit options. User ID: %s", user_id)
             
             # Определяем правильный ключ для сообщения в зависимости от префикса
             entry_exists_key = f'{prefix.rstrip("_")}_entry_exists_edit' if prefix else 'today_entry_exists_edit'
@@ -0,0 +1,83 @@
+"""
+Сжатие файлов экспорта на лету: zip, gzip и zstd.
+
+Документ пишется в сжимающий поток по мере форматирования записей, так что
+несжатый текст целиком нигде не хранится. zstd - необязательная зависимость
+(`compression.zstd` из Python 3.14 или пакет `zstandard`); без неё вместо zstd
+используется gzip.
+"""
+
+import gzip
+import logging
+import zipfile
+from contextlib import contextmanager, nullcontext
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:  # pragma: no cover - зависит от версии Python
+    _zstd = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - необязательная зависимость
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ("zip", "gzip", "zstd")
+
+# сжатие -> суффикс файла (zip заменяет расширение, остальные дописываются)
+ARCHIVE_SUFFIXES = {"zip": ".zip", "gzip": ".gz", "zstd": ".zst"}
+
+# разбиение архива на файлы: по году или по месяцу записи
+SPLITS = ("year", "month")
+
+
+def zstd_available() -> bool:
+    return _zstd is not None or zstandard is not None
+
+
+def resolve_compression(compression: Optional[str]) -> Optional[str]:
+    """Поддерживаемое сжатие или None; zstd без библиотеки - gzip"""
+    if compression not in COMPRESSIONS:
+        return None
+    if compression == "zstd" and not zstd_available():
+        logger.warning("zstd недоступен (нет compression.zstd и zstandard), экспорт сжимается gzip")
+        return "gzip"
+    return compression
+
+
+def archive_filename(filename: str, compression: Optional[str]) -> str:
+    """Имя файла после сжатия: diary.md -> diary.zip, diary.md.gz, diary.md.zst"""
+    if compression is None:
+        return filename
+    if compression == "zip":
+        return filename.rsplit(".", 1)[0] + ARCHIVE_SUFFIXES["zip"]
+    return filename + ARCHIVE_SUFFIXES[compression]
+
+
+@contextmanager
+def compressed(out: BinaryIO, compression: Optional[str], inner_name: str) -> Iterator[BinaryIO]:
+    """
+    Поток, который сжимает записанное в `out`
+
+    `inner_name` - имя файла внутри архива (zip) или в заголовке (gzip).
+    При выходе сжатие завершается, сам `out` остаётся открытым.
+    """
+    if compression is None:
+        with nullcontext(out) as raw:
+            yield raw
+    elif compression == "zip":
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(inner_name, "w") as raw:
+                yield raw
+    elif compression == "gzip":
+        # уровень как у zip: 9 (по умолчанию gzip) заметно медленнее при почти том же размере
+        with gzip.GzipFile(filename=inner_name, mode="wb", fileobj=out, compresslevel=6, mtime=0) as raw:
+            yield raw
+    elif _zstd is not None:
+        with _zstd.ZstdFile(out, "w") as raw:
+            yield raw
+    else:
+        with zstandard.ZstdCompressor().stream_writer(out, closefd=False) as raw:
+            yield raw
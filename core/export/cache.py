@@ -0,0 +1,146 @@
+"""
+Кэш файлов экспорта.
+
+Имя файла содержит хэш ключа (пользователь, границы периода, формат, заголовок
+и версия записей периода - число и время последнего изменения), поэтому
+повторный экспорт неизменившегося периода отдаёт готовый файл, а любая правка
+даёт новое имя. Уборщик (`sweep`) удаляет файлы, к которым не обращались
+дольше TTL, и затем самые давние, пока каталог не уложится в квоту; время
+последнего обращения - mtime файла (обновляется при попадании).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# недописанный файл: уборщик не трогает его, пока он моложе TTL
+PARTIAL_SUFFIX = ".part"
+
+
+@dataclass
+class SweepReport:
+    """Итог уборки каталога экспорта"""
+
+    files: int = 0  # осталось файлов
+    size: int = 0  # осталось байт
+    removed: int = 0
+    reclaimed: int = 0  # освобождено байт
+
+
+class ExportCache:
+    """Каталог экспорта с адресацией по содержимому, квотой и TTL"""
+
+    def __init__(self, directory: str = "data/exports", quota_bytes: int = 512 * 1024 * 1024,
+                 ttl_seconds: float = 24 * 3600, metrics: Any = None,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reclaimed_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._requests = self._reclaimed = self._size = None
+        if metrics is not None:
+            self._requests = metrics.counter(
+                "tlgbot_export_cache_requests_total", "Обращения к кэшу экспорта", ("result",))
+            self._reclaimed = metrics.counter(
+                "tlgbot_export_cache_reclaimed_bytes_total", "Байт освобождено уборщиком кэша экспорта")
+            self._size = metrics.gauge("tlgbot_export_cache_bytes", "Размер каталога экспорта")
+
+    @staticmethod
+    def filename(user_id: int, start_date: Optional[date], end_date: Optional[date], extension: str,
+                 version: Tuple[Any, ...], title: str = "") -> str:
+        """Имя файла по ключу: читаемая часть для пользователя и хэш ключа"""
+        key = repr((user_id, start_date, end_date, extension, title, tuple(version)))
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        if start_date is None and end_date is None:
+            period = "all"
+        else:
+            period = f"{start_date or ''}_{end_date or ''}"
+        return f"diary_export_{user_id}_{period}_{digest}.{extension}"
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """Путь к готовому файлу или None; попадание продлевает жизнь файла"""
+        filepath = self.path(filename)
+        try:
+            now = self._clock()
+            os.utime(filepath, (now, now))
+        except FileNotFoundError:
+            self._count("miss")
+            return None
+        self._count("hit")
+        return filepath
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def sweep(self) -> SweepReport:
+        """Удалить просроченные файлы, затем самые давние сверх квоты"""
+        now = self._clock()
+        files: List[Tuple[float, int, str]] = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.is_file():
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, item.path))
+
+        report = SweepReport()
+        total = sum(size for _, size, _ in files)
+        # от давних к свежим: сначала TTL, затем квота
+        for mtime, size, filepath in sorted(files):
+            expired = now - mtime > self.ttl_seconds
+            if not expired and (total <= self.quota_bytes or filepath.endswith(PARTIAL_SUFFIX)):
+                continue
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Не удалось удалить файл экспорта {filepath}: {e}")
+                continue
+            total -= size
+            report.removed += 1
+            report.reclaimed += size
+
+        report.files = len(files) - report.removed
+        report.size = total
+        with self._lock:
+            self.reclaimed_bytes += report.reclaimed
+        if self._reclaimed is not None:
+            self._reclaimed.inc(report.reclaimed)
+            self._size.set(total)
+        logger.info(
+            f"Кэш экспорта: {report.files} файлов, {report.size / 1024 / 1024:.1f} МБ; "
+            f"удалено {report.removed} ({report.reclaimed / 1024 / 1024:.1f} МБ), "
+            f"попаданий {self.hit_rate:.0%} ({self.hits} из {self.hits + self.misses})"
+        )
+        return report
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            if result == "hit":
+                self.hits += 1
+            else:
+                self.misses += 1
+        if self._requests is not None:
+            self._requests.inc(result=result)
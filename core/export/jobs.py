@@ -0,0 +1,189 @@
+"""
+Очередь заданий экспорта: пул потоков, одно задание на пользователя.
+
+Чтение БД, форматирование и запись файла выполняются в потоке пула, цикл
+событий бота в это время обслуживает остальных. У пользователя одновременно
+не больше одного задания. Пока задание идёт, `on_progress` раз в
+`progress_interval` секунд получает задание с числом записанных записей;
+отмена - флаг, который проверяется перед каждой записью (недописанный файл
+удаляет DiaryExportManager).
+
+Пул потоков, а не процессов: sqlite3 и запись файла отпускают GIL, а
+DatabaseManager и курсор не нужно передавать в другой процесс.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExportCancelled(Exception):
+    """Экспорт отменён пользователем"""
+
+
+@dataclass
+class ExportJob:
+    """Задание экспорта одного пользователя"""
+
+    user_id: int
+    created_at: float
+    status: str = "queued"  # queued, running, done, cancelled, failed
+    total: Optional[int] = None  # всего записей (задаёт функция экспорта)
+    done: int = 0  # записано
+    result: Any = None
+    error: Optional[BaseException] = None
+    task: Optional[asyncio.Task] = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def advance(self, count: int = 1) -> None:
+        """Отметка прогресса из потока экспорта; после отмены - ExportCancelled"""
+        if self._cancel.is_set():
+            raise ExportCancelled()
+        self.done += count
+
+
+class ExportJobQueue:
+    """Задания экспорта в пуле из `workers` потоков, не больше одного на пользователя"""
+
+    def __init__(self, workers: int = 2, progress_interval: float = 2.0, metrics: Any = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.workers = workers
+        self.progress_interval = progress_interval
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._jobs: Dict[int, ExportJob] = {}
+
+        self._finished = self._queued = self._running = self._wait = self._duration = None
+        if metrics is not None:
+            self._finished = metrics.counter(
+                "tlgbot_export_jobs_total", "Задания экспорта по итогу (busy - отклонено, уже идёт)", ("status",))
+            self._queued = metrics.gauge("tlgbot_export_jobs_queued", "Задания экспорта в очереди пула")
+            self._running = metrics.gauge("tlgbot_export_jobs_running", "Задания экспорта в работе")
+            self._wait = metrics.histogram(
+                "tlgbot_export_job_wait_seconds", "Ожидание задания экспорта в очереди пула")
+            self._duration = metrics.histogram(
+                "tlgbot_export_job_seconds", "Длительность задания экспорта", ("status",))
+
+    def get(self, user_id: int) -> Optional[ExportJob]:
+        """Текущее задание пользователя"""
+        return self._jobs.get(user_id)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, user_id: int, func: Callable[[ExportJob], Any],
+               on_progress: Optional[Callable[[ExportJob], Awaitable[None]]] = None,
+               on_done: Optional[Callable[[ExportJob], Awaitable[None]]] = None) -> Optional[ExportJob]:
+        """
+        Поставить экспорт пользователя в очередь
+
+        `func(job)` выполняется в потоке пула и должна вызывать `job.advance()`
+        по мере записи; `on_progress(job)` и `on_done(job)` - корутины в цикле
+        событий. Возвращает задание или None, если у пользователя уже идёт экспорт.
+        """
+        if user_id in self._jobs:
+            if self._finished is not None:
+                self._finished.inc(status="busy")
+            return None
+        job = ExportJob(user_id=user_id, created_at=self._clock())
+        self._jobs[user_id] = job
+        self._update_gauges()
+        job.task = asyncio.get_running_loop().create_task(self._run(job, func, on_progress, on_done))
+        return job
+
+    def cancel(self, user_id: int) -> bool:
+        """Отменить экспорт пользователя; False - заданий нет"""
+        job = self._jobs.get(user_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    async def join(self) -> None:
+        """Дождаться всех текущих заданий"""
+        while self._jobs:
+            await asyncio.wait([job.task for job in self._jobs.values() if job.task is not None])
+
+    async def shutdown(self, timeout: float) -> int:
+        """Отменить все задания и дождаться их до таймаута; вернуть число недождавшихся"""
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+        for job in self._jobs.values():
+            job.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return sum(1 for task in tasks if not task.done())
+
+    def _call(self, job: ExportJob, func: Callable[[ExportJob], Any]) -> Any:
+        # поток пула
+        if job.cancelled:
+            raise ExportCancelled()
+        job.status = "running"
+        if self._wait is not None:
+            self._wait.observe(self._clock() - job.created_at)
+        return func(job)
+
+    async def _run(self, job: ExportJob, func: Callable[[ExportJob], Any],
+                   on_progress: Optional[Callable[[ExportJob], Awaitable[None]]],
+                   on_done: Optional[Callable[[ExportJob], Awaitable[None]]]) -> None:
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._call, job, func)
+        try:
+            reported = 0  # без записанных записей прогресс не показываем
+            while True:
+                done, _ = await asyncio.wait({future}, timeout=self.progress_interval)
+                self._update_gauges()
+                if done:
+                    break
+                if on_progress is not None and job.status == "running" and not job.cancelled \
+                        and job.done != reported:
+                    reported = job.done
+                    await self._callback(on_progress, job)
+            try:
+                job.result = future.result()
+                job.status = "done"
+            except ExportCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = e
+                logger.error(f"Ошибка экспорта пользователя {job.user_id}: {e}")
+        except asyncio.CancelledError:
+            # задачу прервали (остановка бота): поток останавливаем флагом
+            job.cancel()
+            job.status = "cancelled"
+            raise
+        finally:
+            self._jobs.pop(job.user_id, None)
+            self._update_gauges()
+            if self._finished is not None:
+                self._finished.inc(status=job.status)
+                self._duration.observe(self._clock() - job.created_at, status=job.status)
+        if on_done is not None:
+            await self._callback(on_done, job)
+
+    @staticmethod
+    async def _callback(callback: Callable[[ExportJob], Awaitable[None]], job: ExportJob) -> None:
+        # ошибка отправки сообщения не должна ронять задание
+        try:
+            await callback(job)
+        except Exception as e:
+            logger.warning(f"Ошибка уведомления об экспорте пользователя {job.user_id}: {e}")
+
+    def _update_gauges(self) -> None:
+        if self._queued is not None:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+            self._running.set(running)
+            self._queued.set(len(self._jobs) - running)
@@ -2,40 +2,267 @@
 Модуль для экспорта данных дневника в различные форматы
 """
 
+import io
 import os
+import csv
 import logging
+import tempfile
+import zipfile
 from datetime import datetime, date, timedelta
 import calendar
-from typing import List, Dict, Optional, Tuple, Any
+from itertools import chain, groupby
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Dict, Optional, TextIO, Tuple, Any
 import json
 from pathlib import Path
 
+from core.export.archive import SPLITS, archive_filename, compressed, resolve_compression
+from core.export.cache import PARTIAL_SUFFIX
+
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# буфер записи файла экспорта: записи пишутся по одной, на диск - крупными блоками
+WRITE_BUFFER = 64 * 1024
+
+# экспорт без кэша собирается в памяти; больше этого размера - во временном файле
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+# auto-сжатие и разбиение на файлы по году/месяцу - сверх этого объёма текста записей
+COMPRESS_THRESHOLD = 4 * 1024 * 1024
+SPLIT_THRESHOLD = 32 * 1024 * 1024
+
+# колонки записей, которые попадают в экспорт
+EXPORT_COLUMNS = ("entry_date", "mood", "weather", "location", "events", "additional_notes")
+
+# форматы экспорта: значение user_settings.export_format -> расширение файла
+EXPORT_EXTENSIONS = {
+    "markdown": "md",
+    "json": "json",
+    "jsonl": "jsonl",
+    "csv": "csv",
+}
+DEFAULT_EXPORT_FORMAT = "markdown"
+
+# один кодировщик на все записи: json.dumps с параметрами создаёт его на каждый вызов
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _entry_date(entry: Dict) -> date:
+    entry_date = entry.get('entry_date')
+    if isinstance(entry_date, str):
+        entry_date = datetime.fromisoformat(entry_date).date()
+    return entry_date
+
+
+def format_markdown_entry(entry: Dict) -> str:
+    """Одна запись дневника в Markdown (вместе с разделителем)"""
+    entry_date = _entry_date(entry)
+    parts = [
+        # то же, что strftime('%d.%m.%Y'), но заметно быстрее на тысячах записей
+        f"## Запись от {entry_date.day:02d}.{entry_date.month:02d}.{entry_date.year}\n\n",
+        f"### Настроение\n{entry.get('mood') or 'Не указано'}\n\n",
+        f"### Погода\n{entry.get('weather') or 'Не указано'}\n\n",
+        f"### Местоположение\n{entry.get('location') or 'Не указано'}\n\n",
+        f"### События дня\n{entry.get('events') or 'Не указано'}\n\n",
+    ]
+    additional_notes = entry.get("additional_notes")
+    if additional_notes:
+        parts.append(f"### Дополнительные заметки\n{additional_notes}\n\n")
+    parts.append("---\n\n")  # Разделитель между записями
+    return "".join(parts)
+
+
+def _change_time(updated_at: Any) -> str:
+    """MAX(updated_at) для заголовка: ДД.ММ.ГГГГ ЧЧ:ММ или как есть, если не разобрать"""
+    try:
+        if not isinstance(updated_at, datetime):
+            updated_at = datetime.fromisoformat(updated_at)
+        return updated_at.strftime('%d.%m.%Y %H:%M')
+    except (TypeError, ValueError):
+        return str(updated_at)
+
+
+def entry_record(entry: Dict) -> Dict[str, Any]:
+    """Запись дневника для JSON/CSV: поля EXPORT_COLUMNS, дата в ISO"""
+    record = {column: entry.get(column) for column in EXPORT_COLUMNS}
+    record["entry_date"] = _entry_date(entry).isoformat()
+    return record
+
+
+def export_format_of(value: Any) -> str:
+    """Поддерживаемый формат по значению настройки (ExportFormat или строка);
+    неизвестный или неподдерживаемый (pdf) - Markdown"""
+    value = getattr(value, "value", value)
+    return value if value in EXPORT_EXTENSIONS else DEFAULT_EXPORT_FORMAT
+
+
+def _tracked(entries: Iterable[Dict], progress: Callable[[int], None]) -> Iterator[Dict]:
+    """Записи с отметкой `progress(1)` перед каждой (отмена - исключением из progress)"""
+    for entry in entries:
+        progress(1)
+        yield entry
+
+
+def _split_key(entry: Dict, split: str) -> str:
+    """Часть архива для записи: 2024 (по году) или 2024-03 (по месяцу)"""
+    entry_date = _entry_date(entry)
+    if split == "month":
+        return f"{entry_date.year}-{entry_date.month:02d}"
+    return str(entry_date.year)
+
+
+def period_bounds(period_type: str, today: Optional[date] = None) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Границы периода экспорта: today, week, month, all
+    
+    `today` - локальная дата пользователя (по умолчанию дата сервера);
+    для all обе границы None - без ограничения.
+    """
+    today = today or date.today()
+    if period_type == "today":
+        return today, today
+    if period_type == "week":
+        # Неделя с понедельника по воскресенье
+        start_of_week = today - timedelta(days=today.weekday())
+        return start_of_week, start_of_week + timedelta(days=6)
+    if period_type == "month":
+        _, last_day = calendar.monthrange(today.year, today.month)
+        return date(today.year, today.month, 1), date(today.year, today.month, last_day)
+    return None, None
+
+
+class ExportBuffer(tempfile.SpooledTemporaryFile):
+    """
+    Файл экспорта в памяти (сверх порога - во временном файле на диске)
+    
+    `name` - имя файла для пользователя: его берёт send_file Telethon.
+    """
+    
+    def __init__(self, filename: str, max_size: int = SPOOL_THRESHOLD):
+        super().__init__(max_size=max_size, mode='w+b')
+        self._filename = filename
+    
+    @property
+    def name(self) -> str:
+        return self._filename
+    
+    @property
+    def spilled(self) -> bool:
+        """Содержимое ушло во временный файл на диске"""
+        return self._rolled
+
+
 class DiaryExportManager:
     """
     Класс для экспорта записей дневника в различные форматы
     """
     
-    def __init__(self, database_manager, export_dir: str = "data/exports"):
+    def __init__(self, database_manager, export_dir: str = "data/exports", cache=None,
+                 compression: Optional[str] = None, compress_threshold: int = COMPRESS_THRESHOLD,
+                 split: Optional[str] = None, split_threshold: int = SPLIT_THRESHOLD):
         """
         Инициализация менеджера экспорта
         
         Args:
             database_manager: Экземпляр DatabaseManager для доступа к записям
             export_dir: Директория для сохранения экспортированных файлов
+            cache: ExportCache - файлы именуются по ключу и переиспользуются
+                (директорией экспорта становится директория кэша)
+            compression: Сжатие по умолчанию: zip, gzip, zstd, auto
+                (zip сверх compress_threshold байт текста) или None
+            split: year или month - большие истории (сверх split_threshold
+                байт текста) отдаются zip-архивом по файлу на год/месяц
         """
         self.db_manager = database_manager
-        self.export_dir = export_dir
+        self.cache = cache
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self.split = split
+        self.split_threshold = split_threshold
+        self.export_dir = cache.directory if cache is not None else export_dir
         
         # Создаем директорию для экспорта, если она не существует
         os.makedirs(self.export_dir, exist_ok=True)
     
+    def _new_file(self, user_id: int, extension: str) -> Tuple[str, str]:
+        """Имя и путь нового файла экспорта (с отметкой времени)"""
+        now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"diary_export_{user_id}_{now_str}.{extension}"
+        return filename, os.path.join(self.export_dir, filename)
+
+    def write_markdown(self, out: TextIO, entries: Iterable[Dict], title: str = "Мой дневник",
+                       updated_at: Any = None) -> int:
+        """
+        Запись документа Markdown в поток по мере поступления записей
+        
+        Args:
+            out: Текстовый поток (файл, StringIO, обёртка над SpooledTemporaryFile)
+            entries: Записи в нужном порядке (список или курсор)
+            title: Заголовок документа
+            updated_at: Время последнего изменения записей (MAX(updated_at));
+                если задано, в заголовке оно вместо времени экспорта - так
+                файл из кэша не показывает устаревшее «Экспортировано»
+            
+        Returns:
+            int: Количество записанных записей
+        """
+        if updated_at is None:
+            stamp = f"Экспортировано: {datetime.now().strftime('%d.%m.%Y %H:%M')}"
+        else:
+            stamp = f"Последнее изменение: {_change_time(updated_at)}"
+        out.write(f"# {title}\n\n{stamp}\n\n")
+        count = 0
+        for entry in entries:
+            out.write(format_markdown_entry(entry))
+            count += 1
+        return count
+
+    def write_json_lines(self, out: TextIO, entries: Iterable[Dict]) -> int:
+        """JSON Lines: по объекту на строку, без общего документа в памяти"""
+        count = 0
+        for entry in entries:
+            out.write(_encode_json(entry_record(entry)) + "\n")
+            count += 1
+        return count
+
+    def write_json(self, out: TextIO, entries: Iterable[Dict]) -> int:
+        """JSON-массив, который пишется по элементу (валиден и для пустого периода)"""
+        out.write("[")
+        count = 0
+        for entry in entries:
+            out.write(",\n" if count else "\n")
+            out.write(_encode_json(entry_record(entry)))
+            count += 1
+        out.write("\n]\n" if count else "]\n")
+        return count
+
+    def write_csv(self, out: TextIO, entries: Iterable[Dict]) -> int:
+        """CSV с заголовком из EXPORT_COLUMNS"""
+        writer = csv.writer(out)
+        writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        for entry in entries:
+            record = entry_record(entry)
+            writer.writerow([record[column] for column in EXPORT_COLUMNS])
+            count += 1
+        return count
+
+    def write_entries(self, out: TextIO, entries: Iterable[Dict], export_format: str = DEFAULT_EXPORT_FORMAT,
+                      title: str = "Мой дневник", updated_at: Any = None) -> int:
+        """Запись в поток в выбранном формате; возвращает число записей"""
+        export_format = export_format_of(export_format)
+        if export_format == "json":
+            return self.write_json(out, entries)
+        if export_format == "jsonl":
+            return self.write_json_lines(out, entries)
+        if export_format == "csv":
+            return self.write_csv(out, entries)
+        return self.write_markdown(out, entries, title, updated_at)
+
     def export_markdown(self, user_id: int, entries: List[Dict], 
                        title: str = "Мой дневник") -> Tuple[str, str]:
         """
-        Экспорт записей в формате Markdown
+        Экспорт готового списка записей в формате Markdown
         
         Args:
             user_id: ID пользователя
@@ -49,85 +276,236 @@ class DiaryExportManager:
             logger.warning(f"Нет записей для экспорта в Markdown для пользователя {user_id}")
             return "", ""
         
+        # Сортируем записи по дате (от новых к старым)
+        sorted_entries = sorted(entries, key=lambda x: _entry_date(x), reverse=True)
         try:
-            # Сортируем записи по дате (от новых к старым)
-            sorted_entries = sorted(entries, key=lambda x: x.get('entry_date'), reverse=True)
-            
-            # Форматируем текущую дату для имени файла
-            now_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"diary_export_{user_id}_{now_str}.md"
-            filepath = os.path.join(self.export_dir, filename)
-            
-            # Создаем содержимое Markdown файла
-            content = f"# {title}\n\n"
-            content += f"Экспортировано: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-            
-            # Добавляем каждую запись
-            for entry in sorted_entries:
-                # Обрабатываем дату записи
-                entry_date = entry.get('entry_date')
-                if isinstance(entry_date, str):
-                    entry_date = datetime.fromisoformat(entry_date).date()
-                
-                date_formatted = entry_date.strftime("%d.%m.%Y")
-                
-                # Получаем данные из записи
-                mood = entry.get("mood") or "Не указано"
-                weather = entry.get("weather") or "Не указано"
-                location = entry.get("location") or "Не указано"
-                events = entry.get("events") or "Не указано"
-                additional_notes = entry.get("additional_notes") or ""
-                
-                # Форматируем запись в Markdown
-                content += f"## Запись от {date_formatted}\n\n"
-                content += f"### Настроение\n{mood}\n\n"
-                content += f"### Погода\n{weather}\n\n"
-                content += f"### Местоположение\n{location}\n\n"
-                content += f"### События дня\n{events}\n\n"
-                
-                if additional_notes:
-                    content += f"### Дополнительные заметки\n{additional_notes}\n\n"
-                
-                content += "---\n\n"  # Разделитель между записями
-            
-            # Записываем в файл
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            logger.info(f"Экспорт в Markdown успешно создан: {filepath}")
+            filename, _ = self._new_file(user_id, "md")
+            filename, filepath, _ = self._write_file(
+                filename, lambda raw: self._write_text(raw, sorted_entries, "markdown", title)
+            )
             return filename, filepath
-        
         except Exception as e:
             logger.error(f"Ошибка при экспорте в Markdown: {e}")
             return "", ""
+
+    def export_period_markdown(self, user_id: int, start_date: Optional[date] = None,
+                               end_date: Optional[date] = None,
+                               title: str = "Мой дневник") -> Tuple[str, str, int]:
+        """Потоковый экспорт записей за период в Markdown (см. export_period)"""
+        return self.export_period(user_id, start_date, end_date, "markdown", title)
+
+    def export_period(self, user_id: int, start_date: Optional[date] = None,
+                      end_date: Optional[date] = None, export_format: str = DEFAULT_EXPORT_FORMAT,
+                      title: str = "Мой дневник",
+                      progress: Optional[Callable[[int], None]] = None,
+                      compression: Optional[str] = None,
+                      split: Optional[str] = None) -> Tuple[str, str, int]:
+        """
+        Потоковый экспорт записей за период в выбранном формате
+        
+        Записи читаются курсором (от новых к старым) и сразу пишутся в
+        буферизованный файл: память не растёт с числом записей.
+        
+        Args:
+            user_id: ID пользователя
+            start_date: Начало периода (None - с первой записи)
+            end_date: Конец периода (None - до последней записи)
+            export_format: markdown, json, jsonl или csv (прочее - markdown)
+            title: Заголовок документа (только для Markdown)
+            progress: Вызывается с числом записей по мере записи; исключение
+                из него прерывает экспорт (так работает отмена)
+            compression: zip, gzip, zstd, auto или none (None - настройка менеджера)
+            split: year или month - zip-архив по файлу на год/месяц,
+                none - одним файлом (None - настройка менеджера)
+            
+        Returns:
+            Tuple[str, str, int]: (имя файла, путь к файлу, число записей);
+            без записей - ("", "", 0)
+            
+        Raises:
+            OSError, sqlite3.Error: ошибка чтения или записи (файл удаляется)
+        """
+        export_format = export_format_of(export_format)
+        compression, split = self._packaging(user_id, start_date, end_date, compression, split)
+        extension = EXPORT_EXTENSIONS[export_format]
+        filename = updated_at = None
+        if self.cache is not None:
+            # неизменившийся период отдаётся готовым файлом
+            version = self.db_manager.get_entries_version(user_id, start_date, end_date)
+            if not version[0]:
+                logger.info(f"Нет записей для экспорта ({export_format}) для пользователя {user_id}")
+                return "", "", 0
+            filename = archive_filename(
+                self.cache.filename(user_id, start_date, end_date, extension, (*version, split or ""),
+                                    title if export_format == "markdown" else ""),
+                compression,
+            )
+            filepath = self.cache.lookup(filename)
+            if filepath is not None:
+                logger.info(f"Экспорт из кэша: {filepath} ({version[0]} записей)")
+                return filename, filepath, version[0]
+            # в кэшируемом файле нет времени экспорта: оно устарело бы при попадании
+            updated_at = version[1] or ""
+        entries, source = self._entry_source(user_id, start_date, end_date, progress)
+        try:
+            if source is None:
+                logger.info(f"Нет записей для экспорта ({export_format}) для пользователя {user_id}")
+                return "", "", 0
+            if filename is None:
+                filename, _ = self._new_file(user_id, extension)
+                filename = archive_filename(filename, compression)
+            return self._write_file(
+                filename,
+                lambda raw: self._write_package(raw, source, export_format, title, filename, compression, split,
+                                                updated_at),
+            )
+        finally:
+            entries.close()
+
+    def export_period_buffer(self, user_id: int, start_date: Optional[date] = None,
+                             end_date: Optional[date] = None, export_format: str = DEFAULT_EXPORT_FORMAT,
+                             title: str = "Мой дневник", progress: Optional[Callable[[int], None]] = None,
+                             compression: Optional[str] = None, split: Optional[str] = None,
+                             spool_threshold: int = SPOOL_THRESHOLD) -> Tuple[str, Optional[ExportBuffer], int]:
+        """
+        Потоковый экспорт за период в буфер вместо файла в директории экспорта
+        
+        До `spool_threshold` байт документ остаётся в памяти, больше - уходит во
+        временный файл, который удаляется при закрытии буфера. Аргументы - как
+        у export_period.
+        
+        Returns:
+            Tuple[str, ExportBuffer, int]: (имя файла, буфер в начале, число записей);
+            без записей - ("", None, 0). Буфер закрывает вызывающий.
+        """
+        export_format = export_format_of(export_format)
+        compression, split = self._packaging(user_id, start_date, end_date, compression, split)
+        entries, source = self._entry_source(user_id, start_date, end_date, progress)
+        try:
+            if source is None:
+                logger.info(f"Нет записей для экспорта ({export_format}) для пользователя {user_id}")
+                return "", None, 0
+            filename, _ = self._new_file(user_id, EXPORT_EXTENSIONS[export_format])
+            filename = archive_filename(filename, compression)
+            buffer = ExportBuffer(filename, spool_threshold)
+            try:
+                count = self._write_package(buffer, source, export_format, title, filename, compression, split)
+            except BaseException:
+                buffer.close()
+                raise
+        finally:
+            entries.close()
+        size = buffer.tell()
+        buffer.seek(0)
+        logger.info(f"Экспорт собран {'во временном файле' if buffer.spilled else 'в памяти'}: "
+                    f"{filename} ({count} записей, {size} байт)")
+        return filename, buffer, count
+
+    def _packaging(self, user_id: int, start_date: Optional[date], end_date: Optional[date],
+                   compression: Optional[str], split: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Сжатие и разбиение для экспорта: явные значения или настройки менеджера
+        
+        auto и разбиение из настроек выбираются по оценке размера текста
+        записей (один запрос по индексу): больше compress_threshold - zip,
+        больше split_threshold - zip с файлом на год/месяц.
+        """
+        # явное разбиение - всегда, из настроек - только для больших историй
+        by_size = split is None
+        split = self.split if by_size else split
+        split = split if split in SPLITS else None
+        compression = self.compression if compression is None else compression
+        if compression == "auto" or (split and by_size):
+            _, size = self.db_manager.get_entries_size(user_id, start_date, end_date)
+            if split and by_size and size <= self.split_threshold:
+                split = None
+            if compression == "auto":
+                compression = "zip" if size > self.compress_threshold else None
+        if split:
+            # несколько файлов - только в zip
+            return "zip", split
+        return resolve_compression(compression), None
+
+    def _write_package(self, raw: BinaryIO, entries: Iterable[Dict], export_format: str, title: str,
+                       filename: str, compression: Optional[str], split: Optional[str],
+                       updated_at: Any = None) -> int:
+        """Записи в двоичный поток: как есть, сжатыми или zip-архивом по годам/месяцам"""
+        # имя документа внутри архива: diary.zip -> diary.md, diary.md.gz -> diary.md
+        stem = filename.rsplit(".", 1)[0] if compression else filename
+        if compression == "zip":
+            stem = f"{stem}.{EXPORT_EXTENSIONS[export_format]}"
+        if not split:
+            with compressed(raw, compression, stem) as out:
+                return self._write_text(out, entries, export_format, title, updated_at)
+        base, extension = stem.rsplit(".", 1)
+        count = 0
+        with zipfile.ZipFile(raw, "w", zipfile.ZIP_DEFLATED) as archive:
+            # курсор отсортирован по дате: записи года/месяца идут подряд
+            for part, group in groupby(entries, key=lambda entry: _split_key(entry, split)):
+                with archive.open(f"{base}_{part}.{extension}", "w") as out:
+                    count += self._write_text(out, group, export_format, f"{title} ({part})", updated_at)
+        return count
+
+    def _write_text(self, raw: BinaryIO, entries: Iterable[Dict], export_format: str, title: str,
+                    updated_at: Any = None) -> int:
+        """Текст документа в двоичный поток (UTF-8); поток остаётся открытым"""
+        out = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        try:
+            count = self.write_entries(out, entries, export_format, title, updated_at)
+            out.flush()
+        finally:
+            out.detach()
+        return count
+
+    def _entry_source(self, user_id: int, start_date: Optional[date], end_date: Optional[date],
+                      progress: Optional[Callable[[int], None]]) -> Tuple[Iterator[Dict], Optional[Iterator[Dict]]]:
+        """Курсор записей периода (закрывает вызывающий) и источник для записи; None - записей нет"""
+        entries = self.db_manager.iter_entries(user_id, start_date, end_date, columns=EXPORT_COLUMNS)
+        first = next(entries, None)
+        if first is None:
+            return entries, None
+        source = chain((first,), entries)
+        if progress is not None:
+            source = _tracked(source, progress)
+        return entries, source
+
+    def count_period(self, user_id: int, start_date: Optional[date] = None,
+                     end_date: Optional[date] = None) -> int:
+        """Число записей за период (для прогресса экспорта)"""
+        return self.db_manager.count_entries(user_id, start_date, end_date)
+
+    def _write_file(self, filename: str, writer: Callable[[BinaryIO], int]) -> Tuple[str, str, int]:
+        """
+        Создать файл экспорта и заполнить его функцией `writer(raw) -> число записей`
+        
+        Файл пишется под временным именем и переименовывается целиком, так что
+        под итоговым именем (в том числе в кэше) лежат только дописанные файлы.
+        """
+        filepath = os.path.join(self.export_dir, filename)
+        partial = filepath + PARTIAL_SUFFIX
+        try:
+            with open(partial, 'wb', buffering=WRITE_BUFFER) as f:
+                count = writer(f)
+            os.replace(partial, filepath)
+        except BaseException:
+            # недописанный файл не оставляем
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        logger.info(f"Экспорт успешно создан: {filepath} ({count} записей)")
+        return filename, filepath, count
     
-    def get_today_entries(self, user_id: int) -> List[Dict]:
+    def get_today_entries(self, user_id: int, today: Optional[date] = None) -> List[Dict]:
         """Получение записей за сегодня"""
-        today = date.today()
-        return self.db_manager.get_entries_by_period(user_id, today, today)
+        return self.db_manager.get_entries_by_period(user_id, *period_bounds("today", today))
     
-    def get_week_entries(self, user_id: int) -> List[Dict]:
+    def get_week_entries(self, user_id: int, today: Optional[date] = None) -> List[Dict]:
         """Получение записей за текущую неделю"""
-        today = date.today()
-        # Получаем номер дня недели (0 - понедельник, 6 - воскресенье)
-        weekday = today.weekday()
-        # Начало недели (понедельник)
-        start_of_week = today - timedelta(days=weekday)
-        # Конец недели (воскресенье)
-        end_of_week = start_of_week + timedelta(days=6)
-        
-        return self.db_manager.get_entries_by_period(user_id, start_of_week, end_of_week)
+        return self.db_manager.get_entries_by_period(user_id, *period_bounds("week", today))
     
-    def get_month_entries(self, user_id: int) -> List[Dict]:
+    def get_month_entries(self, user_id: int, today: Optional[date] = None) -> List[Dict]:
         """Получение записей за текущий месяц"""
-        today = date.today()
-        # Первый день месяца
-        start_of_month = date(today.year, today.month, 1)
-        # Последний день месяца
-        _, last_day = calendar.monthrange(today.year, today.month)
-        end_of_month = date(today.year, today.month, last_day)
-        
-        return self.db_manager.get_entries_by_period(user_id, start_of_month, end_of_month)
+        return self.db_manager.get_entries_by_period(user_id, *period_bounds("month", today))
     
     def get_all_entries(self, user_id: int) -> List[Dict]:
         """Получение всех записей пользователя"""
@@ -33,6 +33,7 @@ class ExportFormat(str, Enum):
     """Форматы экспорта"""
     MARKDOWN = "markdown"
     JSON = "json"
+    JSONL = "jsonl"
     CSV = "csv"
     PDF = "pdf"
 
@@ -0,0 +1,7 @@
+"""
+Часовые пояса пользователей: кэш ZoneInfo, смещения и локальные даты
+"""
+
+from .service import DEFAULT_TIMEZONE, TimezoneService, get_timezone_service, get_zone
+
+__all__ = ['DEFAULT_TIMEZONE', 'TimezoneService', 'get_timezone_service', 'get_zone']
@@ -0,0 +1,126 @@
+"""
+Сервис часовых поясов.
+
+`ZoneInfo` создаётся один раз на имя пояса, а смещение от UTC кэшируется до
+ближайшего перехода (летнее/зимнее время), поэтому локальная дата
+пользователя — это сложение с кэшированным смещением, без обращения к tzdata
+на каждый вызов. Пакетные методы отвечают сразу для многих поясов: локальные
+даты для рассылок и пояса, в которых только что наступили новые сутки.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = "Europe/Moscow"
+
+# дальше этого следующий переход не ищем (пояса без DST перепроверяются раз в год)
+TRANSITION_HORIZON = timedelta(days=366)
+
+
+@lru_cache(maxsize=1024)
+def get_zone(tz_name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo по имени; неизвестный или пустой пояс — пояс по умолчанию"""
+    try:
+        return ZoneInfo(tz_name or DEFAULT_TIMEZONE)
+    except Exception:
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def _utc(now: Optional[datetime]) -> datetime:
+    return datetime.now(timezone.utc) if now is None else now.astimezone(timezone.utc)
+
+
+def _offset_at(zone: ZoneInfo, moment: datetime) -> timedelta:
+    return moment.astimezone(zone).utcoffset()
+
+
+def next_transition(zone: ZoneInfo, start: datetime) -> datetime:
+    """Первая минута после `start` (UTC), когда у пояса меняется смещение.
+
+    Поиск по дням, затем бисекция до минуты; без перехода в пределах
+    TRANSITION_HORIZON возвращается `start + TRANSITION_HORIZON`.
+    """
+    start = start.replace(second=0, microsecond=0)
+    offset = _offset_at(zone, start)
+    low = 0  # минуты от start: на low смещение прежнее, на high — новое
+    for day in range(1, TRANSITION_HORIZON.days + 1):
+        high = day * 24 * 60
+        if _offset_at(zone, start + timedelta(minutes=high)) != offset:
+            break
+        low = high
+    else:
+        return start + TRANSITION_HORIZON
+    while high - low > 1:
+        middle = (low + high) // 2
+        if _offset_at(zone, start + timedelta(minutes=middle)) == offset:
+            low = middle
+        else:
+            high = middle
+    return start + timedelta(minutes=high)
+
+
+class TimezoneService:
+    """Смещения поясов с кэшем до ближайшего перехода и локальные даты."""
+
+    def __init__(self) -> None:
+        # пояс -> (с какого момента, до какого момента, смещение)
+        self._offsets: Dict[str, Tuple[datetime, datetime, timedelta]] = {}
+
+    def zone(self, tz_name: Optional[str]) -> ZoneInfo:
+        return get_zone(tz_name)
+
+    def offset(self, tz_name: Optional[str], now: Optional[datetime] = None) -> timedelta:
+        """Смещение пояса от UTC в момент `now` (по умолчанию сейчас)."""
+        now = _utc(now)
+        key = tz_name or DEFAULT_TIMEZONE
+        cached = self._offsets.get(key)
+        if cached is None or not cached[0] <= now < cached[1]:
+            zone = get_zone(key)
+            start = now.replace(second=0, microsecond=0)
+            cached = (start, next_transition(zone, start), _offset_at(zone, start))
+            self._offsets[key] = cached
+        return cached[2]
+
+    def offset_minutes(self, tz_name: Optional[str], now: Optional[datetime] = None) -> int:
+        return int(self.offset(tz_name, now).total_seconds()) // 60
+
+    def local_date(self, tz_name: Optional[str], now: Optional[datetime] = None) -> date:
+        """Локальная дата в поясе в момент `now` (по умолчанию сейчас)."""
+        now = _utc(now)
+        return (now + self.offset(tz_name, now)).date()
+
+    def local_dates(self, tz_names: Iterable[Optional[str]],
+                    now: Optional[datetime] = None) -> Dict[Optional[str], date]:
+        """Локальные даты для набора поясов (каждый пояс считается один раз)."""
+        now = _utc(now)
+        return {tz_name: self.local_date(tz_name, now) for tz_name in set(tz_names)}
+
+    def rolled_over(self, tz_names: Iterable[Optional[str]], since: datetime,
+                    now: Optional[datetime] = None) -> List[Optional[str]]:
+        """Пояса, в которых между `since` и `now` сменилась локальная дата."""
+        now = _utc(now)
+        since = _utc(since)
+        return [tz_name for tz_name in set(tz_names)
+                if self.local_date(tz_name, since) != self.local_date(tz_name, now)]
+
+    def users_rolled_over(self, db: Any, since: datetime, now: Optional[datetime] = None) -> List[Dict]:
+        """Пользователи, у которых между `since` и `now` наступили новые сутки.
+
+        `db` — DatabaseManager: пояса берутся по индексу, пользователи — только
+        из поясов, где сменилась дата.
+        """
+        zones = self.rolled_over(db.get_user_timezones(), since, now)
+        return db.get_users_by_timezones(zones) if zones else []
+
+
+_service: Optional[TimezoneService] = None
+
+
+def get_timezone_service() -> TimezoneService:
+    """Общий экземпляр сервиса (кэш смещений один на процесс)."""
+    global _service
+    if _service is None:
+        _service = TimezoneService()
+    return _service
@@ -34,16 +34,16 @@ if not os.path.exists(db_path):
 
     # Локализованный логгер, если возможно
     try:
-        from bot.tlgbotcore.i18n import I18n
-        i18n = I18n(locales_path="bot/locales", default_lang=getattr(config_tlg, "DEFAULT_LANG", "ru"))
+        from bot.tlgbotcore.i18n import get_i18n
+        i18n = get_i18n(locales_path="bot/locales", default_lang=getattr(config_tlg, "DEFAULT_LANG", "ru"))
         msg = i18n.t("db_diary_initialized", lang=getattr(config_tlg, "DEFAULT_LANG", "ru"), path=db_path)
     except Exception:
         msg = f"Инициализирована БД дневника: {db_path}"
     logger.info(msg)
 else:
     try:
-        from bot.tlgbotcore.i18n import I18n
-        i18n = I18n(locales_path="bot/locales", default_lang=getattr(config_tlg, "DEFAULT_LANG", "ru"))
+        from bot.tlgbotcore.i18n import get_i18n
+        i18n = get_i18n(locales_path="bot/locales", default_lang=getattr(config_tlg, "DEFAULT_LANG", "ru"))
         msg = i18n.t("db_diary_exists", lang=getattr(config_tlg, "DEFAULT_LANG", "ru"), path=db_path)
     except Exception:
         msg = f"БД дневника уже существует: {db_path}"
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Сборка бинарного бандла локалей: bot/locales/*.json -> bot/locales/locales.bundle
+
+Запускать после правки переводов (и при сборке образа). Пока бандл не
+пересобран, бот замечает, что JSON новее, и читает JSON.
+
+    python scripts/build_locales.py [--locales bot/locales] [--default-lang ru]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bot.tlgbotcore.i18n import build_bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка бинарного бандла локалей")
+    parser.add_argument('--locales', default='bot/locales', help="каталог с *.json")
+    parser.add_argument('--default-lang', default=None, help="язык по умолчанию (DEFAULT_LANG из конфига)")
+    parser.add_argument('--output', default=None, help="путь бандла (по умолчанию <locales>/locales.bundle)")
+    args = parser.parse_args()
+
+    default_lang = args.default_lang
+    if default_lang is None:
+        try:
+            from cfg import config_tlg
+            default_lang = getattr(config_tlg, 'DEFAULT_LANG', 'ru')
+        except ImportError:
+            default_lang = 'ru'
+    path = build_bundle(args.locales, default_lang, args.output)
+    print(f"Бандл локалей: {path} ({path.stat().st_size} байт, язык по умолчанию {default_lang})")
+
+
+if __name__ == '__main__':
+    main()
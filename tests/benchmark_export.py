@@ -0,0 +1,133 @@
+"""
+Бенчмарк экспорта дневника: прежний Markdown (список записей, сортировка и
+сборка документа через `content += ...`) против потоковой записи курсором
+в файл и в буфер в памяти, затем пропускная способность потоковых форматов
+(Markdown, JSON, JSON Lines, CSV) и сжатия (gzip, zip, zstd, zip по годам)
+на большой истории. Записи синтетические и однообразные, поэтому степень
+сжатия завышена; время сравнимо.
+
+База и файлы создаются во временном каталоге; по умолчанию десять лет
+ежедневных записей для сравнения с прежним экспортом и 100 000 записей для
+сравнения форматов.
+
+    python -m tests.benchmark_export [--entries 3650] [--format-entries 100000] [--repeat 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from core.database.manager import DatabaseManager
+from core.export.manager import EXPORT_EXTENSIONS, DiaryExportManager
+
+START = date(2016, 1, 1)
+
+
+def populate(db, user_id, entries):
+    db.create_user(user_id)
+    with db.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO diary_entries (user_id, entry_date, mood, weather, location, events, additional_notes) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(user_id, START + timedelta(days=i), 'Хорошо', 'Солнечно', 'Казань',
+              f'Запись {i}: ' + 'события дня ' * 20, 'заметка' if i % 3 == 0 else None)
+             for i in range(entries)],
+        )
+        conn.commit()
+
+
+def legacy_export(db, export_dir, user_id, title):
+    """Прежний export_markdown вместе с get_all_entries (MIN/MAX и список записей)."""
+    with db.get_connection() as conn:
+        row = conn.execute('SELECT MIN(entry_date) AS min_date, MAX(entry_date) AS max_date '
+                           'FROM diary_entries WHERE user_id = ?', (user_id,)).fetchone()
+    entries = db.get_entries_by_period(user_id, row['min_date'], row['max_date'])
+    sorted_entries = sorted(entries, key=lambda x: x.get('entry_date'), reverse=True)
+    filepath = os.path.join(export_dir, f"legacy_{user_id}.md")
+    content = f"# {title}\n\n"
+    content += f"Экспортировано: {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
+    for entry in sorted_entries:
+        entry_date = entry.get('entry_date')
+        if isinstance(entry_date, str):
+            entry_date = datetime.fromisoformat(entry_date).date()
+        content += f"## Запись от {entry_date.strftime('%d.%m.%Y')}\n\n"
+        content += f"### Настроение\n{entry.get('mood') or 'Не указано'}\n\n"
+        content += f"### Погода\n{entry.get('weather') or 'Не указано'}\n\n"
+        content += f"### Местоположение\n{entry.get('location') or 'Не указано'}\n\n"
+        content += f"### События дня\n{entry.get('events') or 'Не указано'}\n\n"
+        if entry.get('additional_notes'):
+            content += f"### Дополнительные заметки\n{entry.get('additional_notes')}\n\n"
+        content += "---\n\n"
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return filepath
+
+
+def measure(func, repeat):
+    func()  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--entries', type=int, default=3650)
+    parser.add_argument('--format-entries', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, 'diary.db'))
+        populate(db, 1, args.entries)
+        manager = DiaryExportManager(db, export_dir=os.path.join(tmp, 'exports'))
+
+        legacy_time, legacy_peak = measure(lambda: legacy_export(db, manager.export_dir, 1, 'Дневник'), args.repeat)
+        stream_time, stream_peak = measure(lambda: manager.export_period_markdown(1, title='Дневник'), args.repeat)
+        size = os.path.getsize(manager.export_period_markdown(1, title='Дневник')[1])
+
+        def to_memory():
+            manager.export_period_buffer(1, title='Дневник')[1].close()
+        memory_time, memory_peak = measure(to_memory, args.repeat)
+
+        populate(db, 2, args.format_entries)
+        formats = []
+        for export_format in EXPORT_EXTENSIONS:
+            elapsed, peak = measure(lambda: manager.export_period(2, export_format=export_format), 1)
+            path = manager.export_period(2, export_format=export_format)[1]
+            formats.append((export_format, elapsed, peak, os.path.getsize(path)))
+
+        packages = []
+        for compression in ('none', 'gzip', 'zip', 'zstd'):
+            elapsed, _ = measure(lambda: manager.export_period(2, compression=compression), 1)
+            filename, path, _ = manager.export_period(2, compression=compression)
+            packages.append((filename.split('.', 1)[1], elapsed, os.path.getsize(path)))
+        elapsed, _ = measure(lambda: manager.export_period(2, split='year'), 1)
+        packages.append(('zip по годам', elapsed, os.path.getsize(manager.export_period(2, split='year')[1])))
+
+    print(f"записей: {args.entries}, размер документа: {size / 1024:.0f} КБ")
+    print(f"было:  {legacy_time * 1000:.1f} мс, пик памяти {legacy_peak / 1024:.0f} КБ")
+    print(f"стало: {stream_time * 1000:.1f} мс, пик памяти {stream_peak / 1024:.0f} КБ "
+          f"(x{legacy_time / stream_time:.2f})")
+    print(f"в памяти: {memory_time * 1000:.1f} мс, пик памяти {memory_peak / 1024:.0f} КБ "
+          f"(документ в буфере, без файла в каталоге экспорта)")
+    print(f"\nформаты, записей: {args.format_entries}")
+    for export_format, elapsed, peak, format_size in formats:
+        print(f"{export_format:>8}: {elapsed * 1000:7.0f} мс, {args.format_entries / elapsed:9.0f} записей/с, "
+              f"{format_size / 1024 / 1024:6.1f} МБ, пик памяти {peak / 1024:.0f} КБ")
+    print(f"\nсжатие Markdown, записей: {args.format_entries}")
+    for name, elapsed, package_size in packages:
+        print(f"{name:>13}: {elapsed * 1000:7.0f} мс, {package_size / 1024 / 1024:6.1f} МБ")
+
+
+if __name__ == '__main__':
+    main()
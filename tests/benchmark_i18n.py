@@ -0,0 +1,76 @@
+"""
+Микробенчмарк I18n.t: отрисовка просмотра периода из 100 записей.
+
+Повторяет вызовы переводов из display_period_entries/display_entry
+(заголовок + 9 вызовов t() на запись) и сравнивает прежнюю реализацию
+с компилированным каталогом.
+
+    python -m tests.benchmark_i18n [--entries 100] [--repeat 200]
+"""
+
+import argparse
+import time
+from datetime import date, timedelta
+
+from bot.tlgbotcore.i18n import I18n
+from tests.test_i18n import legacy_t
+
+
+def make_entries(count):
+    start = date(2026, 1, 1)
+    return [{
+        'entry_date': start + timedelta(days=n),
+        'mood': 'хорошее' if n % 3 else None,
+        'weather': 'солнечно',
+        'location': None if n % 2 else 'дом',
+        'events': f'событие {n}',
+    } for n in range(count)]
+
+
+def render_period(t, entries, lang):
+    """Тексты сообщений так же, как их собирает плагин view."""
+    messages = [t('entries_for_period', lang=lang, period='неделю')]
+    for entry in entries:
+        date_formatted = entry['entry_date'].strftime("%d.%m.%Y")
+        mood = entry.get("mood") or t('not_specified', lang=lang)
+        weather = entry.get("weather") or t('not_specified', lang=lang)
+        location = entry.get("location") or t('not_specified', lang=lang)
+        events = entry.get("events") or t('not_specified', lang=lang)
+        message = t('entry_header', lang=lang, date=date_formatted) + "\n\n"
+        message += t('entry_mood', lang=lang, mood=mood) + "\n"
+        message += t('entry_weather', lang=lang, weather=weather) + "\n"
+        message += t('entry_location', lang=lang, location=location) + "\n"
+        message += t('entry_events', lang=lang, events=events) + "\n"
+        messages.append(message)
+    return messages
+
+
+def measure(t, entries, lang, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render_period(t, entries, lang)
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--entries', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    i18n = I18n(locales_path='bot/locales', default_lang='ru')
+    entries = make_entries(args.entries)
+
+    def legacy(key, lang=None, **kwargs):
+        return legacy_t(i18n.locales, i18n.default_lang, key, lang, **kwargs)
+
+    for lang in ('ru', 'tt'):
+        assert render_period(legacy, entries, lang) == render_period(i18n.t, entries, lang)
+        old = measure(legacy, entries, lang, args.repeat)
+        new = measure(i18n.t, entries, lang, args.repeat)
+        print(f"{lang}: {args.entries} записей — было {old * 1000:.3f} мс, "
+              f"стало {new * 1000:.3f} мс (x{old / new:.2f})")
+
+
+if __name__ == '__main__':
+    main()
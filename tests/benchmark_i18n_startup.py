@@ -0,0 +1,53 @@
+"""
+Бенчмарк старта I18n: разбор всех JSON-локалей против одного чтения бандла.
+
+Бандл собирается во временный файл, рабочие локали не трогаются.
+
+    python -m tests.benchmark_i18n_startup [--repeat 50]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from bot.tlgbotcore.i18n import I18n, build_bundle
+
+
+def measure(factory, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        factory()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--locales', default='bot/locales')
+    parser.add_argument('--default-lang', default='ru')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = build_bundle(args.locales, args.default_lang, Path(tmp) / 'locales.bundle')
+
+        def from_json():
+            return I18n(args.locales, args.default_lang, use_bundle=False)
+
+        def from_bundle():
+            return I18n(args.locales, args.default_lang, bundle_path=bundle)
+
+        assert from_bundle().locales == from_json().locales
+        json_time = measure(from_json, args.repeat)
+        bundle_time = measure(from_bundle, args.repeat)
+
+    files = len(list(Path(args.locales).glob('*.json')))
+    print(f"JSON ({files} файлов): {json_time * 1000:.2f} мс, "
+          f"бандл: {bundle_time * 1000:.2f} мс (x{json_time / bundle_time:.2f})")
+    # run_bot.py и _main_async раньше создавали I18n дважды
+    print(f"старт бота: было 2 × JSON = {2 * json_time * 1000:.2f} мс, "
+          f"стало 1 × бандл = {bundle_time * 1000:.2f} мс")
+
+
+if __name__ == '__main__':
+    main()
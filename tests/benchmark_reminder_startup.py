@@ -0,0 +1,103 @@
+"""
+Бенчмарк старта напоминаний на большой базе (по умолчанию 100 000 пользователей).
+
+Сравнивается прежний старт (каждому пользователю `db.get_user` и задача
+планировщика; замер на выборке, результат пересчитан на всю базу) с
+`ReminderEngine.restore`: первый запуск, перезапуск без изменений и
+перезапуск после смены смещения одного пояса. База создаётся во временном
+каталоге.
+
+    python -m tests.benchmark_reminder_startup [--users 100000] [--legacy-sample 5000]
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from bot.reminders.engine import STATE_KEY, ReminderEngine
+from core.database.manager import DatabaseManager
+
+ZONES = ['Europe/Moscow', 'Europe/Samara', 'Asia/Yekaterinburg', 'Europe/Berlin',
+         'America/New_York', 'Asia/Tokyo', 'UTC', None]
+
+
+def populate(db, users):
+    rnd = random.Random(1)
+    with db.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO users (user_id, language_code, timezone) VALUES (?, ?, ?)',
+            [(user_id, rnd.choice(['ru', 'en', 'tt']), rnd.choice(ZONES)) for user_id in range(1, users + 1)],
+        )
+        conn.executemany(
+            'INSERT INTO user_settings (user_id, reminder_time) VALUES (?, ?)',
+            [(user_id, f"{rnd.randrange(24):02d}:{rnd.randrange(0, 60, 5):02d}")
+             for user_id in range(1, users + 1)],
+        )
+        conn.commit()
+
+
+def measure(func):
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def legacy_start(db, sample):
+    """Прежний load_reminder_jobs: выборка всех, затем get_user и add_job на каждого."""
+    scheduler = AsyncIOScheduler(timezone='UTC')
+    users = db.get_users_with_reminders()
+    for row in users[:sample]:
+        user = db.get_user(row['user_id'])
+        hh, mm = (int(part) for part in row['reminder_time'].split(':'))
+        scheduler.add_job(print, 'cron', hour=hh, minute=mm, id=str(user['user_id']),
+                          replace_existing=True, timezone=user.get('timezone') or 'Europe/Moscow')
+    return len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--legacy-sample', type=int, default=5000)
+    args = parser.parse_args()
+
+    bot = SimpleNamespace()
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(str(Path(tmp) / 'diary.db'))
+        populate(db, args.users)
+
+        sample = min(args.legacy_sample, args.users)
+        legacy_time, total = measure(lambda: legacy_start(db, sample))
+        legacy_time = legacy_time * total / sample
+
+        cold_time, cold_rows = measure(lambda: ReminderEngine(bot, db).restore(now))
+        warm_time, warm_rows = measure(lambda: ReminderEngine(bot, db).restore(now))
+
+        # как будто минуты Нью-Йорка сохранены до перехода на другое смещение
+        state = json.loads(db.get_system_value(STATE_KEY))
+        state['offsets']['America/New_York'] += 60
+        db.set_system_value(STATE_KEY, json.dumps(state))
+        with db.get_connection() as conn:
+            conn.execute(
+                'UPDATE user_settings SET reminder_utc_minute = (reminder_utc_minute + 1380) % 1440 '
+                "WHERE user_id IN (SELECT user_id FROM users WHERE timezone = 'America/New_York')"
+            )
+            conn.commit()
+        dst_time, dst_rows = measure(lambda: ReminderEngine(bot, db).restore(now))
+
+    print(f"пользователей с напоминаниями: {total}")
+    print(f"было (get_user + add_job на каждого, по выборке {sample}): ~{legacy_time * 1000:.0f} мс")
+    print(f"первый запуск: {cold_time * 1000:.1f} мс, строк пересчитано: {cold_rows}")
+    print(f"перезапуск без изменений: {warm_time * 1000:.1f} мс, строк пересчитано: {warm_rows}")
+    print(f"перезапуск после смены смещения пояса: {dst_time * 1000:.1f} мс, строк пересчитано: {dst_rows}")
+
+
+if __name__ == '__main__':
+    main()
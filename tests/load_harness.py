@@ -0,0 +1,462 @@
+"""Нагрузочный прогон плагинов без Telegram.
+
+`FakeTlgBot` — настоящий `TlgBotCore` (плагины, фильтры, middleware,
+планировщик апдейтов, очередь исходящих), у которого вместо сети
+RPC-вызовы записываются и получают правдоподобный ответ. Синтетические
+пользователи параллельно проходят /start, мастер /today, /view и /export.
+В конце печатается отчёт: пропускная способность, p50/p95/p99 обработки
+апдейта, число запросов к БД на апдейт и прирост памяти.
+
+Запуск: python -m tests.load_harness --users 2000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import gc
+import io
+import itertools
+import logging
+import os
+import re
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import telethon
+from telethon.tl import functions, types
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.i18n import I18n
+from bot.tlgbotcore.models import Role, User
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+BOT_ID = 777000001
+FIRST_USER_ID = 10_000_000
+
+# сценарий одного пользователя: ('text', сообщение) или ('callback', data)
+SCENARIO: Tuple[Tuple[str, str], ...] = (
+    ('text', '/start'),
+    ('callback', 'tz:Europe/Moscow'),
+    ('text', '/today'),
+    ('callback', 'mood_good'),
+    ('callback', 'weather_sunny'),
+    ('callback', 'location_home'),
+    ('text', 'Гулял в парке, читал книгу'),
+    ('text', '/view'),
+    ('callback', 'view_period_week'),
+    ('text', '/export'),
+    ('callback', 'export_period_all'),
+)
+
+# лимиты Telegram в прогоне не мешают измерять сам бот (включаются --telegram-limits)
+UNLIMITED_OUTBOX = {'global_rate': 1e9, 'global_burst': 1e9, 'chat_rate': 1e9, 'chat_burst': 1e9}
+
+
+@dataclass
+class UpdateStats:
+    """Замеры одного апдейта."""
+
+    kind: str
+    queries: int = 0
+    handler: float = 0.0   # обработка в воркере
+    total: float = 0.0     # от постановки в очередь до конца обработки
+
+
+_current_stats: contextvars.ContextVar[Optional[UpdateStats]] = contextvars.ContextVar(
+    'load_harness_stats', default=None
+)
+
+
+def _count_query(statement: str) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.queries += 1
+
+
+@contextlib.contextmanager
+def count_db_queries(storage: Any = None) -> Iterator[None]:
+    """Считать SQL-запросы БД дневника (и хранилища настроек) в счётчик текущего апдейта."""
+    from core.database.manager import DatabaseManager
+
+    original = DatabaseManager.get_connection
+
+    @contextlib.contextmanager
+    def traced(self):
+        with original(self) as conn:
+            conn.set_trace_callback(_count_query)
+            yield conn
+
+    DatabaseManager.get_connection = traced
+    connection = getattr(storage, 'connect', None)
+    if isinstance(connection, sqlite3.Connection):
+        connection.set_trace_callback(_count_query)
+    try:
+        yield
+    finally:
+        DatabaseManager.get_connection = original
+        if isinstance(connection, sqlite3.Connection):
+            with contextlib.suppress(sqlite3.ProgrammingError):  # уже закрыто при остановке бота
+                connection.set_trace_callback(None)
+
+
+def update_kind(update: Any) -> str:
+    """Метка апдейта для отчёта: команда, `text` или префикс данных кнопки."""
+    if isinstance(update, types.UpdateBotCallbackQuery):
+        data = (update.data or b'').decode('utf-8', 'replace')
+        return 'cb:' + re.split(r'[_:]', data, maxsplit=1)[0]
+    text = getattr(getattr(update, 'message', None), 'message', '') or ''
+    return text.split()[0] if text.startswith('/') else 'text'
+
+
+class FakeTlgBot(TlgBotCore):
+    """TlgBotCore без сети: запросы к Telegram записываются, апдейты подаются вызовом `inject`."""
+
+    def __init__(self, session: str = 'loadtest', rpc_latency: float = 0.0, **kwargs: Any) -> None:
+        super().__init__(session, api_id=1, api_hash='x', **kwargs)
+        self._event_builders = hacks.ReverseList()
+        self.me = types.User(id=BOT_ID, bot=True, is_self=True, access_hash=1,
+                             first_name='daylog', username='daylog_load_bot')
+        self._mb_entity_cache.set_self_user(BOT_ID, True, 1)
+        self.rpc_latency = rpc_latency
+        self.api_calls: Counter = Counter()
+        # последние отправки по чатам: (метод, текст)
+        self.sent: Dict[int, Deque[Tuple[str, str]]] = defaultdict(lambda: deque(maxlen=32))
+        self.stats: List[UpdateStats] = []
+        self.shed = 0
+        self._ids = itertools.count(1)
+        self._waiters: Dict[int, Tuple[asyncio.Future, UpdateStats, float]] = {}
+
+        scheduler = self.update_scheduler
+        if scheduler is not None:
+            self._dispatch_inner = scheduler._handler
+            scheduler._handler = self._measured_dispatch
+            self._on_shed_inner = scheduler._on_shed
+            scheduler._on_shed = self._shed_update
+
+    # ------- Telegram
+    def add_user(self, user_id: int, first_name: str = '') -> None:
+        """Пользователь, известный «серверу»: его сущность есть в кэше, как после апдейта."""
+        self._mb_entity_cache.extend(
+            [types.User(id=user_id, access_hash=user_id, first_name=first_name or str(user_id))], []
+        )
+
+    async def _timed_call(self, method: str, sender: Any, request: Any, ordered: bool,
+                          flood_sleep_threshold: Optional[int]) -> Any:
+        self.api_calls[method] += 1
+        if self.rpc_latency:
+            await asyncio.sleep(self.rpc_latency)
+        peer = getattr(request, 'peer', None)
+        if peer is not None:
+            text = getattr(request, 'message', None) or type(getattr(request, 'media', None)).__name__
+            self.sent[getattr(peer, 'user_id', 0)].append((method, text or ''))
+        return self._fake_result(request)
+
+    def _fake_result(self, request: Any) -> Any:
+        """Ответ «сервера» в том виде, который Telethon разбирает в сообщение."""
+        now = datetime.now(timezone.utc)
+        if isinstance(request, functions.messages.SendMessageRequest):
+            return types.UpdateShortSentMessage(out=True, id=next(self._ids), pts=0, pts_count=0, date=now)
+        if isinstance(request, functions.messages.SendMediaRequest):
+            message = types.Message(id=next(self._ids), peer_id=telethon.utils.get_peer(request.peer),
+                                    date=now, message=request.message, out=True)
+            return types.Updates(updates=[
+                types.UpdateMessageID(id=message.id, random_id=request.random_id),
+                types.UpdateNewMessage(message=message, pts=0, pts_count=0),
+            ], users=[], chats=[], date=now, seq=0)
+        if isinstance(request, functions.messages.EditMessageRequest):
+            message = types.Message(id=request.id, peer_id=telethon.utils.get_peer(request.peer),
+                                    date=now, message=request.message or '', out=True)
+            return types.Updates(updates=[types.UpdateEditMessage(message=message, pts=0, pts_count=0)],
+                                 users=[], chats=[], date=now, seq=0)
+        if isinstance(request, functions.users.GetUsersRequest):
+            return [self.me if isinstance(u, types.InputUserSelf) else
+                    types.User(id=u.user_id, access_hash=u.access_hash, first_name=str(u.user_id))
+                    for u in request.id]
+        return True
+
+    # ------- апдейты
+    def new_message(self, user_id: int, text: str) -> types.UpdateNewMessage:
+        message = types.Message(id=next(self._ids), peer_id=types.PeerUser(user_id),
+                                date=datetime.now(timezone.utc), message=text, out=False)
+        return types.UpdateNewMessage(message=message, pts=0, pts_count=0)
+
+    def callback_query(self, user_id: int, data: str) -> types.UpdateBotCallbackQuery:
+        return types.UpdateBotCallbackQuery(query_id=next(self._ids), user_id=user_id,
+                                            peer=types.PeerUser(user_id), msg_id=next(self._ids),
+                                            chat_instance=user_id, data=data.encode('utf-8'))
+
+    async def inject(self, update: Any) -> UpdateStats:
+        """Подать апдейт как от Telegram и дождаться конца его обработки."""
+        stats = UpdateStats(update_kind(update))
+        update._entities = {}  # Telethon заполняет сущности апдейта при разборе ответа сервера
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[id(update)] = (future, stats, time.perf_counter())
+        await self._dispatch_update(update)
+        if self.update_scheduler is None:
+            self._waiters.pop(id(update), None)
+            future.set_result(stats)
+        return await future
+
+    async def _measured_dispatch(self, update: Any) -> None:
+        future, stats, enqueued = self._waiters.pop(id(update), (None, UpdateStats(update_kind(update)), 0.0))
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self._dispatch_inner(update)
+        finally:
+            _current_stats.reset(token)
+            finished = time.perf_counter()
+            stats.handler = finished - started
+            stats.total = finished - enqueued if enqueued else stats.handler
+            self.stats.append(stats)
+            if future is not None and not future.done():
+                future.set_result(stats)
+
+    def _shed_update(self, key: Any, update: Any) -> None:
+        self.shed += 1
+        if self._on_shed_inner is not None:
+            self._on_shed_inner(key, update)
+        waiter = self._waiters.pop(id(update), None)
+        if waiter is not None and not waiter[0].done():
+            waiter[0].set_result(waiter[1])
+
+
+@dataclass
+class LoadReport:
+    """Итог прогона."""
+
+    users: int
+    updates: int
+    elapsed: float
+    handler_p: Dict[str, float] = field(default_factory=dict)
+    total_p: Dict[str, float] = field(default_factory=dict)
+    queries_per_update: float = 0.0
+    queries_by_kind: Dict[str, float] = field(default_factory=dict)
+    api_calls: Dict[str, int] = field(default_factory=dict)
+    handler_errors: int = 0
+    shed: int = 0
+    memory_growth_mb: Optional[float] = None
+    entries_created: int = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.updates / self.elapsed if self.elapsed else 0.0
+
+    def format(self) -> str:
+        def ms(values: Dict[str, float]) -> str:
+            return ', '.join(f"{k}={v * 1000:.1f} мс" for k, v in values.items())
+
+        lines = [
+            f"Пользователей: {self.users}, апдейтов: {self.updates}, время: {self.elapsed:.2f} с",
+            f"Пропускная способность: {self.throughput:.0f} апдейтов/с",
+            f"Обработка апдейта: {ms(self.handler_p)}",
+            f"С ожиданием в очереди: {ms(self.total_p)}",
+            f"Запросов к БД на апдейт: {self.queries_per_update:.2f}",
+        ]
+        for kind, queries in sorted(self.queries_by_kind.items()):
+            lines.append(f"  {kind:<12} {queries:.2f}")
+        lines.append(f"Вызовы Telegram API: {dict(sorted(self.api_calls.items()))}")
+        lines.append(f"Ошибок в обработчиках: {self.handler_errors}, отброшено апдейтов: {self.shed}")
+        lines.append(f"Создано записей дневника: {self.entries_created}")
+        if self.memory_growth_mb is not None:
+            lines.append(f"Прирост памяти: {self.memory_growth_mb:.1f} МБ")
+        return '\n'.join(lines)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    if len(values) == 1:
+        return {'p50': values[0], 'p95': values[0], 'p99': values[0]}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def _handler_errors(bot: TlgBotCore) -> int:
+    calls = bot.metrics.get('tlgbot_handler_calls_total')
+    if calls is None:
+        return 0
+    return int(sum(v for labels, v in calls._values.items() if labels[-1] != 'ok'))
+
+
+@contextlib.contextmanager
+def diary_db_path(path: str) -> Iterator[None]:
+    """Временно направить плагины в БД `path`.
+
+    Плагины читают путь из конфига при каждом запросе, DiaryManager — при импорте модуля.
+    """
+    import cfg.config_tlg as config
+    import core.diary.manager as diary_module
+
+    saved = config.DAYLOG_DB_PATH, diary_module.DAYLOG_DB_PATH
+    config.DAYLOG_DB_PATH = diary_module.DAYLOG_DB_PATH = path
+    try:
+        yield
+    finally:
+        config.DAYLOG_DB_PATH, diary_module.DAYLOG_DB_PATH = saved
+
+
+@contextlib.contextmanager
+def isolated_menu_system() -> Iterator[None]:
+    """Вернуть глобальное состояние bot.menu_system после прогона (бот, роутер, реестр)."""
+    import bot.menu_system as menu_system
+
+    names = ('tlgbot', 'logger', '_MENU_ROUTER_ATTACHED')
+    saved = {name: getattr(menu_system, name) for name in names}
+    registry = list(menu_system.MENU_REGISTRY)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(menu_system, name, value)
+        menu_system.MENU_REGISTRY[:] = registry
+        menu_system.MENU_CACHE.clear()
+
+
+def build_bot(workdir: Path, users: int, workers: int = 16, rpc_latency: float = 0.0,
+              telegram_limits: bool = False) -> FakeTlgBot:
+    """Бот со всеми плагинами из bot/plugins_bot и отдельными БД в `workdir`."""
+    import cfg.config_tlg as config
+    from bot.tlgbotcore.sqliteutils.sqliteutils import SettingUser
+    from bot.tlgbotcore.shutdown import JOBS
+    from bot.user_context import resolve_user_context
+    from core.database.manager import DatabaseManager
+    from core.export.jobs import ExportJobQueue
+
+    diary_path = str(workdir / 'daylog.db')
+    storage = SettingUser(namedb=str(workdir / 'settings.db'))
+    bot = FakeTlgBot(
+        plugin_path=str(ROOT / 'bot' / 'plugins_bot'),
+        settings_storage=storage,
+        rpc_latency=rpc_latency,
+        outbox_settings=None if telegram_limits else dict(UNLIMITED_OUTBOX),
+        update_scheduler_settings={'workers': workers, 'max_pending': users * len(SCENARIO) + 100},
+    )
+    bot.i18n = I18n(locales_path=str(ROOT / 'bot' / 'locales'), default_lang=getattr(config, 'DEFAULT_LANG', 'ru'))
+    bot.diary_db = DatabaseManager(db_path=diary_path)
+    bot.user_context_resolver = lambda event: resolve_user_context(bot, event)
+    bot.export_jobs = ExportJobQueue(metrics=bot.metrics)
+    bot.shutdown.add_step('export_jobs', bot.export_jobs.shutdown, order=JOBS)
+    with contextlib.redirect_stdout(io.StringIO()):  # SettingUser.add_user печатает каждого
+        for n in range(users):
+            user_id = FIRST_USER_ID + n
+            storage.add_user(User(id=user_id, name=f'user{n}', active=True, role=Role.user, lang='ru'))
+            bot.add_user(user_id, f'user{n}')
+    return bot
+
+
+async def _user_session(bot: FakeTlgBot, user_id: int) -> None:
+    for kind, payload in SCENARIO:
+        if kind == 'text':
+            await bot.inject(bot.new_message(user_id, payload))
+        else:
+            await bot.inject(bot.callback_query(user_id, payload))
+
+
+def _rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+async def run_load(users: int = 1000, workers: int = 16, rpc_latency: float = 0.0,
+                   telegram_limits: bool = False, trace_memory: bool = False,
+                   workdir: Optional[Path] = None) -> LoadReport:
+    """Прогнать `users` синтетических пользователей по SCENARIO одновременно."""
+    with contextlib.ExitStack() as stack:
+        if workdir is None:
+            workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix='daylog_load_')))
+        cwd = os.getcwd()
+        os.chdir(workdir)  # сессия Telethon и файлы экспорта
+        stack.callback(os.chdir, cwd)
+        stack.enter_context(diary_db_path(str(workdir / 'daylog.db')))
+        stack.enter_context(isolated_menu_system())
+
+        bot = build_bot(workdir, users, workers=workers, rpc_latency=rpc_latency,
+                        telegram_limits=telegram_limits)
+        stack.enter_context(count_db_queries(bot.settings))
+        bot.load_plugin_from_file(ROOT / 'bot' / 'tlgbotcore' / '_core.py')
+        await bot.load_all_plugins()
+
+        gc.collect()
+        if trace_memory:
+            tracemalloc.start()
+        memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else _rss_mb()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_user_session(bot, FIRST_USER_ID + n) for n in range(users)))
+        await bot.export_jobs.join()  # файлы экспорта собираются в фоне
+        elapsed = time.perf_counter() - started
+
+        gc.collect()
+        if trace_memory:
+            memory_growth = (tracemalloc.get_traced_memory()[0] - memory_before) / (1024 * 1024)
+            tracemalloc.stop()
+        else:
+            after = _rss_mb()
+            memory_growth = after - memory_before if after is not None and memory_before is not None else None
+
+        by_kind: Dict[str, List[int]] = defaultdict(list)
+        for stats in bot.stats:
+            by_kind[stats.kind].append(stats.queries)
+        with bot.diary_db.get_connection() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM diary_entries').fetchone()[0]
+
+        report = LoadReport(
+            users=users,
+            updates=len(bot.stats),
+            elapsed=elapsed,
+            handler_p=_percentiles([s.handler for s in bot.stats]),
+            total_p=_percentiles([s.total for s in bot.stats]),
+            queries_per_update=statistics.fmean(s.queries for s in bot.stats) if bot.stats else 0.0,
+            queries_by_kind={k: statistics.fmean(v) for k, v in by_kind.items()},
+            api_calls=dict(bot.api_calls),
+            handler_errors=_handler_errors(bot),
+            shed=bot.shed,
+            memory_growth_mb=memory_growth,
+            entries_created=entries,
+        )
+        await bot.graceful_shutdown('load test finished')
+        return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон плагинов без Telegram')
+    parser.add_argument('--users', type=int, default=1000, help='число синтетических пользователей')
+    parser.add_argument('--workers', type=int, default=16, help='воркеры планировщика апдейтов')
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help='задержка ответа «Telegram», сек')
+    parser.add_argument('--telegram-limits', action='store_true', help='включить лимиты очереди исходящих')
+    parser.add_argument('--tracemalloc', action='store_true', help='мерить память через tracemalloc (медленнее)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_load(
+        users=args.users, workers=args.workers, rpc_latency=args.rpc_latency,
+        telegram_limits=args.telegram_limits, trace_memory=args.tracemalloc,
+    ))
+    print(report.format())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+import types
+
+import pytest
+
+import bot.menu_system as ms
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.models import Role, User
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+
+class CountingStorage:
+    def __init__(self, admins):
+        self.admin_ids = list(admins)
+        self.queries = 0
+
+    def get_user_type_id(self, role):
+        self.queries += 1
+        return list(self.admin_ids) if role == Role.admin else []
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    storage = CountingStorage(['10', 20])
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x', settings_storage=storage)
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    bot.user_context_resolver = None
+    return bot
+
+
+def test_admins_is_frozenset_and_changes_are_reported(bot):
+    assert bot.admins == frozenset({10, 20}) and isinstance(bot.admins, frozenset)
+    assert bot.is_admin(10) and bot.is_admin('20') and not bot.is_admin(30) and not bot.is_admin('x')
+
+    changes = []
+    bot.add_admin_listener(lambda added, removed: changes.append((set(added), set(removed))))
+    bot.user_changed(User(id=30, role=Role.admin))
+    bot.user_changed(User(id=40, role=Role.user))  # не админ — без изменений
+    bot.user_changed(user_id=10)
+    bot.admins = [20, 30]  # то же множество — без оповещения
+    assert changes == [({30}, set()), (set(), {10})]
+
+    bot.settings.admin_ids = [20]
+    bot.refresh_admins()
+    assert bot.admins == {20} and changes[-1] == (set(), {30})
+
+
+def test_admin_filter_does_not_query_storage(bot):
+    event_builder = bot.admin_cmd('listusers')
+    queries = bot.settings.queries
+
+    async def check(user_id):
+        return await event_builder.func(types.SimpleNamespace(sender_id=user_id))
+
+    assert asyncio.run(check(10)) and not asyncio.run(check(99))
+    assert bot.settings.queries == queries
+
+
+def test_admin_change_drops_admin_keyboards(bot, monkeypatch):
+    monkeypatch.setattr(ms, 'tlgbot', None)
+    monkeypatch.setattr(ms, 'ensure_menu_router', lambda: None)
+    monkeypatch.setattr(ms, 'MENU_CACHE', {})
+    bot.i18n = types.SimpleNamespace(t=lambda key, lang=None, **kw: key, locales={'ru': {}})
+    ms.init_menu_system(bot)
+    ms.MENU_CACHE.update({'ru': ['user'], 'ru|admin': ['admin'], 'en|admin': ['admin']})
+
+    assert ms._is_admin_user('20')
+    bot.add_admin(99)
+    assert ms.MENU_CACHE == {'ru': ['user']}
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import tracemalloc
+from datetime import date, timedelta
+
+import pytest
+
+from core.database.manager import DatabaseManager
+from core.export.manager import DiaryExportManager, export_format_of, period_bounds
+from core.models import ExportFormat
+
+
+def _fill(db, user_id, days, start=date(2016, 1, 1)):
+    db.create_user(user_id)
+    rows = [
+        (user_id, start + timedelta(days=i), 'Хорошо', 'Солнечно', 'Дом',
+         f'События дня {i} ' + 'x' * 200, 'заметка' if i % 3 == 0 else None)
+        for i in range(days)
+    ]
+    with db.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO diary_entries (user_id, entry_date, mood, weather, location, events, additional_notes) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.commit()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    return DiaryExportManager(db, export_dir=str(tmp_path / 'exports'))
+
+
+def _body(text):
+    # строка «Экспортировано: ...» зависит от времени
+    return [line for line in text.splitlines() if not line.startswith('Экспортировано:')]
+
+
+def test_streaming_matches_list_export(manager):
+    _fill(manager.db_manager, 1, 40)
+    entries = manager.db_manager.get_entries_by_period(1, date(2016, 1, 1), date(2016, 12, 31))
+    _, legacy_path = manager.export_markdown(1, list(reversed(entries)), 'Дневник')
+    filename, path, count = manager.export_period_markdown(1, title='Дневник')
+
+    assert count == 40 and filename.endswith('.md')
+    with open(legacy_path, encoding='utf-8') as a, open(path, encoding='utf-8') as b:
+        streamed = b.read()
+        assert _body(streamed) == _body(a.read())
+    # от новых к старым, заметки только там, где они есть
+    assert streamed.index('09.02.2016') < streamed.index('01.01.2016')
+    assert streamed.count('### Дополнительные заметки') == 14
+
+
+def test_period_bounds_and_empty_period(manager):
+    _fill(manager.db_manager, 1, 10)
+    today = date(2016, 1, 6)  # среда
+    assert period_bounds('week', today) == (date(2016, 1, 4), date(2016, 1, 10))
+    assert period_bounds('month', today) == (date(2016, 1, 1), date(2016, 1, 31))
+    assert period_bounds('all', today) == (None, None)
+
+    _, _, count = manager.export_period_markdown(1, *period_bounds('week', today))
+    assert count == 7
+    assert manager.export_period_markdown(1, date(2020, 1, 1), date(2020, 1, 2)) == ("", "", 0)
+    assert manager.export_period_markdown(2) == ("", "", 0)
+
+
+def test_json_and_csv_formats_roundtrip(manager):
+    _fill(manager.db_manager, 1, 5)
+    records = []
+    for export_format in ('json', 'jsonl', 'csv'):
+        filename, path, count = manager.export_period(1, export_format=export_format)
+        assert count == 5 and filename.endswith('.' + export_format)
+        with open(path, encoding='utf-8', newline='') as f:
+            if export_format == 'json':
+                rows = json.load(f)
+            elif export_format == 'jsonl':
+                rows = [json.loads(line) for line in f]
+            else:
+                rows = [{k: v or None for k, v in row.items()} for row in csv.DictReader(f)]
+        records.append(rows)
+    assert records[0] == records[1] == records[2]
+    assert records[0][0]['entry_date'] == '2016-01-05' and records[0][-1]['additional_notes'] == 'заметка'
+    assert set(records[0][0]) == {'entry_date', 'mood', 'weather', 'location', 'events', 'additional_notes'}
+
+
+def test_export_format_setting(manager):
+    assert export_format_of(ExportFormat.CSV) == 'csv'
+    assert export_format_of('jsonl') == 'jsonl'
+    # pdf пока не поддерживается, как и пустая настройка
+    assert export_format_of(ExportFormat.PDF) == export_format_of(None) == 'markdown'
+
+
+def test_buffer_export_stays_in_memory_and_has_name(manager):
+    _fill(manager.db_manager, 1, 40)
+    _, path, _ = manager.export_period(1, export_format='csv')
+    filename, buffer, count = manager.export_period_buffer(1, export_format='csv')
+    with buffer, open(path, 'rb') as f:
+        assert count == 40 and not buffer.spilled
+        # имя для send_file, содержимое как у файла, в директорию экспорта ничего не пишется
+        assert buffer.name == filename and filename.endswith('.csv')
+        assert buffer.read() == f.read()
+    assert len(os.listdir(manager.export_dir)) == 1
+
+    filename, buffer, _ = manager.export_period_buffer(1, spool_threshold=1024)
+    with buffer:
+        assert buffer.spilled and buffer.read().decode('utf-8').count('## Запись от') == 40
+    assert manager.export_period_buffer(2) == ("", None, 0)
+
+
+def _peak(manager, user_id):
+    tracemalloc.start()
+    count = manager.write_markdown(_NullWriter(), manager.db_manager.iter_entries(user_id, batch_size=100))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, peak
+
+
+def test_memory_does_not_grow_with_history(manager):
+    _fill(manager.db_manager, 1, 365)
+    _fill(manager.db_manager, 2, 3650)  # десять лет: документ около мегабайта
+    _peak(manager, 1)  # прогрев кэшей sqlite3
+    count_year, peak_year = _peak(manager, 1)
+    count_decade, peak_decade = _peak(manager, 2)
+    assert (count_year, count_decade) == (365, 3650)
+    # в памяти одновременно только пачка строк курсора
+    assert peak_decade < peak_year * 1.5
+
+
+class _NullWriter:
+    def write(self, text):
+        return len(text)
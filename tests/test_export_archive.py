@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import zipfile
+from datetime import date
+
+import pytest
+
+from core.database.manager import DatabaseManager
+from core.export import archive as archive_module
+from core.export.archive import archive_filename, resolve_compression, zstd_available
+from core.export.cache import ExportCache
+from core.export.manager import DiaryExportManager
+from tests.test_export import _fill
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    _fill(db, 1, 800)  # 2016-01-01 .. 2018-03-10
+    return db
+
+
+def _plain(manager, **kwargs):
+    _, buffer, _ = manager.export_period_buffer(1, export_format='jsonl', compression='none', **kwargs)
+    with buffer:
+        return buffer.read()
+
+
+def test_compressed_output_matches_plain(db, tmp_path):
+    manager = DiaryExportManager(db, export_dir=str(tmp_path / 'exports'))
+    plain = _plain(manager)
+
+    filename, buffer, count = manager.export_period_buffer(1, export_format='jsonl', compression='gzip')
+    with buffer:
+        assert filename.endswith('.jsonl.gz') and buffer.name == filename and count == 800
+        assert gzip.decompress(buffer.read()) == plain
+
+    filename, path, _ = manager.export_period(1, export_format='jsonl', compression='zip')
+    with zipfile.ZipFile(path) as archive:
+        inner, = archive.namelist()
+        assert filename.endswith('.zip') and inner == filename[:-len('.zip')] + '.jsonl'
+        assert archive.read(inner) == plain
+    assert len(plain) > 10 * len(open(path, 'rb').read())
+
+
+@pytest.mark.skipif(not zstd_available(), reason='нет zstd')
+def test_zstd_output_matches_plain(db, tmp_path):
+    manager = DiaryExportManager(db, export_dir=str(tmp_path / 'exports'))
+    filename, buffer, _ = manager.export_period_buffer(1, export_format='jsonl', compression='zstd')
+    with buffer:
+        assert filename.endswith('.jsonl.zst')
+        if archive_module._zstd is not None:
+            data = archive_module._zstd.decompress(buffer.read())
+        else:
+            data = archive_module.zstandard.ZstdDecompressor().stream_reader(buffer).read()
+    assert data == _plain(manager)
+
+
+def test_names_and_zstd_fallback():
+    assert archive_filename('diary.md', 'zip') == 'diary.zip'
+    assert archive_filename('diary.md', 'gzip') == 'diary.md.gz'
+    assert archive_filename('diary.md', None) == 'diary.md'
+    assert resolve_compression('zstd') == ('zstd' if zstd_available() else 'gzip')
+    assert resolve_compression('rar') is None
+
+
+def test_auto_compression_by_estimated_size(db, tmp_path):
+    manager = DiaryExportManager(db, export_dir=str(tmp_path / 'exports'), compression='auto',
+                                 compress_threshold=100_000)
+    # около 200 КБ текста за всё время, несколько КБ за неделю
+    assert manager.export_period(1, export_format='csv')[0].endswith('.zip')
+    assert manager.export_period(1, *_week(), export_format='csv')[0].endswith('.csv')
+    assert manager.export_period(1, export_format='csv', compression='none')[0].endswith('.csv')
+
+
+def _week():
+    return date(2016, 1, 4), date(2016, 1, 10)
+
+
+def test_split_archive_per_year_and_month(db, tmp_path):
+    manager = DiaryExportManager(db, export_dir=str(tmp_path / 'exports'), split='year', split_threshold=100_000)
+    filename, path, count = manager.export_period(1, export_format='csv')
+    with zipfile.ZipFile(path) as archive:
+        names = archive.namelist()
+        stem = filename[:-len('.zip')]
+        assert names == [f'{stem}_2018.csv', f'{stem}_2017.csv', f'{stem}_2016.csv']
+        rows = {name: list(csv.DictReader(io.TextIOWrapper(archive.open(name), encoding='utf-8', newline='')))
+                for name in names}
+    assert count == 800 and [len(rows[name]) for name in names] == [69, 365, 366]
+    assert all(row['entry_date'].startswith('2017') for row in rows[f'{stem}_2017.csv'])
+
+    _, buffer, _ = manager.export_period_buffer(1, export_format='json', split='month')
+    with buffer, zipfile.ZipFile(buffer) as archive:
+        assert len(archive.namelist()) == 27
+        january = json.loads(archive.read(archive.namelist()[-1]))
+        assert len(january) == 31 and january[-1]['entry_date'] == '2016-01-01'
+
+    # небольшой период одним файлом
+    assert manager.export_period(1, *_week(), export_format='csv')[0].endswith('.csv')
+
+
+def test_cache_key_includes_packaging(db, tmp_path):
+    manager = DiaryExportManager(db, cache=ExportCache(str(tmp_path / 'exports')))
+    plain = manager.export_period(1, compression='none')
+    zipped = manager.export_period(1, compression='zip')
+    split = manager.export_period(1, split='year', compression='none')
+    assert len({plain[0], zipped[0], split[0]}) == 3
+    assert manager.export_period(1, compression='zip') == zipped
+    assert manager.cache.hits == 1
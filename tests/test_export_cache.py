@@ -0,0 +1,85 @@
+import os
+from datetime import date
+
+from bot.tlgbotcore.metrics import MetricsRegistry
+from core.database.manager import DatabaseManager
+from core.export.cache import ExportCache
+from core.export.manager import DiaryExportManager
+from tests.test_export import _fill
+
+
+def _manager(tmp_path, cache):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    _fill(db, 1, 30)
+    return DiaryExportManager(db, cache=cache)
+
+
+def test_unchanged_period_is_served_from_cache(tmp_path, monkeypatch):
+    metrics = MetricsRegistry()
+    cache = ExportCache(str(tmp_path / 'exports'), metrics=metrics)
+    manager = _manager(tmp_path, cache)
+
+    first = manager.export_period(1, export_format='csv')
+    # повторный экспорт не читает записи
+    monkeypatch.setattr(manager.db_manager, 'iter_entries', lambda *a, **k: iter(()))
+    assert manager.export_period(1, export_format='csv') == first
+    assert first[0].startswith('diary_export_1_all_') and first[2] == 30
+    monkeypatch.undo()
+
+    # другой формат, период или заголовок — другой файл
+    assert manager.export_period(1, export_format='json')[1] != first[1]
+    assert manager.export_period(1, date(2016, 1, 1), date(2016, 1, 10), 'csv')[1] != first[1]
+    assert manager.export_period(1, title='A')[1] != manager.export_period(1, title='B')[1]
+
+    # правка и удаление записи меняют ключ
+    manager.db_manager.update_diary_entry(1, date(2016, 1, 3), mood='Плохо')
+    edited = manager.export_period(1, export_format='csv')
+    assert edited[1] != first[1]
+    with manager.db_manager.get_connection() as conn:
+        conn.execute("DELETE FROM diary_entries WHERE user_id = 1 AND entry_date = '2016-01-04'")
+        conn.commit()
+    assert manager.export_period(1, export_format='csv')[1:] != (edited[1], 30)
+
+    assert (cache.hits, cache.misses) == (1, 7)
+    requests = metrics.counter('tlgbot_export_cache_requests_total', '', ('result',))
+    assert requests.get(result='hit') == 1 and requests.get(result='miss') == 7
+    assert not [name for name in os.listdir(cache.directory) if name.endswith('.part')]
+
+
+def _file(directory, name, size, mtime):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_sweep_applies_ttl_then_quota_lru(tmp_path):
+    now = 1_000_000.0
+    cache = ExportCache(str(tmp_path), quota_bytes=350, ttl_seconds=100, clock=lambda: now)
+    _file(tmp_path, 'expired.md', 100, now - 500)
+    _file(tmp_path, 'old.md', 100, now - 50)
+    _file(tmp_path, 'recent.md', 100, now - 20)
+    _file(tmp_path, 'fresh.md', 100, now - 10)
+    _file(tmp_path, 'writing.md.part', 100, now - 60)  # идёт запись — не трогаем
+
+    # попадание продлевает жизнь файла: old становится самым свежим
+    assert cache.lookup('old.md') is not None
+
+    report = cache.sweep()
+    assert sorted(os.listdir(tmp_path)) == ['fresh.md', 'old.md', 'writing.md.part']
+    assert (report.removed, report.reclaimed, report.files, report.size) == (2, 200, 3, 300)
+    assert cache.reclaimed_bytes == 200 and cache.hit_rate == 1.0
+
+
+def test_cached_markdown_has_no_export_time(tmp_path):
+    manager = _manager(tmp_path, ExportCache(str(tmp_path / 'exports')))
+    with manager.db_manager.get_connection() as conn:
+        conn.execute("UPDATE diary_entries SET updated_at = '2016-02-01 10:30:00' WHERE user_id = 1")
+        conn.commit()
+    _, path, _ = manager.export_period(1)
+    with open(path, encoding='utf-8') as f:
+        header = f.read().split('## ', 1)[0]
+    # файл из кэша отдаётся и через неделю: в нём время изменения записей, а не экспорта
+    assert 'Экспортировано' not in header
+    assert 'Последнее изменение: 01.02.2016 10:30' in header
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import threading
+
+from bot.tlgbotcore.metrics import MetricsRegistry
+from core.database.manager import DatabaseManager
+from core.export.jobs import ExportJobQueue
+from core.export.manager import DiaryExportManager
+from tests.test_export import _fill
+
+
+def _manager(tmp_path, days):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    _fill(db, 1, days)
+    return DiaryExportManager(db, export_dir=str(tmp_path / 'exports'))
+
+
+def test_export_runs_in_pool_with_progress(tmp_path):
+    manager = _manager(tmp_path, 300)
+    metrics = MetricsRegistry()
+    progress, finished, ticks = [], [], []
+    gate = threading.Event()
+
+    def run(job):
+        job.total = manager.count_period(1)
+
+        def advance(count):
+            job.advance(count)
+            if job.done == 100:
+                gate.wait(2)  # даём циклу событий показать прогресс
+        return manager.export_period(1, progress=advance)
+
+    async def report(job):
+        progress.append((job.done, job.total))
+        gate.set()
+
+    async def finish(job):
+        finished.append(job)
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(1)
+            await asyncio.sleep(0)
+
+    async def scenario():
+        queue = ExportJobQueue(workers=1, progress_interval=0.01, metrics=metrics)
+        job = queue.submit(1, run, on_progress=report, on_done=finish)
+        # у пользователя уже идёт экспорт — второй не ставится
+        assert queue.submit(1, run) is None
+        await ticker()  # цикл событий не заблокирован экспортом
+        await job.task
+        assert queue.get(1) is None
+        await queue.shutdown(1)
+
+    asyncio.run(scenario())
+    assert len(ticks) == 5
+    assert (100, 300) in progress
+    job, = finished
+    assert job.status == 'done' and job.result[2] == 300 and os.path.exists(job.result[1])
+    assert metrics.counter('tlgbot_export_jobs_total', '', ('status',)).get(status='done') == 1
+    assert metrics.counter('tlgbot_export_jobs_total', '', ('status',)).get(status='busy') == 1
+
+
+def test_cancel_stops_export_and_removes_file(tmp_path):
+    manager = _manager(tmp_path, 300)
+    started = threading.Event()
+    finished = []
+
+    def run(job):
+        def advance(count):
+            job.advance(count)
+            started.set()
+            job._cancel.wait(2)  # следующая запись — только после отмены
+        return manager.export_period(1, progress=advance)
+
+    async def finish(job):
+        finished.append(job.status)
+
+    async def scenario():
+        queue = ExportJobQueue(workers=1, progress_interval=0.01)
+        job = queue.submit(1, run, on_done=finish)
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 2)
+        assert queue.cancel(1) and not queue.cancel(2)
+        await job.task
+        await queue.shutdown(1)
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == 'cancelled' and job.done == 1 and finished == ['cancelled']
+    # недописанный файл удалён
+    assert os.listdir(manager.export_dir) == []
+
+
+def test_jobs_of_different_users_share_the_pool(tmp_path):
+    manager = _manager(tmp_path, 20)
+    _fill(manager.db_manager, 2, 30)
+
+    async def scenario():
+        queue = ExportJobQueue(workers=2, progress_interval=0.01)
+        jobs = [queue.submit(user_id, lambda job, user_id=user_id: manager.export_period(
+            user_id, export_format='csv', progress=job.advance)) for user_id in (1, 2)]
+        assert len(queue) == 2
+        await asyncio.gather(*(job.task for job in jobs))
+        await queue.shutdown(1)
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert [job.result[2] for job in jobs] == [20, 30]
+    assert [job.done for job in jobs] == [20, 30]
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import string
+import types
+
+import pytest
+
+from bot import menu_system
+from bot.tlgbotcore.i18n import BUNDLE_NAME, I18n, build_bundle, compile_template, get_i18n
+from bot.tlgbotcore.locale_watcher import LocaleWatcher
+
+
+def legacy_t(locales, default_lang, key, lang=None, **kwargs):
+    """Прежняя реализация I18n.t — эталон для сравнения."""
+    lang = lang or default_lang
+    msg = locales.get(lang, {}).get(key) or locales[default_lang].get(key, key)
+    return msg.format(**kwargs)
+
+
+def test_compiled_catalog_matches_legacy_on_real_locales():
+    i18n = I18n(locales_path='bot/locales', default_lang='ru')
+    keys = set().union(*(messages.keys() for messages in i18n.locales.values())) | {'missing_key'}
+    for lang in [None, 'xx', *i18n.locales]:
+        for key in keys:
+            fields = {field for messages in i18n.locales.values()
+                      for _, field, _, _ in string.Formatter().parse(messages.get(key, '')) if field}
+            kwargs = {field: f'<{field}>' for field in fields}
+            assert i18n.t(key, lang=lang, **kwargs) == legacy_t(i18n.locales, 'ru', key, lang, **kwargs)
+
+
+def test_fallback_escapes_and_formats(tmp_path):
+    (tmp_path / 'ru.json').write_text(json.dumps({
+        'hello': 'Привет, {name}!', 'only_ru': 'только ru', 'percent': '{n}% из {{всего}}',
+        'spec': '{value:>5}', 'attr': '{user.id}',
+    }), encoding='utf-8')
+    (tmp_path / 'en.json').write_text(json.dumps({'hello': 'Hi, {name!r}!', 'only_ru': ''}), encoding='utf-8')
+    i18n = I18n(locales_path=str(tmp_path), default_lang='ru')
+
+    assert i18n.t('hello', lang='en', name='Bob') == "Hi, 'Bob'!"
+    assert i18n.t('only_ru', lang='en') == 'только ru'  # пустая строка уступает языку по умолчанию
+    assert i18n.t('percent', n=5) == '5% из {всего}'
+    assert i18n.t('spec', value=7) == '    7'
+    assert i18n.t('attr', user=type('U', (), {'id': 42})) == '42'
+    assert i18n.t('nope', lang='en') == 'nope'
+    with pytest.raises(KeyError):
+        i18n.t('hello')
+
+    # смена языка по умолчанию пересобирает каталоги
+    i18n.default_lang = 'en'
+    assert i18n.t('hello', name='Bob') == "Hi, 'Bob'!"
+
+
+def test_parameterless_templates_are_stored_ready():
+    assert compile_template('Готово {{ok}}') == 'Готово {ok}'
+    assert callable(compile_template('{a} и {b}'))
+
+
+def _write(path, data, mtime_ns):
+    text = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+    path.write_text(text, encoding='utf-8')
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reload_reads_only_changed_files_and_swaps_catalogs(tmp_path, monkeypatch):
+    _write(tmp_path / 'ru.json', {'menu_today': 'Сегодня', 'hi': 'Привет'}, 1_000_000_000)
+    _write(tmp_path / 'en.json', {'menu_today': 'Today'}, 1_000_000_000)
+    _write(tmp_path / 'tt.json', {'menu_today': 'Бүген'}, 1_000_000_000)
+    i18n = I18n(locales_path=str(tmp_path), default_lang='ru')
+    tt_catalog = i18n._catalogs['tt']
+    seen = []
+    i18n.add_reload_listener(seen.append)
+    assert i18n.prepare_reload() is None
+
+    _write(tmp_path / 'en.json', {'menu_today': 'Today!', 'hi': 'Hello'}, 2_000_000_000)
+    _write(tmp_path / 'tt.json', '{битый', 2_000_000_000)
+    opened = []
+    real_open = open
+    monkeypatch.setattr('builtins.open', lambda path, *a, **kw: opened.append(os.path.basename(path)) or real_open(path, *a, **kw))
+    assert i18n.reload_changed() == {'en'}
+    monkeypatch.undo()
+
+    assert sorted(opened) == ['en.json', 'tt.json']
+    assert seen == [{'en'}]
+    assert i18n.t('menu_today', lang='en') == 'Today!' and i18n.t('hi', lang='en') == 'Hello'
+    # битый файл не ломает прежний перевод, нетронутые каталоги не пересобираются
+    assert i18n.t('menu_today', lang='tt') == 'Бүген'
+    assert i18n._catalogs['tt'] is tt_catalog
+    assert i18n.reload_changed() == set()
+
+    # изменение языка по умолчанию затрагивает все каталоги
+    _write(tmp_path / 'ru.json', {'menu_today': 'Сегодня', 'hi': 'Привет', 'bye': 'Пока'}, 3_000_000_000)
+    assert i18n.reload_changed() == {'ru', 'en', 'tt'}
+    assert i18n.t('bye', lang='tt') == 'Пока'
+
+
+def test_watcher_reloads_off_loop_and_invalidates_menu(tmp_path, monkeypatch):
+    _write(tmp_path / 'ru.json', {'menu_today': 'Сегодня'}, 1_000_000_000)
+    _write(tmp_path / 'en.json', {'menu_today': 'Today'}, 1_000_000_000)
+    bot = types.SimpleNamespace(i18n=I18n(locales_path=str(tmp_path), default_lang='ru'),
+                                _t=lambda key, **kw: key, admins=[])
+    monkeypatch.setattr(menu_system, 'MENU_CACHE', {})
+    monkeypatch.setattr(menu_system, 'tlgbot', bot)
+    monkeypatch.setattr(menu_system, 'ensure_menu_router', lambda: None)
+    menu_system.init_menu_system(bot)
+    menu_system.MENU_CACHE.update({'en': ['old'], 'en|admin': ['old'], 'ru': ['kept']})
+
+    _write(tmp_path / 'en.json', {'menu_today': 'Today!'}, 2_000_000_000)
+    langs = asyncio.run(LocaleWatcher(bot).check_once())
+
+    assert langs == {'en'}
+    assert menu_system.MENU_CACHE == {'ru': ['kept']}
+    assert bot.i18n.t('menu_today', lang='en') == 'Today!'
+
+
+def test_bundle_is_used_while_fresh_and_json_wins_when_stale(tmp_path, monkeypatch):
+    _write(tmp_path / 'ru.json', {'hello': 'Привет, {name}!', 'ok': 'Готово'}, 1_000_000_000)
+    _write(tmp_path / 'en.json', {'hello': 'Hi, {name}!'}, 1_000_000_000)
+    bundle = build_bundle(str(tmp_path), 'ru')
+    assert bundle == tmp_path / BUNDLE_NAME
+
+    # свежий бандл: JSON не разбираются
+    monkeypatch.setattr(json, 'load', lambda f: pytest.fail('JSON не должен читаться'))
+    i18n = I18n(locales_path=str(tmp_path), default_lang='ru')
+    assert i18n.t('hello', lang='en', name='Bob') == 'Hi, Bob!' and i18n.t('ok', lang='en') == 'Готово'
+    assert i18n.prepare_reload() is None  # снимок для горячей перезагрузки согласован
+
+    # другой mtime при том же содержимом (git checkout) — бандл по-прежнему годен
+    os.utime(tmp_path / 'en.json', ns=(5_000_000_000, 5_000_000_000))
+    assert I18n(locales_path=str(tmp_path), default_lang='ru').t('hello', lang='en', name='Bob') == 'Hi, Bob!'
+    # бандл собран для ru, но годится и для другого языка по умолчанию
+    other = I18n(locales_path=str(tmp_path), default_lang='en')
+    assert other.t('hello', name='Bob') == 'Hi, Bob!' and other.t('ok', lang='ru') == 'Готово'
+    monkeypatch.undo()
+
+    # правка перевода без пересборки — читаются JSON
+    _write(tmp_path / 'en.json', {'hello': 'Hello, {name}!'}, 6_000_000_000)
+    assert I18n(locales_path=str(tmp_path), default_lang='ru').t('hello', lang='en', name='Bob') == 'Hello, Bob!'
+
+    # бандл другой версии формата не используется
+    bundle.write_bytes(b'DLI18N\x00\x00garbage')
+    assert I18n(locales_path=str(tmp_path), default_lang='ru').t('hello', lang='en', name='Bob') == 'Hello, Bob!'
+
+
+def test_get_i18n_shares_instance(tmp_path, monkeypatch):
+    _write(tmp_path / 'ru.json', {'ok': 'Готово'}, 1_000_000_000)
+    monkeypatch.chdir(tmp_path)
+    first = get_i18n('.', 'ru')
+    assert get_i18n(str(tmp_path), 'ru') is first
+    assert get_i18n('.', 'en') is not first
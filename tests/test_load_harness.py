@@ -0,0 +1,20 @@
+import asyncio
+
+import cfg.config_tlg as config
+from tests.load_harness import SCENARIO, run_load
+
+
+def test_synthetic_users_complete_scenario(tmp_path):
+    db_path = config.DAYLOG_DB_PATH
+    report = asyncio.run(run_load(users=5, workers=4, workdir=tmp_path))
+
+    assert report.updates == 5 * len(SCENARIO)
+    assert report.handler_errors == 0 and report.shed == 0
+    # мастер /today сохранил запись, /export отправил файл каждому
+    assert report.entries_created == 5
+    assert report.api_calls['SendMediaRequest'] == 5
+    assert set(report.queries_by_kind) >= {'/start', '/today', '/view', '/export', 'cb:mood', 'text'}
+    assert report.queries_per_update > 0
+    assert set(report.handler_p) == {'p50', 'p95', 'p99'}
+    assert 'апдейтов/с' in report.format()
+    assert config.DAYLOG_DB_PATH == db_path
@@ -0,0 +1,68 @@
+import logging
+from logging.handlers import QueueHandler
+
+import pytest
+
+from bot.tlgbotcore import logging_config
+from bot.tlgbotcore.logging_config import lazy, log_sampled, setup_logging, stop_logging
+
+
+@pytest.fixture
+def restore_root_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_records_go_through_queue_and_file_rotates(tmp_path, restore_root_logging):
+    log_file = tmp_path / 'logs' / 'bot.log'
+    setup_logging(level=logging.INFO, log_file=str(log_file), max_bytes=2000, backup_count=2)
+
+    root = logging.getLogger()
+    assert len(root.handlers) == 1 and isinstance(root.handlers[0], QueueHandler)
+
+    log = logging.getLogger('tlgbot.test')
+    for n in range(100):
+        log.info("запись %d %s", n, 'x' * 40)
+    stop_logging()  # дописывает очередь
+
+    assert log_file.exists() and (tmp_path / 'logs' / 'bot.log.1').exists()
+    assert not (tmp_path / 'logs' / 'bot.log.3').exists()
+    assert 'запись 99' in log_file.read_text(encoding='utf-8')
+    # цвет консоли не попадает в файл
+    assert '\033[' not in log_file.read_text(encoding='utf-8')
+
+
+def test_lazy_is_evaluated_only_when_enabled(caplog):
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return 'дорого'
+
+    log = logging.getLogger('tlgbot.lazy')
+    with caplog.at_level(logging.INFO, logger='tlgbot.lazy'):
+        log.debug("значение %s", lazy(expensive))
+    assert calls == []
+
+    with caplog.at_level(logging.DEBUG, logger='tlgbot.lazy'):
+        log.debug("значение %s", lazy(expensive))
+    assert calls  # вычислено при форматировании (каждым хэндлером pytest)
+    assert 'значение дорого' in caplog.text
+
+
+def test_log_sampled_writes_every_nth(caplog, monkeypatch):
+    monkeypatch.setattr(logging_config, '_sample_counters', {})
+    log = logging.getLogger('tlgbot.sampled')
+    with caplog.at_level(logging.DEBUG, logger='tlgbot.sampled'):
+        for n in range(25):
+            log_sampled(log, 10, "кнопка %s", n)
+    assert [r.getMessage().split(' [')[0] for r in caplog.records] == ['кнопка 0', 'кнопка 10', 'кнопка 20']
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger='tlgbot.sampled'):
+        log_sampled(log, 1, "кнопка %s", 'x')
+    assert caplog.records == []
@@ -0,0 +1,99 @@
+import asyncio
+import types
+
+import pytest
+
+import bot.menu_system as ms
+from bot.menu_system import MENU_CACHE, MENU_REGISTRY, MenuEntry, build_menu, prebuild_menus, register_menu
+
+
+class DummyI18n:
+    locales = {'ru': {}, 'en': {}}
+
+    def __init__(self):
+        self.calls = 0
+
+    def t(self, key, lang=None, **kwargs):
+        self.calls += 1
+        return f"{lang}:{key}"
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    bot = types.SimpleNamespace(_plugins={}, i18n=DummyI18n(), admins=[1])
+    monkeypatch.setattr(ms, 'tlgbot', bot)
+    saved = list(MENU_REGISTRY)
+    MENU_REGISTRY.clear()
+    MENU_CACHE.clear()
+    yield bot
+    MENU_REGISTRY[:] = saved
+    MENU_CACHE.clear()
+
+
+def _labels(rows):
+    return [button.text for row in rows for button in row]
+
+
+def test_registry_index_survives_direct_list_operations(bot):
+    version = MENU_REGISTRY.version
+    register_menu({'key': 'b', 'tr_key': 'menu_b', 'plugin': 'p', 'handler': 'h', 'order': 20})
+    register_menu({'key': 'a', 'tr_key': 'menu_a', 'plugin': 'p', 'handler': 'h', 'order': 10})
+    register_menu({'key': 'a', 'tr_key': 'menu_other', 'plugin': 'p', 'handler': 'h', 'order': 1})
+
+    assert MENU_REGISTRY.get('a').tr_key == 'menu_a' and 'b' in MENU_REGISTRY
+    assert [e.key for e in MENU_REGISTRY.ordered()] == ['a', 'b']
+    assert MENU_REGISTRY.ordered() is MENU_REGISTRY.ordered()  # без пересортировки
+    assert MENU_REGISTRY.version == version + 2
+
+    MENU_REGISTRY.clear()
+    assert MENU_REGISTRY.get('a') is None and MENU_REGISTRY.ordered() == ()
+
+
+def test_keyboards_prebuilt_per_lang_and_role(bot):
+    register_menu(MenuEntry(key='today', tr_key='menu_today', plugin='p', handler='h', order=10))
+    register_menu(MenuEntry(key='adduser', tr_key='menu_adduser', plugin='p', handler='h', order=900, admin_only=True))
+
+    assert prebuild_menus() == 4
+    assert set(MENU_CACHE) == {'ru', 'ru|admin', 'en', 'en|admin'}
+    assert _labels(MENU_CACHE['en|admin']) == ['en:menu_today', 'en:menu_adduser']
+    assert _labels(MENU_CACHE['ru']) == ['ru:menu_today']
+
+    calls = bot.i18n.calls
+    build_menu('ru', is_admin=True)
+    assert bot.i18n.calls == calls  # готовая клавиатура, без переводов
+
+
+def test_invalidation_is_targeted(bot):
+    register_menu(MenuEntry(key='today', tr_key='menu_today', plugin='p', handler='h', order=10))
+    prebuild_menus()
+    user_keyboard = MENU_CACHE['ru']
+
+    # админский пункт сбрасывает только админские клавиатуры
+    register_menu(MenuEntry(key='deluser', tr_key='menu_deluser', plugin='p', handler='h', order=920, admin_only=True))
+    assert set(MENU_CACHE) == {'ru', 'en'} and MENU_CACHE['ru'] is user_keyboard
+
+    # повторное выключение уже выключенного пункта ничего не сбрасывает
+    ms.disable_menu('deluser')
+    prebuild_menus()
+    version = MENU_REGISTRY.version
+    ms.disable_menu('deluser')
+    assert MENU_REGISTRY.version == version and len(MENU_CACHE) == 4
+
+    # обычный пункт виден всем — сбрасывается всё
+    ms.disable_menu('today')
+    assert MENU_CACHE == {}
+    assert _labels(build_menu('en', is_admin=True)) == []
+
+
+def test_dispatch_uses_index(bot):
+    handled = []
+
+    async def handler(event):
+        handled.append(event)
+
+    bot._plugins['p'] = types.SimpleNamespace(h=handler)
+    register_menu(MenuEntry(key='today', tr_key='menu_today', plugin='p', handler='h'))
+    event = types.SimpleNamespace(lang='ru')
+    asyncio.run(ms.dispatch_command('today', event))
+    asyncio.run(ms.dispatch_command('missing', event))
+    assert handled == [event]
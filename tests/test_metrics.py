@@ -0,0 +1,92 @@
+import asyncio
+import types
+
+import pytest
+from telethon import events
+from telethon.client.users import UserMethods
+from telethon.tl.functions.messages import SendMessageRequest
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.metrics import MetricsExporter, MetricsRegistry
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    return bot
+
+
+def test_render_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter('x_total', 'help', ('kind',)).inc(kind='a"b')
+    hist = registry.histogram('lat_seconds', 'latency', ('h',), buckets=(0.1, 1.0))
+    hist.observe(0.05, h='one')
+    hist.observe(0.5, h='one')
+    text = registry.render()
+    assert '# TYPE x_total counter' in text
+    assert 'x_total{kind="a\\"b"} 1' in text
+    assert 'lat_seconds_bucket{h="one",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{h="one",le="+Inf"} 2' in text
+    assert 'lat_seconds_count{h="one"} 2' in text
+    assert hist.quantile(0.99, h='one') == 1.0
+
+
+def test_handler_middleware_counts_calls_and_errors(bot):
+    @bot.on(events.NewMessage)
+    async def good(event):
+        return 'ok'
+
+    @bot.on(events.NewMessage)
+    async def bad(event):
+        raise RuntimeError('boom')
+
+    callbacks = {cb.__name__: cb for _, cb in bot._event_builders}
+    assert asyncio.run(callbacks['good'](None)) == 'ok'
+    with pytest.raises(RuntimeError):
+        asyncio.run(callbacks['bad'](None))
+
+    plugin = __name__.rsplit('.', 1)[-1]
+    assert bot._handler_calls.get(plugin=plugin, handler='good', status='ok') == 1
+    assert bot._handler_calls.get(plugin=plugin, handler='bad', status='error') == 1
+    assert bot._handler_latency.count(plugin=plugin, handler='good') == 1
+
+    # удаление по исходной функции, несмотря на обёртку
+    assert bot.remove_event_handler(good) == 1
+    assert [cb.__name__ for _, cb in bot._event_builders] == ['bad']
+
+
+def test_api_call_timings(bot, monkeypatch):
+    async def fake_call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        return 'sent'
+
+    monkeypatch.setattr(UserMethods, '_call', fake_call)
+    request = SendMessageRequest(peer='me', message='hi')
+    assert asyncio.run(bot._call(None, request)) == 'sent'
+    assert bot._api_calls.get(method='SendMessageRequest', status='ok') == 1
+    assert bot._api_latency.count(method='SendMessageRequest') == 1
+
+
+def test_exporter_file_and_http(tmp_path):
+    registry = MetricsRegistry()
+    registry.gauge('queue_depth', 'depth').set(3)
+    path = tmp_path / 'metrics.prom'
+
+    async def scenario():
+        exporter = MetricsExporter(registry, file_path=str(path), interval=60, http_port=0)
+        await exporter.start()
+        port = exporter._server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n')
+        body = await reader.read()
+        writer.close()
+        await exporter.stop()
+        return body.decode()
+
+    response = asyncio.run(scenario())
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert 'queue_depth 3' in response
+    assert 'queue_depth 3' in path.read_text(encoding='utf-8')
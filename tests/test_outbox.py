@@ -0,0 +1,101 @@
+import asyncio
+import types
+
+import pytest
+from telethon.client.users import UserMethods
+from telethon.errors import FloodWaitError
+from telethon.tl.functions.messages import SendMessageRequest
+from telethon.tl.types import InputPeerUser
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.metrics import MetricsRegistry
+from bot.tlgbotcore.outbox import Outbox, Priority, priority
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+
+def test_interactive_replies_overtake_queued_broadcasts():
+    order = []
+
+    async def scenario():
+        outbox = Outbox(global_rate=50, global_burst=1)
+
+        async def send(name, chat, level):
+            await outbox.acquire(chat, level)
+            order.append(name)
+
+        await asyncio.gather(
+            send('broadcast-1', 1, Priority.BROADCAST),
+            send('broadcast-2', 2, Priority.BROADCAST),
+            send('reply', 3, Priority.INTERACTIVE),
+        )
+        await outbox.close()
+
+    asyncio.run(scenario())
+    assert order == ['reply', 'broadcast-1', 'broadcast-2']
+
+
+def test_busy_chat_does_not_block_other_chats():
+    order = []
+
+    async def scenario():
+        outbox = Outbox(global_rate=1000, global_burst=100, chat_rate=10, chat_burst=1)
+
+        async def send(name, chat):
+            await outbox.acquire(chat, Priority.NORMAL)
+            order.append(name)
+
+        await asyncio.gather(send('a1', 1), send('a2', 1), send('b1', 2))
+        await outbox.close()
+
+    asyncio.run(scenario())
+    assert order == ['a1', 'b1', 'a2']
+
+
+def test_flood_wait_is_retried_and_counted():
+    metrics = MetricsRegistry()
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise FloodWaitError(request=None, capture=0)
+        return 'sent'
+
+    async def too_long():
+        raise FloodWaitError(request=None, capture=3600)
+
+    async def scenario():
+        outbox = Outbox(metrics, chat_rate=100, max_flood_wait=60)
+        with priority(Priority.REMINDER):
+            result = await outbox.send(7, flaky)
+        with pytest.raises(FloodWaitError):
+            await outbox.send(7, too_long)
+        await outbox.close()
+        return result
+
+    assert asyncio.run(scenario()) == 'sent'
+    assert len(calls) == 2
+    assert metrics.get('tlgbot_outbox_flood_waits_total').get(priority='reminder') == 1
+
+
+def test_send_requests_go_through_outbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    seen = {}
+
+    async def fake_call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        seen['threshold'] = flood_sleep_threshold
+        return 'ok'
+
+    async def fake_send(chat_id, call, level=None):
+        seen['chat_id'] = chat_id
+        return await call()
+
+    monkeypatch.setattr(UserMethods, '_call', fake_call)
+    monkeypatch.setattr(bot.outbox, 'send', fake_send)
+    request = SendMessageRequest(peer=InputPeerUser(5, 0), message='hi')
+    assert asyncio.run(bot._call(None, request)) == 'ok'
+    # FloodWait не «засыпает» внутри telethon, его обрабатывает очередь
+    assert seen == {'chat_id': 5, 'threshold': 0}
@@ -0,0 +1,137 @@
+import asyncio
+import textwrap
+import types
+
+import pytest
+from telethon import events
+from telethon.tl import types as tl_types
+from telethon.tl.custom import Message
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.plugin_manifest import extract_manifest
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+PLUGIN_SRC = textwrap.dedent('''
+    from telethon import events
+    tlgbot = globals().get('tlgbot')
+    CALLS = []
+
+    @tlgbot.on(events.NewMessage(pattern=r'^/alpha'))
+    async def alpha_handler(event):
+        CALLS.append(event.raw_text)
+
+    @tlgbot.on(events.CallbackQuery(pattern=b'alpha:'))
+    async def alpha_callback(event):
+        CALLS.append(event.data)
+''')
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'plugins' / 'alpha').mkdir(parents=True)
+    (tmp_path / 'plugins' / 'alpha' / 'alpha.py').write_text(PLUGIN_SRC, encoding='utf-8')
+    (tmp_path / 'plugins' / 'broken').mkdir()
+    (tmp_path / 'plugins' / 'broken' / 'broken.py').write_text(
+        "from telethon import events\n"
+        "tlgbot = globals().get('tlgbot')\n"
+        "@tlgbot.on(events.NewMessage(pattern='/broken'))\n"
+        "async def h(event):\n"
+        "    pass\n"
+        "raise RuntimeError('boom')\n",
+        encoding='utf-8',
+    )
+    return tmp_path
+
+
+def make_bot(mode):
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x', plugin_load_mode=mode)
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    return bot
+
+
+def handler_names(bot):
+    return sorted(cb.__name__ for _, cb in bot._event_builders)
+
+
+@pytest.mark.parametrize('mode', ['eager', 'parallel'])
+def test_load_all_plugins_reports_timings(plugin_dir, mode):
+    bot = make_bot(mode)
+    asyncio.run(bot.load_all_plugins())
+    assert list(bot._plugins) == ['alpha']
+    # упавший плагин не оставляет зарегистрированных обработчиков
+    assert handler_names(bot) == ['alpha_callback', 'alpha_handler']
+    assert bot.startup_report['mode'] == mode
+    assert 'alpha' in bot.startup_report['imported']
+
+
+BETA_SRC = textwrap.dedent('''
+    from telethon import events
+    tlgbot = globals().get('tlgbot')
+    CALLS = []
+
+    @tlgbot.on(events.CallbackQuery(pattern=b'beta:'))
+    async def beta_callback(event):
+        CALLS.append(event.data)
+
+    @tlgbot.on(events.NewMessage(pattern=r'^/beta'))
+    async def beta_handler(event):
+        CALLS.append(event.raw_text)
+''')
+
+
+async def fire(bot, event):
+    """Диспатч как в telethon: по живому списку, который правят обработчики."""
+    for builder, cb in bot._event_builders:
+        if not isinstance(event, builder.Event):
+            continue
+        await builder.resolve(bot)
+        if builder.filter(event):
+            await cb(event)
+
+
+def test_lazy_plugin_imported_on_first_matching_event(plugin_dir):
+    bot = make_bot('lazy')
+    asyncio.run(bot.load_all_plugins())
+    assert 'alpha' not in bot._plugins
+    assert bot.startup_report['lazy'] == ['alpha', 'broken']
+    assert handler_names(bot) == ['lazy_plugin_trigger'] * 3
+
+    msg = Message(id=1, peer_id=tl_types.PeerUser(42), message='/alpha now')
+    event = events.NewMessage.Event(msg)
+
+    asyncio.run(fire(bot, event))
+    assert 'alpha' in bot._plugins
+    assert bot._plugins['alpha'].CALLS == ['/alpha now']
+    # заглушка для ещё не загруженного broken остаётся на месте
+    assert handler_names(bot) == ['alpha_callback', 'alpha_handler', 'lazy_plugin_trigger']
+
+
+def test_manifest_of_real_plugin():
+    manifest = extract_manifest('bot/plugins_bot/today/today.py')
+    assert manifest.commands == ['today']
+    assert manifest.matches_message('/today')
+    assert manifest.matches_callback(b'mood_good')
+    assert manifest.menu_entries[0]['key'] == 'today'
+    assert not manifest.eager
+
+
+def test_lazy_plugin_woken_by_callback_runs_handler_once(plugin_dir):
+    (plugin_dir / 'plugins' / 'beta').mkdir()
+    (plugin_dir / 'plugins' / 'beta' / 'beta.py').write_text(BETA_SRC, encoding='utf-8')
+    bot = make_bot('lazy')
+    asyncio.run(bot.load_all_plugins())
+
+    update = tl_types.UpdateBotCallbackQuery(
+        query_id=1, user_id=42, peer=tl_types.PeerUser(42), msg_id=1, chat_instance=1, data=b'beta:1')
+    event = events.CallbackQuery.Event(update, tl_types.PeerUser(42), 1)
+
+    asyncio.run(fire(bot, event))
+    assert bot._plugins['beta'].CALLS == [b'beta:1']
+    assert 'lazy_plugin_trigger' in handler_names(bot)  # broken ещё ждёт
+    assert {'beta_callback', 'beta_handler'} <= set(handler_names(bot))
+
+    # следующее событие идёт уже в обработчики плагина
+    asyncio.run(fire(bot, event))
+    assert bot._plugins['beta'].CALLS == [b'beta:1', b'beta:1']
@@ -0,0 +1,100 @@
+import asyncio
+import types
+
+import pytest
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.plugin_watcher import PluginWatcher
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+TEMPLATE = '''
+from telethon import events
+tlgbot = globals().get('tlgbot')
+VERSION = {version}
+
+@tlgbot.on(events.NewMessage(pattern=r'^/alpha'))
+async def alpha_handler(event):
+    pass
+{extra}
+'''
+
+OTHER = '''
+from telethon import events
+tlgbot = globals().get('tlgbot')
+
+@tlgbot.on(events.NewMessage(pattern=r'^/beta'))
+async def beta_handler(event):
+    pass
+'''
+
+
+def write_alpha(root, version, extra=''):
+    (root / 'plugins' / 'alpha' / 'alpha.py').write_text(
+        TEMPLATE.format(version=version, extra=extra), encoding='utf-8'
+    )
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'plugins' / 'alpha').mkdir(parents=True)
+    (tmp_path / 'plugins' / 'beta').mkdir()
+    write_alpha(tmp_path, 1)
+    (tmp_path / 'plugins' / 'beta' / 'beta.py').write_text(OTHER, encoding='utf-8')
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    asyncio.run(bot.load_all_plugins())
+    return bot
+
+
+def handler_names(bot):
+    return [cb.__name__ for _, cb in bot._event_builders[:]]
+
+
+def test_watcher_reloads_only_changed_plugin(bot, tmp_path):
+    watcher = PluginWatcher(bot, use_watchfiles=False)
+    beta = bot._plugins['beta']
+    write_alpha(tmp_path, 2, extra='# changed')
+
+    assert asyncio.run(watcher.check_once()) == ['alpha']
+    assert bot._plugins['alpha'].VERSION == 2
+    assert bot._plugins['beta'] is beta
+    # обработчик остался на прежнем месте, дубликатов нет
+    assert handler_names(bot) == ['alpha_handler', 'beta_handler']
+    assert asyncio.run(watcher.check_once()) == []
+
+
+@pytest.mark.parametrize('extra', [
+    'def health_check():\n    return False',
+    'raise RuntimeError("boom")',
+    'def broken(:',
+])
+def test_failed_reload_keeps_previous_version(bot, tmp_path, extra):
+    old = bot._plugins['alpha']
+    old_handlers = bot._event_builders[:]
+    write_alpha(tmp_path, 3, extra=extra)
+
+    assert asyncio.run(bot.reload_plugin('alpha')) is False
+    assert bot._plugins['alpha'] is old
+    assert bot._event_builders[:] == old_handlers
+
+
+def test_swap_does_not_disturb_inflight_dispatch(bot, tmp_path):
+    seen = []
+    write_alpha(tmp_path, 2, extra='# v2')
+    for _, cb in bot._event_builders:
+        seen.append(cb.__name__)
+        if len(seen) == 1:
+            assert asyncio.run(bot.reload_plugin('alpha'))
+    # итерация по старому списку дошла до конца без пропусков
+    assert sorted(seen) == ['alpha_handler', 'beta_handler']
+
+
+def test_core_is_pinned_and_deleted_plugin_is_removed(bot, tmp_path):
+    assert asyncio.run(bot.reload_plugin('_core')) is False
+    watcher = PluginWatcher(bot, use_watchfiles=False)
+    (tmp_path / 'plugins' / 'beta' / 'beta.py').unlink()
+    assert asyncio.run(watcher.check_once()) == ['beta']
+    assert 'beta' not in bot._plugins
+    assert handler_names(bot) == ['alpha_handler']
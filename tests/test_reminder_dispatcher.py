@@ -0,0 +1,140 @@
+import asyncio
+import types
+from datetime import date
+
+import pytest
+from telethon.errors import FloodWaitError, UserIsBlockedError
+
+from bot.reminders.dispatcher import ReminderDispatcher
+from core.database.manager import DatabaseManager
+
+DAY = '2027-01-15'
+NOW = 1_800_000_000  # 2027-01-15 11:00 по Москве
+
+
+class ScriptedBot:
+    """Бот, у которого send_message падает по заданному сценарию для пользователя."""
+
+    def __init__(self, failures=None):
+        self.failures = {user_id: list(errors) for user_id, errors in (failures or {}).items()}
+        self.sent = []
+        self.active = self.peak = 0
+        self.i18n = types.SimpleNamespace(t=lambda key, lang='ru', **kw: f"{key}:{lang}")
+
+    async def send_message(self, user_id, text):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0)
+        self.active -= 1
+        errors = self.failures.get(user_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(user_id)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    for user_id in range(1, 11):
+        db.create_user(user_id)
+    return db
+
+
+def _ledger(db):
+    with db.get_connection() as conn:
+        rows = conn.execute('SELECT user_id, status, attempts, next_attempt_at FROM reminder_deliveries')
+        return {row['user_id']: dict(row) for row in rows}
+
+
+def _dispatcher(bot, db, **kwargs):
+    clock = {'now': NOW}
+    dispatcher = ReminderDispatcher(bot, db, rate=1000.0, wall_clock=lambda: clock['now'], **kwargs)
+    return dispatcher, clock
+
+
+def test_concurrency_is_bounded_and_sends_are_logged(db):
+    bot = ScriptedBot()
+    dispatcher, _ = _dispatcher(bot, db, concurrency=3)
+    assert asyncio.run(dispatcher.dispatch([(user_id, DAY) for user_id in range(1, 11)])) == 10
+    assert bot.peak == 3
+    ledger = _ledger(db)
+    assert {row['status'] for row in ledger.values()} == {'sent'} and len(ledger) == 10
+    assert db.get_user_settings(1)['last_reminder_date'] == DAY
+    # повтор той же пачки ничего не шлёт
+    assert asyncio.run(dispatcher.dispatch([(1, DAY)])) == 0
+
+
+def test_errors_are_classified(db):
+    bot = ScriptedBot({
+        1: [FloodWaitError(request=None, capture=30)],
+        2: [UserIsBlockedError(request=None)],
+        3: [RuntimeError('network')] * 5,
+    })
+    dispatcher, clock = _dispatcher(bot, db, max_attempts=2, retry_delay=10)
+    assert asyncio.run(dispatcher.dispatch([(1, DAY), (2, DAY), (3, DAY), (4, DAY)])) == 1
+
+    ledger = _ledger(db)
+    assert ledger[1]['status'] == 'retry' and ledger[1]['next_attempt_at'] == NOW + 30
+    assert ledger[2]['status'] == 'blocked'
+    assert db.get_user_settings(2)['reminder_enabled'] == 0
+    assert ledger[3]['status'] == 'retry' and ledger[3]['next_attempt_at'] == NOW + 10
+
+    # через 10 секунд повторяется только пользователь 3 и сдаётся на второй попытке
+    clock['now'] = NOW + 10
+    assert asyncio.run(dispatcher.retry_due()) == 0
+    ledger = _ledger(db)
+    assert ledger[3]['status'] == 'failed' and ledger[3]['attempts'] == 2
+    assert ledger[1]['status'] == 'retry'
+
+    clock['now'] = NOW + 30
+    assert asyncio.run(dispatcher.retry_due()) == 1
+    assert _ledger(db)[1]['status'] == 'sent' and bot.sent == [4, 1]
+    assert db.get_reminder_retries(NOW + 3600) == []
+
+
+def test_retry_skipped_when_entry_written_meanwhile(db):
+    bot = ScriptedBot({5: [RuntimeError('network')]})
+    dispatcher, clock = _dispatcher(bot, db)
+    asyncio.run(dispatcher.dispatch([(5, DAY)]))
+    db.create_diary_entry(5, date(2027, 1, 15))
+
+    clock['now'] = NOW + 3600
+    assert asyncio.run(dispatcher.retry_due()) == 0
+    assert _ledger(db)[5]['status'] == 'skipped' and bot.sent == []
+
+
+def test_retry_for_past_local_date_expires(db):
+    bot = ScriptedBot({6: [FloodWaitError(request=None, capture=600)]})
+    dispatcher, clock = _dispatcher(bot, db)
+    # 23:55 по Москве: повтор после FloodWait придётся уже на следующие сутки
+    clock['now'] = NOW + 12 * 3600 + 55 * 60
+    asyncio.run(dispatcher.dispatch([(6, DAY)]))
+    # у пользователя есть и повтор за новую дату
+    db.record_reminder_deliveries([(6, '2027-01-16', 'retry', 'FloodWait 1s', clock['now'])])
+
+    clock['now'] += 600
+    assert asyncio.run(dispatcher.retry_due()) == 1
+    assert bot.sent == [6]
+    with db.get_connection() as conn:
+        rows = dict(conn.execute('SELECT local_date, status FROM reminder_deliveries WHERE user_id = 6'))
+    assert rows == {DAY: 'expired', '2027-01-16': 'sent'}
+    assert db.get_user_settings(6)['last_reminder_date'] == '2027-01-16'
+
+
+def test_finished_deliveries_are_purged(db):
+    db.record_reminder_deliveries([
+        (1, '2026-11-01', 'sent', None, None),
+        (2, '2026-11-01', 'retry', 'network', NOW),
+        (3, '2026-11-01', 'expired', None, None),
+        (4, DAY, 'sent', None, None),
+    ])
+    assert db.purge_reminder_deliveries('2026-12-16') == 2
+    assert sorted(_ledger(db)) == [2, 4]
+
+
+def test_retry_query_uses_partial_index(db):
+    with db.get_connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM reminder_deliveries "
+            "WHERE status = 'retry' AND next_attempt_at <= ?", (NOW,)))
+    assert 'idx_reminder_deliveries_retry' in plan
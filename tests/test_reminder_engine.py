@@ -0,0 +1,181 @@
+import asyncio
+import types
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from bot.reminders.engine import TICK_JOB_ID, ReminderEngine
+from core.database.manager import DatabaseManager, reminder_utc_minute
+
+WINTER = datetime(2026, 1, 15, 12, 0, tzinfo=timezone.utc)
+SUMMER = datetime(2026, 7, 15, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.i18n = types.SimpleNamespace(t=lambda key, lang='ru', **kw: f"{key}:{lang}")
+
+    async def send_message(self, user_id, text):
+        self.sent.append((user_id, text))
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, func, trigger, **kwargs):
+        self.jobs[kwargs['id']] = (func, trigger, kwargs)
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / 'diary.db'))
+
+
+def test_utc_minute_follows_zone_offset():
+    assert reminder_utc_minute('21:00', 'Europe/Moscow', WINTER) == 18 * 60
+    assert reminder_utc_minute('21:00', 'America/New_York', WINTER) == 2 * 60
+    assert reminder_utc_minute('21:00', 'America/New_York', SUMMER) == 1 * 60
+    assert reminder_utc_minute('08:30', 'Asia/Tokyo', WINTER) == 23 * 60 + 30
+    assert reminder_utc_minute('25:00', 'Asia/Tokyo') is None
+    assert reminder_utc_minute('21:00', 'Нет/Такого', WINTER) == 18 * 60  # пояс по умолчанию
+
+
+def test_column_maintained_on_settings_change_and_indexed(db):
+    db.create_user(1)
+    db.create_user(2)
+    db.update_user_settings(2, reminder_time='08:30', timezone='Asia/Tokyo')
+    db.create_user(3)
+    db.update_user_settings(3, reminder_enabled=0)
+
+    assert [r['user_id'] for r in db.get_due_reminder_users(18 * 60)] == [1]
+    assert [r['user_id'] for r in db.get_due_reminder_users(23 * 60 + 30)] == [2]
+
+    with db.get_connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            'EXPLAIN QUERY PLAN SELECT user_id FROM user_settings s '
+            'WHERE s.reminder_enabled = 1 AND s.reminder_utc_minute = ?', (1080,)))
+    assert 'idx_user_settings_reminder_minute' in plan
+
+
+def test_dst_transition_rederives_only_changed_zones(db):
+    db.create_user(1)
+    db.update_user_settings(1, timezone='America/New_York')
+    db.create_user(2)
+    engine = ReminderEngine(FakeBot(), db)
+
+    engine.sync_offsets(WINTER)
+    assert [r['user_id'] for r in db.get_due_reminder_users(2 * 60)] == [1]
+    assert engine.sync_offsets(WINTER) == 0  # тот же час — без запросов
+
+    # летом смещение Нью-Йорка меняется, Москвы — нет
+    assert engine.sync_offsets(SUMMER) == 1
+    assert [r['user_id'] for r in db.get_due_reminder_users(1 * 60)] == [1]
+    assert [r['user_id'] for r in db.get_due_reminder_users(18 * 60)] == [2]
+
+
+def test_tick_sends_due_reminders_and_catches_up(db):
+    for user_id in (1, 2, 3, 4):
+        db.create_user(user_id)
+    db.update_user_settings(2, reminder_time='20:59')
+    db.create_diary_entry(3, date(2026, 1, 15))   # запись уже есть
+    db.update_last_reminder_date(4, '2026-01-15')  # уже напомнили сегодня
+    bot, scheduler = FakeBot(), FakeScheduler()
+    engine = ReminderEngine(bot, db, batch_size=1)
+    engine.start(scheduler)
+    assert list(scheduler.jobs) == [TICK_JOB_ID]
+    engine.sync_offsets(WINTER)
+
+    engine._last_minute = datetime(2026, 1, 15, 17, 58, tzinfo=timezone.utc)
+    # тик опоздал на минуту: 17:59 (user 2) догоняется вместе с 18:00
+    assert asyncio.run(engine.tick(datetime(2026, 1, 15, 18, 0, 30, tzinfo=timezone.utc))) == 2
+    assert sorted(user_id for user_id, _ in bot.sent) == [1, 2]
+    assert db.get_user_settings(1)['last_reminder_date'] == '2026-01-15'
+
+    # повторный тик той же минуты ничего не шлёт
+    assert asyncio.run(engine.tick(datetime(2026, 1, 15, 18, 0, tzinfo=timezone.utc))) == 0
+
+
+def test_batch_recipients_use_one_query_and_one_mark(db, monkeypatch):
+    for user_id in range(1, 7):
+        db.create_user(user_id)
+    db.create_diary_entry(2, date(2026, 1, 15))
+    db.create_diary_entry(3, date(2026, 1, 14))     # запись за другой день не мешает
+    db.update_last_reminder_date(4, '2026-01-15')
+    db.update_user_settings(5, reminder_enabled=0)
+    due = [(user_id, '2026-01-15') for user_id in (1, 2, 3, 4, 5, 6, 99)]
+
+    connections = []
+    get_connection = db.get_connection
+    monkeypatch.setattr(db, 'get_connection', lambda: connections.append(1) or get_connection())
+
+    assert sorted(r['user_id'] for r in db.get_reminder_recipients(due)) == [1, 3, 6]
+    assert db.record_reminder_deliveries(
+        [(1, '2026-01-15', 'sent', None, None), (3, '2026-01-15', 'sent', None, None)]) == 2
+    assert len(connections) == 2
+    assert sorted(r['user_id'] for r in db.get_reminder_recipients(due)) == [6]
+    assert db.get_reminder_recipients([]) == [] and db.record_reminder_deliveries([]) == 0
+
+
+def test_restart_restores_state_and_touches_only_changed(db, monkeypatch):
+    db.create_user(1)
+    db.update_user_settings(1, timezone='America/New_York')
+    db.create_user(2)
+    scans = []
+    get_timezones = db.get_reminder_timezones
+    monkeypatch.setattr(db, 'get_reminder_timezones', lambda: scans.append(1) or get_timezones())
+    ReminderEngine(FakeBot(), db).restore(WINTER)  # первый запуск — полный проход по поясам
+    assert scans == [1]
+
+    # перезапуск без изменений смещений: ни полного прохода, ни записей
+    assert ReminderEngine(FakeBot(), db).restore(WINTER + timedelta(minutes=5)) == 0
+    assert scans == [1]
+
+    # пользователь без минуты (старая БД) и переход Нью-Йорка на летнее время
+    with db.get_connection() as conn:
+        conn.execute('UPDATE user_settings SET reminder_utc_minute = NULL WHERE user_id = 2')
+        conn.commit()
+    assert ReminderEngine(FakeBot(), db).restore(SUMMER) == 2
+    assert [r['user_id'] for r in db.get_due_reminder_users(1 * 60)] == [1]
+    assert [r['user_id'] for r in db.get_due_reminder_users(18 * 60)] == [2]
+
+
+def test_restart_catches_up_missed_window(db):
+    db.create_user(1)  # 21:00 по Москве = 18:00 UTC
+    db.create_user(2)
+    db.update_user_settings(2, reminder_time='02:30')  # 23:30 UTC, за пределами окна
+    engine = ReminderEngine(FakeBot(), db)
+    engine.restore(datetime(2026, 1, 15, 16, 30, tzinfo=timezone.utc))
+
+    # бот стоял полтора часа; первый тик догоняет 16:31..18:10 одним запросом
+    bot = FakeBot()
+    engine = ReminderEngine(bot, db)
+    now = datetime(2026, 1, 15, 18, 10, tzinfo=timezone.utc)
+    engine.restore(now)
+    assert asyncio.run(engine.tick(now)) == 1 and [u for u, _ in bot.sent] == [1]
+    assert db.get_user_settings(1)['last_reminder_date'] == '2026-01-15'
+
+    # после суточного простоя пропущенное не догоняется
+    engine = ReminderEngine(FakeBot(), db)
+    engine.restore(now + timedelta(days=1))
+    assert engine._last_minute == now + timedelta(days=1)
+
+
+def test_due_window_wraps_midnight(db):
+    db.create_user(1)
+    db.update_user_settings(1, reminder_time='02:58')  # 23:58 UTC
+    db.create_user(2)
+    db.update_user_settings(2, reminder_time='03:01')  # 00:01 UTC
+    db.create_user(3)
+    assert sorted(r['user_id'] for r in db.get_due_reminder_users(23 * 60 + 55, 5)) == [1, 2]
+
+
+def test_tick_purges_old_deliveries_once_a_day(db, monkeypatch):
+    engine = ReminderEngine(FakeBot(), db, delivery_retention_days=30)
+    purged = []
+    monkeypatch.setattr(db, 'purge_reminder_deliveries', lambda before: purged.append(before) or 0)
+    asyncio.run(engine.tick(WINTER))
+    asyncio.run(engine.tick(WINTER + timedelta(minutes=1)))
+    asyncio.run(engine.tick(WINTER + timedelta(days=1)))
+    assert purged == ['2025-12-16', '2025-12-17']
@@ -1,14 +1,17 @@
-from bot.reminders.manager import schedule_user_reminder
+from bot.reminders.manager import schedule_user_reminder, disable_user_reminder
 
 class DummyDB2:
-    def __init__(self, tz="Europe/Moscow"):
-        self.tz = tz
-    def get_user(self, user_id: int):
-        return {"user_id": user_id, "timezone": self.tz, "language_code": "ru"}
+    def __init__(self, minute=1085):
+        self.minute = minute
+        self.refreshed = []
+    def update_reminder_minute(self, user_id: int):
+        self.refreshed.append(user_id)
+        return self.minute
 
 class DummyScheduler:
-    def __init__(self):
-        self.jobs = {}
+    """Планировщик со старой задачей пользователя (до перехода на поминутный тик)."""
+    def __init__(self, jobs=()):
+        self.jobs = {job_id: object() for job_id in jobs}
         self.removed = []
     def remove_job(self, job_id):
         if job_id in self.jobs:
@@ -16,44 +19,38 @@ class DummyScheduler:
             self.jobs.pop(job_id)
         else:
             raise Exception("no job")
-    def add_job(self, func, trigger, hour, minute, id, kwargs, replace_existing, misfire_grace_time, timezone):
-        self.jobs[id] = {
-            'func': func,
-            'trigger': trigger,
-            'hour': hour,
-            'minute': minute,
-            'kwargs': kwargs,
-            'replace_existing': replace_existing,
-            'misfire_grace_time': misfire_grace_time,
-            'timezone': timezone,
-        }
 
 class DummyBot2:
-    def __init__(self):
-        self.scheduler = DummyScheduler()
+    def __init__(self, jobs=()):
+        self.scheduler = DummyScheduler(jobs)
 
 
 def test_schedule_user_reminder_initial():
     db = DummyDB2()
     bot = DummyBot2()
-    schedule_user_reminder(bot, db, 10, "21:05")
-    assert '10' in bot.scheduler.jobs
-    job = bot.scheduler.jobs['10']
-    assert job['hour'] == 21 and job['minute'] == 5
-    assert job['timezone'] == 'Europe/Moscow'
+    assert schedule_user_reminder(bot, db, 10, "21:05") == 1085
+    assert db.refreshed == [10]
+    # отдельных задач на пользователя больше нет
+    assert bot.scheduler.jobs == {}
 
 
-def test_schedule_user_reminder_reschedule():
+def test_schedule_user_reminder_reschedule_drops_legacy_job():
     db = DummyDB2()
-    bot = DummyBot2()
-    schedule_user_reminder(bot, db, 10, "21:05")
+    bot = DummyBot2(jobs=['10'])
     schedule_user_reminder(bot, db, 10, "20:30")
-    job = bot.scheduler.jobs['10']
-    assert job['hour'] == 20 and job['minute'] == 30
+    assert bot.scheduler.removed == ['10']
+    assert db.refreshed == [10]
 
 
 def test_schedule_user_reminder_invalid():
     db = DummyDB2()
     bot = DummyBot2()
-    schedule_user_reminder(bot, db, 11, "99:99")
-    assert '11' not in bot.scheduler.jobs
+    assert schedule_user_reminder(bot, db, 11, "99:99") is None
+    assert db.refreshed == []
+
+
+def test_disable_user_reminder_without_scheduler():
+    disable_user_reminder(object(), 12)  # без планировщика — просто ничего не делает
+    bot = DummyBot2(jobs=['12'])
+    disable_user_reminder(bot, 12)
+    assert bot.scheduler.removed == ['12']
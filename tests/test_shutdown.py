@@ -0,0 +1,121 @@
+import asyncio
+import types
+
+import pytest
+from telethon.tl.types import Message, PeerUser, UpdateNewMessage
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.shutdown import CLOSE, DRAIN, FLUSH, ShutdownCoordinator, drain_apscheduler
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+
+def test_steps_run_in_order_and_report_abandoned():
+    calls = []
+
+    async def drain(timeout):
+        calls.append('drain')
+        return 3
+
+    coordinator = ShutdownCoordinator(deadline=1.0)
+    coordinator.add_step('close', lambda timeout: calls.append('close'), CLOSE)
+    coordinator.add_step('flush', lambda timeout: calls.append('flush'), FLUSH)
+    coordinator.add_step('drain', drain, DRAIN)
+
+    report = asyncio.run(coordinator.run('SIGTERM'))
+    assert calls == ['drain', 'flush', 'close']
+    assert report.reason == 'SIGTERM'
+    assert report.steps == {'drain': 'ok', 'flush': 'ok', 'close': 'ok'}
+    assert report.abandoned == {'drain': 3}
+    assert not report.clean
+
+
+def test_slow_step_times_out_and_later_steps_still_run():
+    calls = []
+
+    async def slow(timeout):
+        await asyncio.sleep(10)
+
+    def broken(timeout):
+        raise RuntimeError('boom')
+
+    coordinator = ShutdownCoordinator(deadline=0.2)
+    coordinator.add_step('slow', slow, DRAIN)
+    coordinator.add_step('broken', broken, FLUSH)
+    coordinator.add_step('close', lambda timeout: calls.append(timeout), CLOSE)
+
+    async def scenario():
+        # повторный вызов не запускает шаги второй раз
+        first, second = await asyncio.gather(coordinator.run(), coordinator.run())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert first.steps == {'slow': 'timeout', 'broken': 'error', 'close': 'ok'}
+    assert len(calls) == 1 and calls[0] < 0.1
+    assert first.elapsed < 1
+
+
+def test_drain_apscheduler_waits_for_running_jobs():
+    class FakeScheduler:
+        running = True
+
+        def __init__(self, futures):
+            self._executors = {'default': types.SimpleNamespace(_pending_futures=set(futures))}
+            self.calls = []
+
+        def pause(self):
+            self.calls.append('pause')
+
+        def shutdown(self, wait=True):
+            self.calls.append(('shutdown', wait))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        quick, stuck = loop.create_future(), loop.create_future()
+        loop.call_later(0.01, quick.set_result, None)
+        scheduler = FakeScheduler([quick, stuck])
+        abandoned = await drain_apscheduler(scheduler, 0.1)
+        return scheduler, abandoned
+
+    scheduler, abandoned = asyncio.run(scenario())
+    assert abandoned == 1
+    assert scheduler.calls == ['pause', ('shutdown', False)]
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x', shutdown_deadline=1.0)
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    return bot
+
+
+def test_core_stops_intake_and_drains_updates(bot, monkeypatch):
+    handled, unloaded = [], []
+
+    async def fake_dispatch(self, update):
+        await asyncio.sleep(0.02)
+        handled.append(update)
+
+    async def fake_disconnect():
+        handled.append('disconnect')
+
+    monkeypatch.setattr(bot.update_scheduler, '_handler', lambda update: fake_dispatch(bot, update))
+    monkeypatch.setattr(bot, 'disconnect', fake_disconnect)
+    bot._plugins['diary'] = types.SimpleNamespace(unload=lambda: unloaded.append('diary'))
+    message = UpdateNewMessage(Message(id=1, peer_id=PeerUser(42), message='hi'), pts=1, pts_count=1)
+
+    async def scenario():
+        await bot._dispatch_update(message)
+        report = await bot.graceful_shutdown('SIGTERM')
+        # после остановки приёма новые апдейты не обрабатываются
+        await bot._dispatch_update(message)
+        return report
+
+    report = asyncio.run(scenario())
+    assert handled == [message, 'disconnect']
+    assert unloaded == ['diary']
+    assert report.steps['drain_updates'] == 'ok'
+    assert report.abandoned == {}
+    assert bot._dropped_updates == 1
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta, timezone
+
+from bot.user_context import UserContext
+from core.database.manager import DatabaseManager
+from core.timezones import TimezoneService, get_zone
+from core.timezones.service import next_transition
+
+# переход Нью-Йорка на летнее время: 2026-03-08 02:00 EST = 07:00 UTC
+NY_SPRING = datetime(2026, 3, 8, 7, 0, tzinfo=timezone.utc)
+
+
+def test_zones_are_cached_and_unknown_falls_back():
+    assert get_zone('Asia/Tokyo') is get_zone('Asia/Tokyo')
+    assert get_zone('Нет/Такого') is get_zone(None) is get_zone('Europe/Moscow')
+
+
+def test_next_transition_is_found_to_the_minute():
+    assert next_transition(get_zone('America/New_York'), datetime(2026, 1, 15, tzinfo=timezone.utc)) == NY_SPRING
+    start = datetime(2026, 1, 15, tzinfo=timezone.utc)
+    assert next_transition(get_zone('Asia/Tokyo'), start) == start + timedelta(days=366)
+
+
+def test_offset_cached_until_transition(monkeypatch):
+    import core.timezones.service as service_module
+
+    service = TimezoneService()
+    calls = []
+    original = service_module.next_transition
+    monkeypatch.setattr(service_module, 'next_transition', lambda *a: calls.append(1) or original(*a))
+
+    before = NY_SPRING - timedelta(minutes=1)
+    assert service.offset_minutes('America/New_York', before - timedelta(days=30)) == -300
+    assert service.offset_minutes('America/New_York', before) == -300
+    assert len(calls) == 1  # тот же период — из кэша
+    assert service.offset_minutes('America/New_York', NY_SPRING) == -240
+    assert len(calls) == 2
+
+
+def test_local_dates_and_rollover():
+    service = TimezoneService()
+    now = datetime(2026, 1, 15, 21, 0, 30, tzinfo=timezone.utc)  # 00:00:30 по Москве
+    assert service.local_date('Europe/Moscow', now) == date(2026, 1, 16)
+    assert service.local_date('America/New_York', now) == date(2026, 1, 15)
+    assert service.local_dates(['Europe/Moscow', 'Asia/Tokyo', 'Europe/Moscow'], now) == {
+        'Europe/Moscow': date(2026, 1, 16), 'Asia/Tokyo': date(2026, 1, 16),
+    }
+    since = now - timedelta(minutes=1)
+    assert set(service.rolled_over(['Europe/Moscow', 'Asia/Tokyo', None], since, now)) == {'Europe/Moscow', None}
+
+
+def test_users_rolled_over_in_bulk(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'diary.db'))
+    for user_id, tz_name in ((1, 'Europe/Moscow'), (2, 'Asia/Tokyo'), (3, 'Europe/Moscow')):
+        db.create_user(user_id)
+        db.update_user_settings(user_id, timezone=tz_name)
+    now = datetime(2026, 1, 15, 21, 0, tzinfo=timezone.utc)
+    users = TimezoneService().users_rolled_over(db, now - timedelta(minutes=1), now)
+    assert sorted(u['user_id'] for u in users) == [1, 3]
+
+
+def test_user_context_today_uses_user_zone():
+    now = datetime(2026, 1, 15, 22, 0, tzinfo=timezone.utc)
+    assert UserContext(user_id=1, timezone='Asia/Tokyo').today(now) == date(2026, 1, 16)
+    assert UserContext(user_id=1, timezone='America/New_York').today(now) == date(2026, 1, 15)
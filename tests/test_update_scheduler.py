@@ -0,0 +1,96 @@
+import asyncio
+import types
+
+import pytest
+from telethon.tl.types import (
+    Message, PeerUser, UpdateBotCallbackQuery, UpdateNewMessage,
+)
+
+from bot.tlgbotcore import hacks
+from bot.tlgbotcore.metrics import MetricsRegistry
+from bot.tlgbotcore.tlgbotcore import TlgBotCore
+from bot.tlgbotcore.update_scheduler import UpdateScheduler
+
+
+def test_chat_is_serialized_and_chats_run_in_parallel():
+    log = []
+    running = {'now': 0, 'max': 0}
+
+    async def handler(item):
+        chat, n = item
+        running['now'] += 1
+        running['max'] = max(running['max'], running['now'])
+        log.append(('start', chat, n))
+        await asyncio.sleep(0.01)
+        log.append(('end', chat, n))
+        running['now'] -= 1
+
+    async def scenario():
+        scheduler = UpdateScheduler(handler, workers=2, metrics=MetricsRegistry())
+        for n in range(3):
+            scheduler.submit('a', ('a', n))
+            scheduler.submit('b', ('b', n))
+            scheduler.submit('c', ('c', n))
+        await scheduler.join()
+        await scheduler.close()
+
+    asyncio.run(scenario())
+    assert running['max'] == 2
+    for chat in 'abc':
+        events = [(kind, n) for kind, c, n in log if c == chat]
+        # внутри чата: начало следующего только после конца предыдущего
+        assert events == [('start', 0), ('end', 0), ('start', 1), ('end', 1), ('start', 2), ('end', 2)]
+
+
+def test_overflow_is_shed_with_callback():
+    shed = []
+    metrics = MetricsRegistry()
+
+    async def handler(item):
+        await asyncio.sleep(0)
+
+    async def scenario():
+        scheduler = UpdateScheduler(handler, workers=1, max_pending=10, max_chat_pending=2,
+                                    on_shed=lambda key, item: shed.append(item), metrics=metrics)
+        results = [scheduler.submit(1, n) for n in range(4)]
+        await scheduler.join()
+        await scheduler.close()
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+    assert shed == [2, 3]
+    assert metrics.get('tlgbot_updates_shed_total').get() == 2
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    bot._event_builders = hacks.ReverseList()
+    bot.me = types.SimpleNamespace(bot=True, username='testbot')
+    return bot
+
+
+def test_updates_are_keyed_by_chat(bot):
+    message = UpdateNewMessage(Message(id=1, peer_id=PeerUser(42), message='hi'), pts=1, pts_count=1)
+    callback = UpdateBotCallbackQuery(query_id=1, user_id=42, peer=PeerUser(42), msg_id=1, chat_instance=0)
+    assert bot._update_chat_id(message) == 42
+    assert bot._update_chat_id(callback) == 42
+
+
+def test_dispatch_goes_through_scheduler_except_open_conversation(bot, monkeypatch):
+    submitted, direct = [], []
+    monkeypatch.setattr(bot.update_scheduler, 'submit', lambda key, update: submitted.append(key))
+
+    async def fake_dispatch(self, update):
+        direct.append(update)
+
+    monkeypatch.setattr('telethon.client.updates.UpdateMethods._dispatch_update', fake_dispatch)
+    message = UpdateNewMessage(Message(id=1, peer_id=PeerUser(42), message='hi'), pts=1, pts_count=1)
+
+    asyncio.run(bot._dispatch_update(message))
+    assert submitted == [42] and direct == []
+
+    bot._conversations[42].add(object())
+    asyncio.run(bot._dispatch_update(message))
+    assert submitted == [42] and direct == [message]
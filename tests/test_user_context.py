@@ -0,0 +1,165 @@
+import asyncio
+import types
+
+import pytest
+
+from bot.require_diary_user import get_user_lang, require_diary_user
+from bot.tlgbotcore.models import Role, User
+from bot.user_context import UserContext, get_user_context, resolve_user_context
+from core.database.manager import DatabaseManager
+
+
+class CountingStorage:
+    def __init__(self, users):
+        self.users = users
+        self.calls = 0
+
+    def get_user(self, user_id):
+        self.calls += 1
+        return self.users.get(user_id)
+
+
+class CountingDB:
+    def __init__(self, db):
+        self.db = db
+        self.calls = 0
+
+    def get_user_with_settings(self, user_id):
+        self.calls += 1
+        return self.db.get_user_with_settings(user_id)
+
+
+class DummyEvent:
+    def __init__(self, sender_id):
+        self.sender_id = sender_id
+        self.replies = []
+
+    async def reply(self, text):
+        self.replies.append(text)
+
+
+@pytest.fixture
+def bot(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'daylog.db'))
+    db.create_user(1, 'diary', 'Diary')
+    db.update_user_settings(1, language_code='tt', timezone='Asia/Yekaterinburg', export_format='json')
+    storage = CountingStorage({
+        1: User(id=1, name='diary', active=True, role=Role.user, lang='en'),
+        2: User(id=2, name='admin', active=True, role=Role.admin, lang='ba'),
+    })
+    return types.SimpleNamespace(
+        settings=storage, diary_db=CountingDB(db), admins=[2],
+        i18n=types.SimpleNamespace(default_lang='ru', t=lambda key, lang=None, **kw: f'{key}:{lang}'),
+    )
+
+
+def test_resolve_reads_each_store_once(bot):
+    ctx = resolve_user_context(bot, DummyEvent(1))
+    assert isinstance(ctx, UserContext)
+    assert (ctx.lang, ctx.role, ctx.is_admin) == ('en', Role.user, False)
+    assert ctx.authorized and ctx.registered
+    assert ctx.timezone == 'Asia/Yekaterinburg'
+    assert ctx.settings['export_format'] == 'json'
+    assert bot.settings.calls == 1 and bot.diary_db.calls == 1
+
+    admin = resolve_user_context(bot, DummyEvent(2))
+    assert admin.is_admin and not admin.registered
+
+
+def test_helpers_share_one_context_per_update(bot):
+    event = DummyEvent(1)
+    seen = []
+
+    @require_diary_user
+    async def handler(ev):
+        seen.append(get_user_lang(ev))
+        seen.append(get_user_context(ev, bot).settings['reminder_time'])
+
+    # как middleware TlgBotCore: контекст вычисляется до обработчика
+    get_user_context(event, bot)
+    asyncio.run(handler(event))
+    assert seen == ['en', '21:00']
+    assert event.lang == 'tt'
+    assert bot.settings.calls == 1 and bot.diary_db.calls == 1
+
+
+def test_unregistered_user_is_asked_to_start(bot):
+    event = DummyEvent(2)
+    event.user_context = resolve_user_context(bot, event)
+    event.client = bot
+
+    @require_diary_user
+    async def handler(ev):
+        raise AssertionError('не должен вызываться')
+
+    asyncio.run(handler(event))
+    assert event.replies == ['diary_user_required:ba']
+
+
+def test_core_middleware_resolves_context_once(tmp_path, monkeypatch):
+    from telethon import events
+    from bot.tlgbotcore import hacks
+    from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+    monkeypatch.chdir(tmp_path)
+    core = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    core._event_builders = hacks.ReverseList()
+    core.me = types.SimpleNamespace(bot=True, username='testbot')
+    resolved = []
+    core.user_context_resolver = lambda ev: resolved.append(ev) or UserContext(user_id=ev.sender_id, lang='tt', authorized=True)
+    langs = []
+
+    @core.on(events.NewMessage)
+    async def first(ev):
+        langs.append(get_user_context(ev).lang)
+
+    @core.on(events.NewMessage)
+    async def second(ev):
+        langs.append(get_user_context(ev).lang)
+
+    event = DummyEvent(1)
+    access_filter = core.cmd('today').func
+
+    async def dispatch():
+        assert await access_filter(event)
+        for _, cb in core._event_builders:
+            await cb(event)
+
+    asyncio.run(dispatch())
+    assert len(resolved) == 1
+    assert langs == ['tt', 'tt']
+
+
+def test_storage_error_gives_minimal_context(bot):
+    def broken(user_id):
+        raise OSError('storage is down')
+
+    bot.settings.get_user = broken
+    ctx = resolve_user_context(bot, DummyEvent(1))
+    assert (ctx.user_id, ctx.lang, ctx.authorized, ctx.registered) == (1, 'ru', False, False)
+
+
+def test_context_error_does_not_fail_handler(tmp_path, monkeypatch):
+    from telethon import events
+    from bot.tlgbotcore import hacks
+    from bot.tlgbotcore.tlgbotcore import TlgBotCore
+
+    monkeypatch.chdir(tmp_path)
+    core = TlgBotCore('testbot', plugin_path='plugins', api_id=1, api_hash='x')
+    core._event_builders = hacks.ReverseList()
+
+    def resolver(ev):
+        raise OSError('storage is down')
+
+    core.user_context_resolver = resolver
+    handled = []
+
+    @core.on(events.NewMessage)
+    async def start(ev):
+        handled.append(ev.sender_id)
+
+    for _, cb in core._event_builders:
+        asyncio.run(cb(DummyEvent(7)))
+    assert handled == [7]
+    calls = core._handler_calls
+    assert calls.get(plugin='test_user_context', handler='start', status='ok') == 1